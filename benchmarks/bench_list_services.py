@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark ServiceManager.list_all_services: systemctl vs. D-Bus backend.
+
+Usage:
+    python benchmarks/bench_list_services.py [--runs N] [--type service]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from core.service_manager import ServiceManager, ServiceType
+
+
+def bench(mgr: ServiceManager, service_type: ServiceType, runs: int) -> list:
+    """Time repeated uncached listings.
+
+    Args:
+        mgr: ServiceManager to benchmark (cache disabled)
+        service_type: Unit type to list
+        runs: Number of timed runs
+
+    Returns:
+        List of durations in milliseconds
+    """
+    mgr.list_all_services(service_type=service_type)  # warm up connection
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        mgr.list_all_services(service_type=service_type)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--type', default='service', choices=[t.value for t in ServiceType])
+    args = parser.parse_args()
+    service_type = ServiceType(args.type)
+
+    backends = [
+        ('systemctl', ServiceManager(cache_ttl=0, use_dbus=False)),
+        ('dbus', ServiceManager(cache_ttl=0, use_dbus=True)),
+    ]
+    for label, mgr in backends:
+        if label == 'dbus' and mgr._get_systemd() is None:
+            print(f"{label:>10}: unavailable (no D-Bus connection)")
+            continue
+        count = len(mgr.list_all_services(service_type=service_type))
+        timings = bench(mgr, service_type, args.runs)
+        print(f"{label:>10}: {count} units, median {statistics.median(timings):.1f} ms, "
+              f"min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -114,6 +114,16 @@ class ServiceRow(Gtk.Box):
 class MainWindow(Adw.ApplicationWindow):
     """Main window with complete service management."""
     
+    # State filters pushed down to list_all_services()
+    FILTER_TYPES = ["All", "Active", "Inactive", "Failed", "Enabled"]
+    FILTER_QUERIES = {
+        "All": {},
+        "Active": {'states': ['active']},
+        "Inactive": {'states': ['inactive']},
+        "Failed": {'states': ['failed']},
+        "Enabled": {'enabled': True},
+    }
+    
     def __init__(self, app):
         super().__init__(application=app)
         self.set_title("CachyOS Service Manager - Full Control")
@@ -125,7 +135,12 @@ class MainWindow(Adw.ApplicationWindow):
         self.all_services = []
         self.filtered_services = []
         
+        self._reload_pending = False
+        
         self.setup_ui()
+        self.live_updates = self.service_manager.enable_live_updates()
+        if self.live_updates:
+            self.service_manager.add_change_listener(self.on_unit_changed)
         self.load_services()
         self.start_auto_refresh()
     
@@ -170,10 +185,8 @@ class MainWindow(Adw.ApplicationWindow):
         
         # Filter dropdown
         filter_label = Gtk.Label(label="Filter:")
-        self.filter_dropdown = Gtk.DropDown.new_from_strings(
-            ["All", "Active", "Inactive", "Failed", "Enabled"]
-        )
-        self.filter_dropdown.connect("notify::selected", lambda *_: self.filter_services())
+        self.filter_dropdown = Gtk.DropDown.new_from_strings(self.FILTER_TYPES)
+        self.filter_dropdown.connect("notify::selected", lambda *_: self.load_services())
         
         # Show inactive checkbox
         self.show_inactive_check = Gtk.CheckButton(label="Show Inactive")
@@ -239,12 +252,14 @@ class MainWindow(Adw.ApplicationWindow):
     def load_services(self):
         """Load all services."""
         self.status_label.set_text("Loading services...")
+        show_inactive = self.show_inactive_check.get_active()
+        query = self.FILTER_QUERIES[self.current_filter()]
         
         def load():
-            show_inactive = self.show_inactive_check.get_active()
             services = self.service_manager.list_all_services(
                 service_type=ServiceType.SERVICE,
-                show_inactive=show_inactive
+                show_inactive=show_inactive,
+                **query
             )
             GLib.idle_add(self.on_services_loaded, services)
         
@@ -256,38 +271,32 @@ class MainWindow(Adw.ApplicationWindow):
         self.filtered_services = services
         self.filter_services()
         
-        # Update stats
-        stats = self.service_manager.get_stats(services)
-        self.stats_label.set_text(
-            f"Total: {stats['total']} | Active: {stats['active']} | "
-            f"Inactive: {stats['inactive']} | Failed: {stats['failed']}"
-        )
+        # Update stats (a state-filtered listing only holds a subset)
+        if self.current_filter() == "All":
+            stats = self.service_manager.get_stats(services)
+            self.stats_label.set_text(
+                f"Total: {stats['total']} | Active: {stats['active']} | "
+                f"Inactive: {stats['inactive']} | Failed: {stats['failed']}"
+            )
         
         self.status_label.set_text(f"Loaded {len(services)} services")
     
+    def current_filter(self):
+        """Get the selected state filter name."""
+        return self.FILTER_TYPES[self.filter_dropdown.get_selected()]
+    
     def filter_services(self):
-        """Filter services."""
+        """Filter loaded services by search text.
+        
+        State filters are applied by systemd when loading, see FILTER_QUERIES.
+        """
         services = self.all_services
         
-        # Search filter
+        # Search filter (matches descriptions too, so it stays client-side)
         search = self.search_entry.get_text().strip()
         if search:
             services = self.service_manager.search_services(search, services)
         
-        # State filter
-        filter_idx = self.filter_dropdown.get_selected()
-        filter_types = ["All", "Active", "Inactive", "Failed", "Enabled"]
-        filter_type = filter_types[filter_idx]
-        
-        if filter_type == "Active":
-            services = [s for s in services if s.state == ServiceState.ACTIVE]
-        elif filter_type == "Inactive":
-            services = [s for s in services if s.state == ServiceState.INACTIVE]
-        elif filter_type == "Failed":
-            services = [s for s in services if s.state == ServiceState.FAILED]
-        elif filter_type == "Enabled":
-            services = [s for s in services if s.enabled]
-        
         self.filtered_services = services
         self.display_services(services)
     
@@ -354,11 +363,27 @@ class MainWindow(Adw.ApplicationWindow):
         toast.set_timeout(3)
         self.toast_overlay.add_toast(toast)
         
-        # Refresh after action
-        GLib.timeout_add(1000, self.load_services)
+        # Refresh after action (live updates deliver the change by themselves)
+        if not self.live_updates:
+            GLib.timeout_add(1000, self.load_services)
+    
+    def on_unit_changed(self, unit_name):
+        """Handle a unit change reported by systemd (debounced)."""
+        if self._reload_pending:
+            return
+        self._reload_pending = True
+        
+        def reload():
+            self._reload_pending = False
+            self.load_services()
+            return False
+        GLib.timeout_add(250, reload)
     
     def start_auto_refresh(self):
-        """Start auto-refresh."""
+        """Start auto-refresh (only needed without live updates)."""
+        if self.live_updates:
+            return
+        
         def refresh():
             self.load_services()
             return True
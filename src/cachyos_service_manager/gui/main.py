@@ -17,12 +17,14 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from src.core.resource_monitor import ResourceMonitor, ServiceResources
+from src.core.top import TopSampler
+from src.core.slices import build_slice_tree
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QScrollArea, QLabel, QPushButton, QFrame, QStatusBar, QMessageBox,
     QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget,
-    QTextEdit, QComboBox, QCheckBox, QSplitter
+    QTextEdit, QComboBox, QCheckBox, QSplitter, QTreeWidget, QTreeWidgetItem
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject
 from PyQt6.QtGui import QFont, QColor
@@ -36,6 +38,8 @@ class ServiceSignals(QObject):
     services_loaded = pyqtSignal(list)
     action_completed = pyqtSignal(bool, str)
     logs_loaded = pyqtSignal(str)
+    units_changed = pyqtSignal(str)
+    top_refreshed = pyqtSignal(list, object)
 
 
 class ServiceTable(QTableWidget):
@@ -49,9 +53,9 @@ class ServiceTable(QTableWidget):
         
     def setup_ui(self):
         """Setup table UI."""
-        self.setColumnCount(8)  # 2 neue Spalten für CPU und RAM
+        self.setColumnCount(9)  # CPU, RAM und PSI
         self.setHorizontalHeaderLabels([
-            "Status", "Service", "State", "Enabled", "Description", "CPU %", "RAM MB", "Actions"
+            "Status", "Service", "State", "Enabled", "Description", "CPU %", "RAM MB", "PSI %", "Actions"
         ])
 
         
@@ -65,11 +69,13 @@ class ServiceTable(QTableWidget):
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)
         header.setSectionResizeMode(6, QHeaderView.ResizeMode.Fixed)
         header.setSectionResizeMode(7, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(8, QHeaderView.ResizeMode.Fixed)
         
         self.setColumnWidth(0, 60)
         self.setColumnWidth(5, 70)   # CPU
         self.setColumnWidth(6, 80)   # RAM
-        self.setColumnWidth(7, 280)  # Actions (war vorher 5)
+        self.setColumnWidth(7, 70)   # PSI
+        self.setColumnWidth(8, 280)  # Actions
 
         
         self.verticalHeader().setVisible(False)
@@ -127,6 +133,12 @@ class ServiceTable(QTableWidget):
             ram_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
             self.setItem(row, 6, ram_item)
 
+            # PSI % (Spalte 7)
+            psi_item = QTableWidgetItem("--")
+            psi_item.setFlags(psi_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            psi_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.setItem(row, 7, psi_item)
+
             # Actions
             actions_widget = QWidget()
             actions_layout = QHBoxLayout(actions_widget)
@@ -167,12 +179,139 @@ class ServiceTable(QTableWidget):
             actions_layout.addWidget(enable_btn)
             actions_layout.addWidget(logs_btn)
             
-            self.setCellWidget(row, 7, actions_widget)  # War 5, jetzt 7 wegen 2 neuen Spalten
+            self.setCellWidget(row, 8, actions_widget)
+
+
+class TopTable(QTableWidget):
+    """Sortable table ranking all running units by resource usage."""
+
+    COLUMNS = ["Unit", "CPU %", "RAM MB", "Tasks", "IO Read KB/s", "IO Write KB/s", "PSI %"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setColumnCount(len(self.COLUMNS))
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column in range(1, len(self.COLUMNS)):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        self.verticalHeader().setVisible(False)
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.setSortingEnabled(True)
+        self.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+
+    def update_usage(self, rows: list):
+        """Update the table in place from TopSampler rows.
+
+        Existing items are reused and Qt re-sorts by the chosen header
+        column once per update.
+        """
+        self.setSortingEnabled(False)
+        units = {usage.unit for usage in rows}
+        for row in reversed(range(self.rowCount())):
+            if self.item(row, 0).text() not in units:
+                self.removeRow(row)
+        index = {self.item(row, 0).text(): row for row in range(self.rowCount())}
+
+        for usage in rows:
+            row = index.get(usage.unit)
+            if row is None:
+                row = self.rowCount()
+                self.insertRow(row)
+                for column in range(len(self.COLUMNS)):
+                    item = QTableWidgetItem()
+                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                    if column:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    self.setItem(row, column, item)
+                self.item(row, 0).setText(usage.unit)
+            # Numeric display data so header sorting compares numbers
+            values = [
+                round(usage.cpu_percent, 1),
+                round(usage.memory_bytes / (1024 * 1024), 1),
+                usage.tasks,
+                round(usage.io_read_rate / 1024, 1),
+                round(usage.io_write_rate / 1024, 1),
+                round(usage.pressure, 2),
+            ]
+            for column, value in enumerate(values, start=1):
+                self.item(row, column).setData(Qt.ItemDataRole.DisplayRole, value)
+            psi_item = self.item(row, 6)
+            psi_item.setToolTip(f"Highest: {usage.pressure_resource}" if usage.pressure else "")
+        self.setSortingEnabled(True)
+
+
+class SliceTree(QTreeWidget):
+    """Tree of slices with CPU, memory and IO rolled up from their units."""
+
+    COLUMNS = ["Slice / Unit", "CPU %", "RAM MB", "Tasks", "IO KB/s", "Units"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setColumnCount(len(self.COLUMNS))
+        self.setHeaderLabels(self.COLUMNS)
+        self.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.setAlternatingRowColors(True)
+        self.setSortingEnabled(True)
+        self.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        self.items = {}  # cgroup path -> QTreeWidgetItem
+
+    def update_tree(self, root):
+        """Update the tree in place from a SliceNode root.
+
+        Items are kept per cgroup path, so expanded slices stay expanded.
+        """
+        self.setSortingEnabled(False)
+        seen = set()
+        for _, node in root.walk():
+            seen.add(node.cgroup)
+            item = self.items.get(node.cgroup)
+            if item is None:
+                parent = self.items.get(node.cgroup.rsplit('/', 1)[0] or '/')
+                if node.cgroup == '/':
+                    item = QTreeWidgetItem(self)
+                    item.setExpanded(True)
+                else:
+                    item = QTreeWidgetItem(parent if parent is not None else self)
+                item.setText(0, node.name)
+                if node.is_slice:
+                    font = item.font(0)
+                    font.setBold(True)
+                    item.setFont(0, font)
+                for column in range(1, len(self.COLUMNS)):
+                    item.setTextAlignment(column, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.items[node.cgroup] = item
+            # Numeric display data so header sorting compares numbers
+            item.setData(1, Qt.ItemDataRole.DisplayRole, round(node.cpu_percent, 1))
+            item.setData(2, Qt.ItemDataRole.DisplayRole, round(node.memory_bytes / (1024 * 1024), 1))
+            item.setData(3, Qt.ItemDataRole.DisplayRole, node.tasks)
+            item.setData(4, Qt.ItemDataRole.DisplayRole, round(node.io_rate / 1024, 1))
+            item.setData(5, Qt.ItemDataRole.DisplayRole, node.unit_count if node.is_slice else "")
+
+        # Deepest paths first, so children go before their parents
+        for cgroup in sorted(set(self.items) - seen, key=len, reverse=True):
+            item = self.items.pop(cgroup)
+            parent = item.parent()
+            if parent is not None:
+                parent.removeChild(item)
+            else:
+                self.takeTopLevelItem(self.indexOfTopLevelItem(item))
+        self.setSortingEnabled(True)
 
 
 class MainWindow(QMainWindow):
     """Main window with complete service management."""
     
+    # State filters pushed down to list_all_services()
+    FILTER_QUERIES = {
+        "All": {},
+        "Active": {'states': ['active']},
+        "Inactive": {'states': ['inactive']},
+        "Failed": {'states': ['failed']},
+        "Enabled": {'enabled': True},
+    }
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("CachyOS Service Manager - Full Control")
@@ -184,12 +323,24 @@ class MainWindow(QMainWindow):
         self.signals.services_loaded.connect(self.on_services_loaded)
         self.signals.action_completed.connect(self.on_action_completed)
         self.signals.logs_loaded.connect(self.on_logs_loaded)
+        self.signals.units_changed.connect(self.on_units_changed)
+        self.signals.top_refreshed.connect(self.on_top_refreshed)
         
         self.all_services = []
         self.filtered_services = []
+        self.top_sampler = TopSampler()
+        self.top_refreshing = False
         
+        # Debounce bursts of unit change signals into one table reload
+        self.reload_timer = QTimer()
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.timeout.connect(self.load_services)
+
         self.setup_ui()
         self.apply_plasma_theme()
+        self.live_updates = self.service_manager.enable_live_updates()
+        if self.live_updates:
+            self.service_manager.add_change_listener(self.signals.units_changed.emit)
         self.load_services()
         self.start_auto_refresh()
         self.resource_monitor = ResourceMonitor()
@@ -216,6 +367,14 @@ class MainWindow(QMainWindow):
         # Logs tab
         logs_tab = self.create_logs_tab()
         self.tabs.addTab(logs_tab, "📜 Service Logs")
+
+        # Top tab
+        self.top_tab = self.create_top_tab()
+        self.tabs.addTab(self.top_tab, "📈 Top")
+
+        # Slices tab
+        self.slices_tab = self.create_slices_tab()
+        self.tabs.addTab(self.slices_tab, "🌳 Slices")
         
         layout.addWidget(self.tabs)
         
@@ -275,7 +434,7 @@ class MainWindow(QMainWindow):
         filter_label = QLabel("Filter:")
         self.filter_combo = QComboBox()
         self.filter_combo.addItems(["All", "Active", "Inactive", "Failed", "Enabled"])
-        self.filter_combo.currentTextChanged.connect(self.filter_services)
+        self.filter_combo.currentTextChanged.connect(lambda: self.load_services())
         
         # Show inactive
         self.show_inactive_check = QCheckBox("Show Inactive")
@@ -317,6 +476,36 @@ class MainWindow(QMainWindow):
         
         return widget
     
+    def create_top_tab(self):
+        """Create the system-wide ranking tab."""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        self.top_label = QLabel("Click a column header to rank units by it")
+        if not self.top_sampler.available:
+            self.top_label.setText("cgroup v2 hierarchy not found - ranking unavailable")
+        layout.addWidget(self.top_label)
+
+        self.top_table = TopTable()
+        layout.addWidget(self.top_table)
+
+        return widget
+
+    def create_slices_tab(self):
+        """Create the slice hierarchy tab."""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        if self.top_sampler.available:
+            layout.addWidget(QLabel("Slice totals are the sums of the units below them"))
+        else:
+            layout.addWidget(QLabel("cgroup v2 hierarchy not found - slice tree unavailable"))
+
+        self.slice_tree = SliceTree()
+        layout.addWidget(self.slice_tree)
+
+        return widget
+
     def apply_plasma_theme(self):
         """Apply Plasma theme."""
         self.setStyleSheet("""
@@ -365,12 +554,14 @@ class MainWindow(QMainWindow):
     def load_services(self):
         """Load all services."""
         self.status_bar.showMessage("Loading services...")
+        show_inactive = self.show_inactive_check.isChecked()
+        query = self.FILTER_QUERIES.get(self.filter_combo.currentText(), {})
         
         def load():
-            show_inactive = self.show_inactive_check.isChecked()
             services = self.service_manager.list_all_services(
                 service_type=ServiceType.SERVICE,
-                show_inactive=show_inactive
+                show_inactive=show_inactive,
+                **query
             )
             self.signals.services_loaded.emit(services)
         
@@ -382,38 +573,31 @@ class MainWindow(QMainWindow):
         self.filtered_services = services
         self.filter_services()
         
-        # Update stats
-        stats = self.service_manager.get_stats(services)
-        self.stats_label.setText(
-            f"Total: {stats['total']} | "
-            f"Active: {stats['active']} | "
-            f"Inactive: {stats['inactive']} | "
-            f"Failed: {stats['failed']} | "
-            f"Enabled: {stats['enabled']}"
-        )
+        # Update stats (a state-filtered listing only holds a subset)
+        if self.filter_combo.currentText() == "All":
+            stats = self.service_manager.get_stats(services)
+            self.stats_label.setText(
+                f"Total: {stats['total']} | "
+                f"Active: {stats['active']} | "
+                f"Inactive: {stats['inactive']} | "
+                f"Failed: {stats['failed']} | "
+                f"Enabled: {stats['enabled']}"
+            )
         
         self.status_bar.showMessage(f"Loaded {len(services)} services", 3000)
     
     def filter_services(self):
-        """Filter services based on search and filter."""
+        """Filter loaded services by search text.
+
+        State filters are applied by systemd when loading, see FILTER_QUERIES.
+        """
         services = self.all_services
         
-        # Search filter
+        # Search filter (matches descriptions too, so it stays client-side)
         search = self.search_input.text().strip()
         if search:
             services = self.service_manager.search_services(search, services)
         
-        # State filter
-        filter_type = self.filter_combo.currentText()
-        if filter_type == "Active":
-            services = [s for s in services if s.state == ServiceState.ACTIVE]
-        elif filter_type == "Inactive":
-            services = [s for s in services if s.state == ServiceState.INACTIVE]
-        elif filter_type == "Failed":
-            services = [s for s in services if s.state == ServiceState.FAILED]
-        elif filter_type == "Enabled":
-            services = [s for s in services if s.enabled]
-        
         self.filtered_services = services
         self.service_table.load_services(services)
     
@@ -473,21 +657,61 @@ class MainWindow(QMainWindow):
         else:
             self.status_bar.showMessage(f"✗ {msg}", 5000)
         
-        # Refresh after action
-        QTimer.singleShot(1000, self.load_services)
+        # Refresh after action (live updates deliver the change by themselves)
+        if not self.live_updates:
+            QTimer.singleShot(1000, self.load_services)
+
+    def on_units_changed(self, unit_name):
+        """Handle a unit change reported by systemd."""
+        self.reload_timer.start(250)
     
     def start_auto_refresh(self):
         """Start auto-refresh."""
-        # Service refresh
+        # Service refresh - only needed without live updates
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.load_services)
-        self.refresh_timer.start(30000)  # 30 seconds
+        if not self.live_updates:
+            self.refresh_timer.start(30000)  # 30 seconds
         
         # Resource monitoring
         self.resource_timer = QTimer()
         self.resource_timer.timeout.connect(self.update_resources)
         self.resource_timer.start(5000)  # 5 seconds
 
+        # System-wide ranking and slice tree, sampled only while their tab is shown
+        self.top_timer = QTimer()
+        self.top_timer.timeout.connect(self.refresh_top)
+        self.top_timer.start(1000)  # 1 Hz
+
+    def refresh_top(self):
+        """Sample all unit cgroups in a worker thread."""
+        if (self.top_refreshing or not self.top_sampler.available
+                or self.tabs.currentWidget() not in (self.top_tab, self.slices_tab)):
+            return
+        self.top_refreshing = True
+
+        def run():
+            try:
+                self.top_sampler.refresh()
+                rows = self.top_sampler.ranking()
+                tree = build_slice_tree(rows)
+            except Exception:
+                rows, tree = [], None
+            self.signals.top_refreshed.emit(rows, tree)
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_top_refreshed(self, rows, tree):
+        """Handle a finished ranking refresh."""
+        self.top_refreshing = False
+        self.top_table.update_usage(rows)
+        if tree is not None:
+            self.slice_tree.update_tree(tree)
+        self.top_label.setText(
+            f"{len(rows)} units | refresh took "
+            f"{self.top_sampler.last_refresh_duration * 1000:.0f} ms | "
+            f"click a column header to rank units by it"
+        )
+
     def update_resources(self):
         """Update resource monitoring für aktive Services."""
         # Nur sichtbare Services monitoren
@@ -548,6 +772,26 @@ class MainWindow(QMainWindow):
                 else:
                     ram_item.setForeground(QColor("#27ae60"))
 
+                # PSI (Spalte 7) - highest "some" avg10 of CPU, memory and IO
+                psi_item = self.service_table.item(row, 7)
+                if psi_item is None:
+                    psi_item = QTableWidgetItem()
+                    psi_item.setFlags(psi_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                    psi_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                    self.service_table.setItem(row, 7, psi_item)
+                cpu_psi = res.some_pressure('cpu').avg10
+                memory_psi = res.some_pressure('memory').avg10
+                io_psi = res.some_pressure('io').avg10
+                psi = max(cpu_psi, memory_psi, io_psi)
+                psi_item.setText(f"{psi:.1f}")
+                psi_item.setToolTip(f"CPU: {cpu_psi:.2f}%\nMemory: {memory_psi:.2f}%\nIO: {io_psi:.2f}%")
+                if psi > 20:
+                    psi_item.setForeground(QColor("#e74c3c"))
+                elif psi > 5:
+                    psi_item.setForeground(QColor("#f39c12"))
+                else:
+                    psi_item.setForeground(QColor("#27ae60"))
+
 
 def main():
     app = QApplication(sys.argv)
@@ -1,8 +1,12 @@
 """CLI entry point."""
 
+import time
+
 import click
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
+from rich.tree import Tree
 from pathlib import Path
 
 try:
@@ -13,6 +17,10 @@ except Exception:
 
 from core.service_manager import ServiceManager, ServiceState, ServiceType
 from core.service_group import ServiceGroupManager
+from core.resource_monitor import ResourceMonitor
+from core.cgroup import PRESSURE_RESOURCES
+from core.top import TopSampler
+from core.slices import build_slice_tree
 
 console = Console()
 
@@ -30,12 +38,16 @@ def cli():
               help='Filter by service type')
 @click.option('--all', 'show_inactive', is_flag=True, default=False,
               help='Include inactive services')
-def list(service, service_type, show_inactive):
-    """List all services."""
+@click.option('--state', 'states', multiple=True,
+              help='Only show units in this state, e.g. failed (repeatable)')
+def list(service, service_type, show_inactive, states):
+    """List all services, optionally only those matching SERVICE (glob)."""
     mgr = ServiceManager()
     services = mgr.list_all_services(
-        service_type=service_type,
-        show_inactive=show_inactive
+        service_type=ServiceType(service_type) if service_type else None,
+        show_inactive=show_inactive,
+        states=[*states] or None,
+        patterns=[service] if service else None
     )
 
     if not services:
@@ -316,6 +328,164 @@ def socket_status(socket):
     console.print()
 
 
+@cli.command()
+@click.argument('services', nargs=-1)
+@click.option('--interval', '-i', default=1.0, show_default=True,
+              help='Seconds between the two samples the stall shares are computed from')
+def pressure(services, interval):
+    """Show pressure stall information (PSI) of running services.
+
+    For each resource the "some" line is shown as avg10 / avg60 / stall,
+    where stall is the share of time stalled during the interval.
+    """
+    names = [*services]
+    if not names:
+        mgr = ServiceManager()
+        names = [svc.name for svc in mgr.list_all_services(service_type=ServiceType.SERVICE,
+                                                          states=['active'])]
+    if not names:
+        console.print("[yellow]No services found.[/yellow]")
+        return
+
+    monitor = ResourceMonitor(cache_ttl=0, background_refresh=False)
+    monitor.get_multiple_resources(names)  # baseline for the stall counters
+    time.sleep(interval)
+    resources = monitor.get_multiple_resources(names)
+    rows = [(name, res) for name, res in resources.items() if res.pressure]
+    if not rows:
+        console.print("[yellow]No PSI data (needs cgroup v2 with PSI enabled).[/yellow]")
+        return
+
+    rows.sort(key=lambda item: max(item[1].some_pressure(r).avg10 for r in PRESSURE_RESOURCES),
+              reverse=True)
+    table = Table(title="Pressure Stall Information (%: avg10 / avg60 / stall)")
+    table.add_column("Service", style="cyan")
+    for resource in PRESSURE_RESOURCES:
+        table.add_column({'cpu': "CPU", 'memory': "Memory", 'io': "IO"}[resource], justify="right")
+
+    for name, res in rows:
+        cells = []
+        for resource in PRESSURE_RESOURCES:
+            psi = res.some_pressure(resource)
+            stall = "-" if psi.stall_percent is None else f"{psi.stall_percent:.2f}"
+            color = "red" if psi.avg10 > 20 else "yellow" if psi.avg10 > 5 else "green"
+            cells.append(f"[{color}]{psi.avg10:.2f}[/{color}] / {psi.avg60:.2f} / {stall}")
+        table.add_row(name, *cells)
+
+    console.print(table)
+
+
+def _format_bytes(value: float) -> str:
+    """Format a byte count with a binary unit."""
+    for unit in ("B", "K", "M", "G"):
+        if abs(value) < 1024:
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}T"
+
+
+def _top_table(sampler: TopSampler, sort: str, limit: int) -> Table:
+    """Render the current ranking of a TopSampler."""
+    rows = sampler.ranking(sort, limit)
+    table = Table(title=f"Top units by {sort} "
+                        f"({sampler.last_refresh_duration * 1000:.0f} ms per refresh)")
+    table.add_column("Unit", style="cyan")
+    table.add_column("CPU %", justify="right")
+    table.add_column("Memory", justify="right")
+    table.add_column("Tasks", justify="right")
+    table.add_column("IO read/s", justify="right")
+    table.add_column("IO write/s", justify="right")
+    table.add_column("PSI %", justify="right")
+    for usage in rows:
+        psi = f"{usage.pressure:.2f} {usage.pressure_resource}" if usage.pressure else "0.00"
+        table.add_row(
+            usage.unit,
+            f"{usage.cpu_percent:.1f}",
+            _format_bytes(usage.memory_bytes),
+            str(usage.tasks),
+            _format_bytes(usage.io_read_rate),
+            _format_bytes(usage.io_write_rate),
+            psi
+        )
+    return table
+
+
+@cli.command()
+@click.option('--sort', '-s', type=click.Choice([*TopSampler.SORT_KEYS]), default='cpu',
+              show_default=True, help='Ranking criterion')
+@click.option('--limit', '-n', default=20, show_default=True, help='Number of units to show')
+@click.option('--interval', '-i', default=1.0, show_default=True, help='Seconds between refreshes')
+@click.option('--once', is_flag=True, help='Print one ranking and exit')
+def top(sort, limit, interval, once):
+    """Rank all running units by CPU, memory, IO or PSI."""
+    sampler = TopSampler()
+    if not sampler.available:
+        console.print("[red]cgroup v2 hierarchy not found; 'top' needs the unified hierarchy.[/red]")
+        return
+
+    sampler.refresh()  # baseline for the CPU and IO rates
+    time.sleep(interval)
+    sampler.refresh()
+    if once:
+        console.print(_top_table(sampler, sort, limit))
+        return
+
+    with Live(_top_table(sampler, sort, limit), console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                time.sleep(interval)
+                sampler.refresh()
+                live.update(_top_table(sampler, sort, limit), refresh=True)
+        except KeyboardInterrupt:
+            pass
+
+
+@cli.command()
+@click.option('--sort', '-s', type=click.Choice(['cpu', 'memory', 'io', 'name']), default='cpu',
+              show_default=True, help='Order of siblings')
+@click.option('--units', 'show_units', is_flag=True, help='Also list the units inside each slice')
+@click.option('--depth', '-d', type=int, default=None, help='Maximum slice depth to show')
+@click.option('--interval', '-i', default=1.0, show_default=True,
+              help='Seconds between the two samples the CPU and IO rates are computed from')
+def slices(sort, show_units, depth, interval):
+    """Show the slice hierarchy with CPU, memory and IO rolled up per slice."""
+    sampler = TopSampler()
+    if not sampler.available:
+        console.print("[red]cgroup v2 hierarchy not found; 'slices' needs the unified hierarchy.[/red]")
+        return
+
+    sampler.refresh()  # baseline for the CPU and IO rates
+    time.sleep(interval)
+    sampler.refresh()
+    root = build_slice_tree(sampler.ranking())
+
+    sort_keys = {
+        'cpu': lambda node: -node.cpu_percent,
+        'memory': lambda node: -node.memory_bytes,
+        'io': lambda node: -node.io_rate,
+        'name': lambda node: node.name,
+    }
+
+    def label(node):
+        name = f"[bold cyan]{node.name}[/bold cyan]" if node.is_slice else node.name
+        text = (f"{name}  CPU {node.cpu_percent:.1f}%  RAM {_format_bytes(node.memory_bytes)}  "
+                f"IO {_format_bytes(node.io_read_rate)}/s r, {_format_bytes(node.io_write_rate)}/s w")
+        if node.is_slice:
+            text += f"  [dim]({node.unit_count} units, {node.tasks} tasks)[/dim]"
+        return text
+
+    def add_children(branch, node, level):
+        for child in sorted(node.children, key=sort_keys[sort]):
+            if child.is_slice and (depth is None or level < depth):
+                add_children(branch.add(label(child)), child, level + 1)
+            elif not child.is_slice and show_units:
+                branch.add(label(child))
+
+    tree = Tree(label(root))
+    add_children(tree, root, 1)
+    console.print(tree)
+
+
 @cli.group()
 def group():
     """Manage service groups."""
@@ -7,8 +7,10 @@ from .i18n import _, set_language, get_language, init_i18n, I18nMixin
 # Optional imports - may not be available on all platforms (e.g., Windows)
 try:
     from .systemd import SystemdManager
+    from .unit_store import UnitStateStore
 except ImportError:
     SystemdManager = None
+    UnitStateStore = None
 
 try:
     from .monitor import MonitoringEngine
@@ -28,6 +30,7 @@ __all__ = [
     'ServiceType', 
     'ServiceInfo',
     'SystemdManager', 
+    'UnitStateStore',
     'MonitoringEngine', 
     'ServiceGroup', 
     'ServiceGroupManager',
@@ -0,0 +1,153 @@
+"""Bounded TTL + LRU cache for query results."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class ResultCache:
+    """Thread-safe result cache with per-entry TTL and LRU eviction.
+
+    Entries older than ``ttl`` seconds are treated as misses; when more
+    than ``max_entries`` keys are stored, the least recently used one is
+    evicted. Hits and misses are counted so the TTL can be tuned.
+
+    get_stale() supports stale-while-revalidate: expired entries are still
+    returned (flagged stale) until a refresher replaces them, and
+    recently_read() tells the refresher which keys are still in use.
+    """
+
+    DEFAULT_MAX_ENTRIES = 32
+
+    def __init__(self, ttl: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            ttl: Time-to-live of an entry in seconds (0 disables caching)
+            max_entries: Maximum number of cached keys
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, list]' = OrderedDict()  # key -> [stored_at, value, last_read]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a fresh cached value.
+
+        Args:
+            key: Cache key
+            default: Returned on a miss or an expired entry
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.ttl:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            entry[2] = now
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """Get a cached value even if it has expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            (value, fresh) tuple, or None if the key is not cached
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry[2] = now
+            fresh = now - entry[0] < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry[1], fresh
+
+    def recently_read(self, window: float) -> List[Hashable]:
+        """Get the keys read within the last window seconds."""
+        with self._lock:
+            cutoff = time.monotonic() - window
+            return [key for key, entry in self._entries.items() if entry[2] >= cutoff]
+
+    def keys(self) -> List[Hashable]:
+        """Get every cached key, fresh or not."""
+        with self._lock:
+            return list(self._entries)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used key if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        with self._lock:
+            now = time.monotonic()
+            previous = self._entries.get(key)
+            # A refresh keeps the entry's read time; a new entry counts as read
+            self._entries[key] = [now, value, previous[2] if previous else now]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or every key if none is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.stale_hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters.
+
+        Returns:
+            Dictionary with hits, stale_hits, misses, evictions, entries and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.put(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,80 @@
+"""Application configuration (config.yaml)."""
+
+import copy
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+USER_CONFIG_DIR = Path.home() / '.config' / 'cachyos-service-manager'
+SYSTEM_CONFIG_DIR = Path('/usr/share/cachyos-service-manager')  # installed by the package
+# Only present when running from a source checkout
+SOURCE_CONFIG_DIR = Path(__file__).parent.parent.parent / 'config'
+CONFIG_SEARCH_PATH = [USER_CONFIG_DIR, SYSTEM_CONFIG_DIR, SOURCE_CONFIG_DIR]
+
+# Used for every key missing from the configuration file
+DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
+    'monitoring': {
+        'enable_cpu_monitoring': True,
+        'enable_memory_monitoring': True,
+        'enable_io_monitoring': False,
+        'history_length': 300,
+        'update_interval': 1,
+        'history_store': False,  # true, or the directory of the ring files
+    },
+}
+
+
+def find_config_file(name: str) -> Optional[Path]:
+    """Find a configuration file in the first CONFIG_SEARCH_PATH directory having it.
+
+    Args:
+        name: File name, e.g. 'config.yaml'
+
+    Returns:
+        Path of the file, or None if no directory has it
+    """
+    return next((d / name for d in CONFIG_SEARCH_PATH if (d / name).exists()), None)
+
+
+def load_config(path: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """Load the configuration, filling in defaults.
+
+    Without a path, config.yaml is looked up in CONFIG_SEARCH_PATH: the
+    user's config directory, the system-wide one installed by the package,
+    then the one in a source checkout. Without any, the defaults apply.
+
+    Args:
+        path: Configuration file to read
+
+    Returns:
+        Dictionary mapping section -> settings
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path is None:
+        path = find_config_file('config.yaml')
+        if path is None:
+            return config
+    if yaml is None:
+        logger.warning(f"PyYAML not installed, using default configuration instead of {path}")
+        return config
+    try:
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return config
+    except (OSError, yaml.YAMLError) as e:
+        logger.error(f"Error loading configuration {path}: {e}")
+        return config
+    for section, values in data.items():
+        if isinstance(values, dict):
+            config.setdefault(section, {}).update(values)
+        else:
+            config[section] = values
+    return config
@@ -0,0 +1,243 @@
+"""inotify watcher for cgroup v2 memory.events counters."""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cgroup import DEFAULT_CGROUP_ROOT
+
+logger = logging.getLogger(__name__)
+
+# Counters reported as events; "low" and "oom_group_kill" are ignored
+MEMORY_EVENT_COUNTERS = ('high', 'max', 'oom', 'oom_kill')
+
+# memory.events counts the unit and its sub-cgroups, memory.events.local
+# only the unit's own cgroup
+MEMORY_EVENT_FILES = ('memory.events', 'memory.events.local')
+
+_IN_MODIFY = 0x00000002
+_IN_IGNORED = 0x00008000  # watch removed (file deleted with its cgroup)
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+# wd, mask, cookie, name length
+_EVENT = struct.Struct('iIII')
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    _inotify_rm_watch = _libc.inotify_rm_watch
+    _inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+except (OSError, AttributeError):
+    _libc = None  # no inotify (non-Linux libc)
+
+
+@dataclass
+class MemoryEvent:
+    """Increase of one memory.events counter."""
+    unit: str
+    counter: str  # one of MEMORY_EVENT_COUNTERS
+    increase: int  # events since the previous reading
+    count: int  # counter value after the increase
+    timestamp: float  # time.time() when the change was seen
+    local: bool = False  # from memory.events.local (the unit's own cgroup only)
+
+
+class MemoryEventWatcher:
+    """Report memory.events counter increases as soon as the kernel signals them.
+
+    The kernel raises an inotify modify event on memory.events and
+    memory.events.local whenever one of their counters changes, so the
+    watcher costs nothing while idle: fileno() only becomes readable when
+    something happened. process() then re-reads the signalled files,
+    compares them with the previous reading and passes every increase to
+    the callbacks.
+
+    watch() and unwatch() may be called from any thread; process() runs
+    the callbacks in the calling thread.
+    """
+
+    def __init__(self, cgroup_root: str = DEFAULT_CGROUP_ROOT):
+        """Create the inotify instance.
+
+        Args:
+            cgroup_root: Mount point of the cgroup v2 hierarchy
+
+        Raises:
+            OSError: inotify is not available
+        """
+        if _libc is None:
+            raise OSError('inotify is not available')
+        fd = _inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._fd = fd
+        self._root = cgroup_root.rstrip('/')
+        self._lock = threading.Lock()
+        self._units: Dict[str, Tuple[str, List[int]]] = {}  # unit -> (cgroup, watch descriptors)
+        self._watches: Dict[int, Tuple[str, bool]] = {}  # wd -> (unit, local)
+        self._counts: Dict[int, Dict[str, int]] = {}  # wd -> counters of the last reading
+        self._callbacks: List[Callable[[MemoryEvent], None]] = []
+
+    def fileno(self) -> int:
+        """Get the inotify descriptor (readable when events are pending)."""
+        return self._fd
+
+    def add_callback(self, callback: Callable[[MemoryEvent], None]) -> None:
+        """Call callback(event) for every counter increase."""
+        self._callbacks.append(callback)
+
+    def watch(self, unit: str, cgroup: str) -> bool:
+        """Start watching a unit's cgroup; a no-op if it is already watched.
+
+        The current counter values become the baseline, so only later
+        increases are reported.
+
+        Args:
+            unit: Name reported in the events
+            cgroup: ControlGroup path as reported by systemd
+
+        Returns:
+            True if the unit is watched
+        """
+        with self._lock:
+            current = self._units.get(unit)
+            if current is not None and current[0] == cgroup and current[1]:
+                return True
+        self.unwatch(unit)
+        if not cgroup:
+            return False
+        directory = f"{self._root}/{cgroup.lstrip('/')}"
+        wds = []
+        for name in MEMORY_EVENT_FILES:
+            path = f'{directory}/{name}'
+            wd = _inotify_add_watch(self._fd, os.fsencode(path), _IN_MODIFY)
+            if wd < 0:
+                continue  # memory controller not enabled, or no such cgroup
+            with self._lock:
+                self._watches[wd] = (unit, name.endswith('.local'))
+                self._counts[wd] = self._read_counters(path)
+            wds.append(wd)
+        with self._lock:
+            self._units[unit] = (cgroup, wds)
+        if not wds:
+            logger.debug(f"No memory.events to watch for {unit} ({directory})")
+        return bool(wds)
+
+    def unwatch(self, unit: str) -> None:
+        """Stop watching a unit."""
+        with self._lock:
+            _, wds = self._units.pop(unit, ('', []))
+            for wd in wds:
+                self._watches.pop(wd, None)
+                self._counts.pop(wd, None)
+        for wd in wds:
+            _inotify_rm_watch(self._fd, wd)  # fails harmlessly if already removed
+
+    def units(self) -> List[str]:
+        """Get the watched units."""
+        with self._lock:
+            return [unit for unit, (_, wds) in self._units.items() if wds]
+
+    def process(self, timeout: Optional[float] = 0) -> List[MemoryEvent]:
+        """Handle pending inotify events and run the callbacks.
+
+        Args:
+            timeout: Seconds to wait for an event (None: block, 0: do not wait)
+
+        Returns:
+            Counter increases found, in file order
+        """
+        if timeout != 0:
+            select.select([self._fd], [], [], timeout)
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+        changed = []
+        removed = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size + length
+            if mask & _IN_IGNORED:
+                removed.append(wd)
+            elif wd not in changed:
+                changed.append(wd)
+
+        now = time.time()
+        events = []
+        for wd in changed:
+            with self._lock:
+                watch = self._watches.get(wd)
+                unit = watch[0] if watch else ''
+                cgroup = self._units.get(unit, ('', []))[0]
+            if watch is None:
+                continue
+            name = MEMORY_EVENT_FILES[1] if watch[1] else MEMORY_EVENT_FILES[0]
+            counters = self._read_counters(f"{self._root}/{cgroup.lstrip('/')}/{name}")
+            if not counters:
+                continue  # cgroup removed; IN_IGNORED follows
+            with self._lock:
+                previous = self._counts.get(wd, {})
+                self._counts[wd] = counters
+            for counter in MEMORY_EVENT_COUNTERS:
+                increase = counters.get(counter, 0) - previous.get(counter, 0)
+                if increase > 0:
+                    events.append(MemoryEvent(unit, counter, increase, counters[counter],
+                                              now, local=watch[1]))
+        for wd in removed:
+            self._drop_watch(wd)
+
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Error in memory event callback: {e}")
+        return events
+
+    def close(self) -> None:
+        """Close the inotify descriptor (removes every watch)."""
+        if self._fd < 0:
+            return
+        os.close(self._fd)
+        self._fd = -1
+        with self._lock:
+            self._units.clear()
+            self._watches.clear()
+            self._counts.clear()
+
+    def _drop_watch(self, wd: int) -> None:
+        """Forget a watch the kernel removed (its cgroup was deleted)."""
+        with self._lock:
+            watch = self._watches.pop(wd, None)
+            self._counts.pop(wd, None)
+            if watch is not None:
+                _, wds = self._units.get(watch[0], ('', []))
+                if wd in wds:
+                    wds.remove(wd)
+
+    @staticmethod
+    def _read_counters(path: str) -> Dict[str, int]:
+        """Read a memory.events file ("key value" lines)."""
+        try:
+            with open(path) as f:
+                text = f.read()
+        except OSError:
+            return {}
+        counters = {}
+        for line in text.splitlines():
+            key, _, value = line.partition(' ')
+            if value.strip().isdigit():
+                counters[key] = int(value)
+        return counters
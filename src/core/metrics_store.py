@@ -0,0 +1,276 @@
+"""Memory-mapped persistent metric histories."""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .timeseries import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = '~/.local/share/cachyos-service-manager/metrics'
+
+# magic, version, capacity, column count, data offset, records ever appended
+_HEADER = struct.Struct('<8sIIIIQ')
+_COUNT_OFFSET = 24
+# column name (NUL padded), array typecode
+_COLUMN = struct.Struct('<31sc')
+
+
+def _align(offset: int) -> int:
+    """Round up to a multiple of 8 bytes."""
+    return (offset + 7) & ~7
+
+
+class RingFile(RingBuffer):
+    """RingBuffer whose columns live in a memory-mapped file.
+
+    File layout: a fixed header (magic, version, capacity, column table,
+    data offset and the number of records ever appended), followed by one
+    contiguous, 8-byte aligned array per column: a 'Q' sequence column,
+    the 'd' timestamp column and the value columns. Any reader can map
+    the file and cast a column region with memoryview.cast() - there is
+    nothing to parse.
+
+    An append writes the values first, then the record's sequence number,
+    and bumps the header count last. The page cache keeps every store
+    when the process dies, so a process crash loses nothing. Durability
+    across a power loss is only as good as the last flush(): it syncs
+    the value columns before the sequence column and header, and on open
+    records whose sequence number does not match their position are
+    dropped. Records appended after the last flush() may be lost, or in
+    rare cases come back with stale values, because the kernel writes
+    dirty pages back in no particular order.
+    """
+
+    MAGIC = b'CSMRING\0'
+    VERSION = 1
+
+    def __init__(self, path: str, capacity: int, fields: List[Tuple[str, str]],
+                 writable: bool = True):
+        """Open or create a ring file.
+
+        A file with a different layout is recreated when opened writable.
+        A writable open falls back to read-only if another process holds
+        the file's lock.
+
+        Args:
+            path: File path
+            capacity: Maximum number of samples kept
+            fields: (name, array typecode) of each value column
+            writable: Open for appending (takes an exclusive lock)
+
+        Raises:
+            OSError: The file cannot be opened or mapped
+            ValueError: A read-only file does not match the layout
+        """
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.path = Path(path)
+        columns = [('seq', 'Q'), ('timestamp', 'd')] + list(fields)
+        header = self._build_header(capacity, columns)
+        offsets = []
+        size = len(header)
+        for _, typecode in columns:
+            offsets.append(size)
+            size = _align(size + capacity * struct.calcsize(typecode))
+
+        self._values_offset = offsets[1]  # timestamp column, the first after seq
+        self._fd = self._open(writable)
+        self.writable = writable and self._lock()
+        try:
+            current = os.pread(self._fd, len(header), 0)
+            # Everything but the record count must match the layout
+            if (current[:_COUNT_OFFSET] != header[:_COUNT_OFFSET]
+                    or current[_HEADER.size:] != header[_HEADER.size:]
+                    or os.fstat(self._fd).st_size != size):
+                if not self.writable:
+                    raise ValueError(f'{self.path} does not match the expected layout')
+                if os.fstat(self._fd).st_size:
+                    logger.warning(f"Recreating metrics file with a different layout: {self.path}")
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, header, 0)
+            self._map = mmap.mmap(self._fd, size,
+                                  access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+        view = memoryview(self._map)
+        self._views = [view[offset:offset + capacity * struct.calcsize(typecode)].cast(typecode)
+                       for offset, (_, typecode) in zip(offsets, columns)]
+        self._count_view = view[_COUNT_OFFSET:_COUNT_OFFSET + 8].cast('Q')
+        self._views.append(self._count_view)
+        view.release()
+        self._seq = self._views[0]
+        super().__init__(capacity, fields, columns=self._views[1:len(columns)])
+        self._recover(self._count_view[0])
+
+    def append(self, timestamp: float, *values) -> None:
+        """Append one sample, overwriting the oldest one when full.
+
+        Args:
+            timestamp: Sample time
+            *values: One value per field, in field order
+
+        Raises:
+            ValueError: The file is open read-only
+        """
+        if not self.writable:
+            raise ValueError(f'{self.path} is open read-only')
+        slot = self._head
+        super().append(timestamp, *values)
+        self._count += 1
+        self._seq[slot] = self._count
+        self._count_view[0] = self._count
+
+    def reload(self) -> None:
+        """Pick up records appended by the writer (for read-only opens)."""
+        self._recover(self._count_view[0])
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file, values before sequence numbers and count."""
+        if self.writable:
+            start = self._values_offset - self._values_offset % mmap.PAGESIZE
+            self._map.flush(start, len(self._map) - start)
+            self._map.flush(0, self._values_offset)
+
+    def close(self) -> None:
+        """Unmap the file and release its lock.
+
+        Column views handed out earlier become invalid.
+        """
+        if self._map.closed:
+            return
+        self.flush()
+        for view in self._views:
+            view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Segments still referenced by a caller; unmapped when collected
+            logger.debug(f"Deferring unmap of {self.path}, views still in use")
+        os.close(self._fd)
+
+    def _open(self, writable: bool) -> int:
+        """Open the file descriptor, creating the file and directory if needed."""
+        if writable:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return os.open(self.path, os.O_RDONLY)
+
+    def _lock(self) -> bool:
+        """Take the writer lock without blocking."""
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            logger.info(f"Metrics file in use by another process, opening read-only: {self.path}")
+            fd = os.open(self.path, os.O_RDONLY)
+            os.close(self._fd)
+            self._fd = fd
+            return False
+
+    def _recover(self, count: int) -> None:
+        """Set the ring position from the header count, dropping torn records."""
+        capacity = self.capacity
+        # The newest records must carry their sequence numbers...
+        while count and self._seq[(count - 1) % capacity] != count:
+            count -= 1
+        self._count = count
+        self._head = count % capacity
+        self._size = min(count, capacity)
+        # ...and an interrupted overwrite may have damaged the oldest one
+        while self._size and self._seq[self._physical(0)] != count - self._size + 1:
+            self._size -= 1
+
+    @classmethod
+    def _build_header(cls, capacity: int, columns: Sequence[Tuple[str, str]]) -> bytes:
+        """Encode the header for a layout (with a record count of 0)."""
+        table = b''.join(_COLUMN.pack(name.encode(), typecode.encode()) for name, typecode in columns)
+        data_offset = _align(_HEADER.size + len(table))
+        header = _HEADER.pack(cls.MAGIC, cls.VERSION, capacity, len(columns), data_offset, 0) + table
+        return header.ljust(data_offset, b'\0')
+
+
+class MetricsStore:
+    """Directory of per-unit RingFiles.
+
+    Each unit gets ``<directory>/<unit>.ring``; files are opened on first
+    use and kept mapped until closed. I/O errors are logged and the unit
+    is then kept in memory only.
+    """
+
+    DEFAULT_CAPACITY = 7200  # samples per unit (4 h at a 2 s interval)
+    SUFFIX = '.ring'
+
+    def __init__(self, fields: List[Tuple[str, str]], directory: Optional[str] = None,
+                 capacity: int = DEFAULT_CAPACITY):
+        """Initialize the store.
+
+        Args:
+            fields: (name, array typecode) of each value column
+            directory: Storage directory (default: DEFAULT_STORE_DIR)
+            capacity: Samples kept per unit
+        """
+        self.fields = list(fields)
+        self.directory = Path(os.path.expanduser(directory or DEFAULT_STORE_DIR))
+        self.capacity = capacity
+        self._files: Dict[str, Optional[RingFile]] = {}
+
+    def open(self, unit: str) -> Optional[RingFile]:
+        """Get the ring file of a unit, opening it on first use.
+
+        Args:
+            unit: Unit name
+
+        Returns:
+            RingFile, or None if it could not be opened
+        """
+        if unit not in self._files:
+            try:
+                self._files[unit] = RingFile(self._path(unit), self.capacity, self.fields)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cannot open metrics file for {unit}: {e}")
+                self._files[unit] = None
+        return self._files[unit]
+
+    def append(self, unit: str, timestamp: float, values: List) -> None:
+        """Persist one sample of a unit (skipped if its file is read-only or failed)."""
+        ring = self.open(unit)
+        if ring is not None and ring.writable:
+            ring.append(timestamp, *values)
+
+    def units(self) -> List[str]:
+        """Get the units that have a file in the store."""
+        try:
+            return sorted(p.name[:-len(self.SUFFIX)] for p in self.directory.iterdir()
+                          if p.name.endswith(self.SUFFIX))
+        except OSError:
+            return []
+
+    def flush(self) -> None:
+        """Write every open file back to disk."""
+        for ring in self._files.values():
+            if ring is not None:
+                ring.flush()
+
+    def close_unit(self, unit: str) -> None:
+        """Close one unit's file (it stays on disk)."""
+        ring = self._files.pop(unit, None)
+        if ring is not None:
+            ring.close()
+
+    def close(self) -> None:
+        """Close every open file."""
+        for unit in list(self._files):
+            self.close_unit(unit)
+
+    def _path(self, unit: str) -> Path:
+        """Get the file path of a unit."""
+        return self.directory / (unit.replace('/', '_') + self.SUFFIX)
@@ -1,8 +1,7 @@
 """Service monitoring engine."""
 
-from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 import asyncio
 import time
 import logging
@@ -10,17 +9,78 @@ import logging
 import dbus
 import dbus.exceptions
 
+from .cgroup import DEFAULT_CGROUP_ROOT, PRESSURE_RESOURCES, CgroupCollector
+from .config import load_config
+from .memory_events import MEMORY_EVENT_COUNTERS, MemoryEvent, MemoryEventWatcher
+from .metrics_store import MetricsStore
+from .rates import RateTracker
+from .timeseries import DEFAULT_PERCENTILES, Bucket, RingBuffer, RollupTier
+
 logger = logging.getLogger(__name__)
 
 
+# systemd reports accounting counters that are not tracked as UINT64_MAX
+_COUNTER_UNSET = 2 ** 64 - 1
+
+
 @dataclass
 class Metrics:
-    """Service metrics."""
+    """Service metrics.
+
+    Rates cover the interval since the previous sample of the service and
+    are 0 for the first sample after start or restart.
+    """
     timestamp: float
-    cpu_usage: float
-    memory_usage: int
-    io_read: int = 0
-    io_write: int = 0
+    cpu_usage: float  # percent of one CPU
+    memory_usage: int  # bytes
+    io_read: float = 0.0  # bytes/s
+    io_write: float = 0.0  # bytes/s
+    ip_ingress: float = 0.0  # bytes/s
+    ip_egress: float = 0.0  # bytes/s
+    # PSI "some" lines of the unit's cgroup: kernel averages and the share
+    # of time stalled since the previous sample (all percent)
+    cpu_pressure_avg10: float = 0.0
+    cpu_pressure_avg60: float = 0.0
+    cpu_pressure_stall: float = 0.0
+    memory_pressure_avg10: float = 0.0
+    memory_pressure_avg60: float = 0.0
+    memory_pressure_stall: float = 0.0
+    io_pressure_avg10: float = 0.0
+    io_pressure_avg60: float = 0.0
+    io_pressure_stall: float = 0.0
+    # From the cgroup's io.stat, summed over devices (only with I/O monitoring)
+    io_read_ops: float = 0.0  # operations/s
+    io_write_ops: float = 0.0  # operations/s
+
+
+class _Sample(NamedTuple):
+    """Result of one blocking read, applied on the event loop thread."""
+    metrics: Metrics
+    cgroup: str
+    io_keys: Optional[List[Tuple[str, str, str, str]]]  # io.stat rate keys; None if not read
+
+
+@dataclass
+class SchedulerStats:
+    """Timing statistics of the sampling scheduler (seconds)."""
+    ticks: int = 0
+    skipped_ticks: int = 0  # ticks dropped because the previous one overran
+    overruns: int = 0
+    last_jitter: float = 0.0  # lateness of the last tick versus its schedule
+    max_jitter: float = 0.0
+    total_jitter: float = 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        """Average lateness of a tick."""
+        return self.total_jitter / self.ticks if self.ticks else 0.0
+
+    def record_tick(self, jitter: float) -> None:
+        """Record one tick that started jitter seconds late."""
+        self.ticks += 1
+        self.last_jitter = jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.total_jitter += jitter
 
 
 class MonitoringEngine:
@@ -29,39 +89,255 @@ class MonitoringEngine:
     Features:
     - CPU usage per service
     - Memory consumption
-    - I/O statistics
+    - I/O throughput and IOPS (optional, see io_monitoring)
+    - OOM kills and memory.high/max events (inotify, no polling)
     - Historical data
     """
 
-    def __init__(self, interval: float = 2.0):
+    DEFAULT_HISTORY_LENGTH = 300  # data points
+    DEFAULT_MAX_CONCURRENCY = 16  # samples in flight per tick
+    MEMORY_EVENT_HISTORY = 256  # memory.events increases kept per service
+
+    # Memory event columns: counter is an index into MEMORY_EVENT_COUNTERS
+    MEMORY_EVENT_FIELDS = [('counter', 'B'), ('local', 'B'), ('increase', 'I'), ('count', 'Q')]
+
+    # Downsampling tiers after the raw history: (bucket seconds, retention seconds)
+    DEFAULT_ROLLUP_TIERS = [
+        (1.0, 600.0),  # 1 s buckets for 10 min (the raw history spans 5 min by default)
+        (60.0, 24 * 3600.0),  # 1 min buckets for 24 h
+        (900.0, 30 * 24 * 3600.0),  # 15 min buckets for 30 days
+    ]
+
+    # History columns after the timestamp: (Metrics field, array typecode);
+    # rates are stored as 32-bit floats, memory as an exact 64-bit integer
+    # and PSI percentages as 16-bit hundredths (see FIELD_SCALES)
+    HISTORY_FIELDS = [
+        ('cpu_usage', 'f'),
+        ('memory_usage', 'q'),
+        ('io_read', 'f'),
+        ('io_write', 'f'),
+        ('ip_ingress', 'f'),
+        ('ip_egress', 'f'),
+    ] + [(f'{resource}_pressure_{value}', 'H')
+         for resource in PRESSURE_RESOURCES for value in ('avg10', 'avg60', 'stall')] + [
+        ('io_read_ops', 'f'),
+        ('io_write_ops', 'f'),
+    ]
+
+    # Stored value = field value * scale; the kernel reports PSI averages
+    # with two decimals, so hundredths keep them exact
+    FIELD_SCALES = {name: 100 for name, typecode in HISTORY_FIELDS if typecode == 'H'}
+
+    # PSI averages are already smoothed by the kernel, so only the stall
+    # shares are downsampled into the rollup tiers
+    ROLLUP_FIELDS = [name for name, _ in HISTORY_FIELDS
+                     if not name.endswith(('_avg10', '_avg60'))]
+
+    # Cumulative counters turned into rates: (property, Metrics field, scale to unit/s)
+    RATE_COUNTERS = [
+        ('CPUUsageNSec', 'cpu_usage', 100 / 1e9),  # ns/s -> percent
+        ('IPIngressBytes', 'ip_ingress', 1),
+        ('IPEgressBytes', 'ip_egress', 1),
+    ]
+
+    # Everything a sample needs, fetched with one GetAll
+    METRIC_PROPERTIES = [prop for prop, _, _ in RATE_COUNTERS] + [
+        'MemoryCurrent', 'ControlGroup', 'InvocationID'
+    ]
+
+    # io.stat counters turned into per-device rates: (io.stat key, Metrics field)
+    IO_COUNTERS = [
+        ('rbytes', 'io_read'),
+        ('wbytes', 'io_write'),
+        ('rios', 'io_read_ops'),
+        ('wios', 'io_write_ops'),
+    ]
+
+    def __init__(self, interval: float = 2.0, systemd_manager=None,
+                 history_length: int = DEFAULT_HISTORY_LENGTH,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 rollup_tiers: Optional[List[Tuple[float, float]]] = None,
+                 store: Optional[MetricsStore] = None,
+                 cgroup_root: str = DEFAULT_CGROUP_ROOT,
+                 io_monitoring: bool = False,
+                 memory_events: bool = True):
         """Initialize monitoring engine.
 
         Args:
             interval: Monitoring interval in seconds
+            systemd_manager: SystemdManager to share (and with it the unit
+                proxy cache); a new one is created if omitted
+            history_length: Samples kept per service
+            max_concurrency: Maximum samples taken concurrently per tick
+            rollup_tiers: (bucket seconds, retention seconds) per downsampling
+                tier, finest first; defaults to DEFAULT_ROLLUP_TIERS
+            store: Persistent store (created with HISTORY_FIELDS) that every
+                sample is written to and histories are reloaded from
+            cgroup_root: Mount point of the cgroup v2 hierarchy (for PSI and I/O)
+            io_monitoring: Sample I/O throughput and IOPS from io.stat
+            memory_events: Watch each sampled unit's memory.events with inotify
         """
         self.interval = interval
-        self.metrics_history = defaultdict(lambda: deque(maxlen=300))
+        self.history_length = history_length
+        self.max_concurrency = max_concurrency
+        self.metrics_history: Dict[str, RingBuffer] = {}
+        self.rollup_tiers = sorted(rollup_tiers if rollup_tiers is not None else self.DEFAULT_ROLLUP_TIERS)
+        self.rollups: Dict[str, List[RollupTier]] = {}
+        self.scheduler_stats = SchedulerStats()
+        self.store = store
+        self._cgroups = CgroupCollector(cgroup_root)
+        self._scales = [self.FIELD_SCALES.get(name, 1) for name, _ in self.HISTORY_FIELDS]
+        self._rollup_index = [i for i, (name, _) in enumerate(self.HISTORY_FIELDS)
+                              if name in self.ROLLUP_FIELDS]
+        self._rates = RateTracker()  # (service, property) -> previous counter value
+        # service -> io.stat rate keys; only touched on the event loop thread
+        self._io_keys: Dict[str, List[Tuple[str, str, str, str]]] = {}
+        self._io_monitoring = io_monitoring
+        self.memory_events: Dict[str, RingBuffer] = {}
+        self._memory_watcher: Optional[MemoryEventWatcher] = None
+        if memory_events:
+            try:
+                self._memory_watcher = MemoryEventWatcher(cgroup_root)
+                self._memory_watcher.add_callback(self._record_memory_event)
+            except OSError as e:
+                logger.warning(f"Memory event watching not available: {e}")
+        self._services: List[str] = []
         self._monitoring = False
         self._monitor_task: Optional[asyncio.Task] = None
-        from .systemd import SystemdManager
-        self.systemd_manager = SystemdManager()
+        if systemd_manager is None:
+            from .systemd import SystemdManager
+            systemd_manager = SystemdManager()
+        self.systemd_manager = systemd_manager
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None, **kwargs) -> 'MonitoringEngine':
+        """Create an engine from the monitoring section of config.yaml.
+
+        Args:
+            config: Loaded configuration (default: load_config())
+            **kwargs: Further constructor arguments; they override the config
+
+        Returns:
+            MonitoringEngine
+        """
+        if config is None:
+            config = load_config()
+        monitoring = config.get('monitoring') or {}
+        options = {
+            'interval': float(monitoring.get('update_interval', 2.0)),
+            'history_length': int(monitoring.get('history_length', cls.DEFAULT_HISTORY_LENGTH)),
+            'io_monitoring': bool(monitoring.get('enable_io_monitoring', False)),
+        }
+        history_store = monitoring.get('history_store')
+        if history_store and 'store' not in kwargs:
+            directory = history_store if isinstance(history_store, str) else None
+            options['store'] = MetricsStore(cls.HISTORY_FIELDS, directory)
+        options.update(kwargs)
+        return cls(**options)
+
+    @property
+    def io_monitoring(self) -> bool:
+        """Whether I/O throughput and IOPS are sampled."""
+        return self._io_monitoring
+
+    @io_monitoring.setter
+    def io_monitoring(self, enabled: bool) -> None:
+        """Turn I/O sampling on or off; takes effect from the next tick.
+
+        While off, the I/O fields are recorded as 0 (and their history
+        columns stay unallocated until a non-zero value arrives). Turning
+        it back on starts new baselines, so the first sample after that
+        has no rate. Call from the event loop thread.
+        """
+        enabled = bool(enabled)
+        if enabled == self._io_monitoring:
+            return
+        self._io_monitoring = enabled
+        if not enabled:
+            for service in list(self._io_keys):
+                self._discard_io(service)
+        logger.info(f"I/O monitoring {'enabled' if enabled else 'disabled'}")
 
     async def start_monitoring(self, services: List[str]):
-        """Start monitoring for specified services."""
+        """Start monitoring for specified services.
+
+        If monitoring is already running, the service list is replaced.
+        """
+        self.update_services(services)
         if self._monitoring:
             return
+        await self.load_history(self._services)
         self._monitoring = True
-        self._monitor_task = asyncio.create_task(self._monitor_loop(services))
+        self._monitor_task = asyncio.create_task(self._monitor_loop())
+        if self._memory_watcher is not None:
+            # Idle until the kernel signals a memory.events change
+            asyncio.get_running_loop().add_reader(self._memory_watcher.fileno(),
+                                                  self._memory_watcher.process)
 
     async def stop_monitoring(self):
         """Stop monitoring."""
         self._monitoring = False
+        if self._memory_watcher is not None:
+            asyncio.get_running_loop().remove_reader(self._memory_watcher.fileno())
         if self._monitor_task:
             self._monitor_task.cancel()
             try:
                 await self._monitor_task
             except asyncio.CancelledError:
                 pass
+            self._monitor_task = None
+        if self.store is not None:
+            self.store.flush()
+
+    def close(self) -> None:
+        """Release the inotify descriptor and the open history files.
+
+        Call on shutdown, after stop_monitoring(). Every engine holds an
+        inotify instance, which counts against fs.inotify.max_user_instances.
+        """
+        if self._monitoring:
+            raise RuntimeError('stop monitoring before closing the engine')
+        if self._memory_watcher is not None:
+            self._memory_watcher.close()
+            self._memory_watcher = None
+        if self.store is not None:
+            self.store.close()
+
+    def update_services(self, services: List[str]):
+        """Replace the monitored services; takes effect from the next tick.
+
+        With a persistent store, the next tick loads the stored history
+        of new services before sampling them (see load_history()).
+
+        Args:
+            services: Service names to sample
+        """
+        self._services = list(dict.fromkeys(services))
+
+    async def load_history(self, services: List[str]) -> None:
+        """Replay the stored history of services that have none in memory yet.
+
+        The ring files are read and rolled up on the worker pool, so the
+        event loop stays responsive; the results are installed here, on
+        the event loop thread.
+
+        Args:
+            services: Service names
+        """
+        if self.store is None:
+            return
+        missing = [service for service in dict.fromkeys(services)
+                   if service not in self.metrics_history]
+        if not missing:
+            return
+        results = await asyncio.gather(
+            *(self.systemd_manager.run_blocking(self._read_stored, service) for service in missing),
+            return_exceptions=True)
+        for service, result in zip(missing, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Error loading stored history of {service}: {result}")
+            elif service not in self.metrics_history:
+                self.metrics_history[service], self.rollups[service] = result
 
     def cleanup_stale_services(self, active_services: List[str]):
         """Remove metrics history for services no longer being monitored.
@@ -73,100 +349,398 @@ class MonitoringEngine:
         stale = set(self.metrics_history.keys()) - active_set
         for service in stale:
             del self.metrics_history[service]
+            self.rollups.pop(service, None)
+            if self.store is not None:
+                self.store.close_unit(service)
             logger.debug(f"Cleaned up metrics history for stale service: {service}")
+        for service in set(self._io_keys) - active_set:
+            del self._io_keys[service]
+        for service in set(self.memory_events) - active_set:
+            del self.memory_events[service]
+        if self._memory_watcher is not None:
+            for service in set(self._memory_watcher.units()) - active_set:
+                self._memory_watcher.unwatch(service)
+        counters = [prop for prop, _, _ in self.RATE_COUNTERS]
+        counters += [f'{resource}.pressure' for resource in PRESSURE_RESOURCES]
+        keys = [(service, counter) for service in active_set for counter in counters]
+        for service_keys in self._io_keys.values():
+            keys.extend(service_keys)
+        self._rates.retain(keys)
+
+    async def _monitor_loop(self):
+        """Main monitoring loop.
 
-    async def _monitor_loop(self, services: List[str]):
-        """Main monitoring loop."""
+        Ticks are scheduled at fixed multiples of interval on the monotonic
+        clock, so the period does not grow with the number of services.
+        A tick that overruns causes the missed ticks to be skipped rather
+        than fired back to back.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        start = time.monotonic()
+        tick = 0
         while self._monitoring:
+            delay = start + tick * self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.scheduler_stats.record_tick(time.monotonic() - (start + tick * self.interval))
+
+            services = self._services
             try:
-                for service in services:
-                    metrics = await self.get_current_metrics(service)
-                    if metrics:
-                        self.metrics_history[service].append(metrics)
+                await self.load_history(services)
+                await self._sample_tick(services, semaphore)
                 # Periodic cleanup of stale services
                 self.cleanup_stale_services(services)
-                await asyncio.sleep(self.interval)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(self.interval)
 
-    async def get_current_metrics(self, service: str) -> Optional[Metrics]:
-        """Get current metrics for a service."""
-        try:
-            # Get service object to access properties
-            if not service.endswith('.service'):
-                service_name = f"{service}.service"
-            else:
-                service_name = service
+            tick += 1
+            due = int((time.monotonic() - start) // self.interval)
+            if due > tick:
+                self.scheduler_stats.overruns += 1
+                self.scheduler_stats.skipped_ticks += due - tick
+                logger.debug(f"Monitoring tick overran, skipping {due - tick} tick(s)")
+                tick = due
 
-            # Get the unit path
-            unit_path = self.systemd_manager.manager_interface.GetUnit(service_name)
+    async def _sample_tick(self, services: List[str], semaphore: asyncio.Semaphore):
+        """Sample all services of one tick concurrently.
+
+        Args:
+            services: Services to sample
+            semaphore: Caps the number of samples in flight
+        """
+        async def sample(service: str):
+            async with semaphore:
+                metrics = await self.get_current_metrics(service)
+            if metrics:
+                self.record_metrics(service, metrics)
 
-            # Get the unit object
-            unit_object = self.systemd_manager.bus.get_object('org.freedesktop.systemd1', unit_path)
+        await asyncio.gather(*(sample(service) for service in services))
 
-            # Get properties interface
-            props_interface = dbus.Interface(unit_object, 'org.freedesktop.DBus.Properties')
+    def record_metrics(self, service: str, metrics: Metrics) -> None:
+        """Append a sample to a service's history ring buffer.
 
-            # Try to get CPU usage (UserTime + SystemTime)
-            cpu_usage = 0.0
-            try:
-                # Get CPU usage in microseconds, convert to percentage-like value
-                user_time = props_interface.Get('org.freedesktop.systemd1.Service', 'UserTime')
-                system_time = props_interface.Get('org.freedesktop.systemd1.Service', 'SystemTime')
-                # Convert to seconds and normalize (this is a simplified approach)
-                cpu_usage = (float(user_time) + float(system_time)) / 1000000.0  # microseconds to seconds
-            except Exception:
-                # If we can't get detailed CPU time, use a placeholder
-                cpu_usage = 0.0
-
-            # Try to get memory usage
-            memory_usage = 0
-            try:
-                # Get memory usage in bytes
-                memory = props_interface.Get('org.freedesktop.systemd1.Service', 'MemoryCurrent')
-                memory_usage = int(memory)
-            except Exception:
-                # If we can't get memory, use 0
-                memory_usage = 0
-
-            # Try to get I/O statistics (simplified)
-            io_read = 0
-            io_write = 0
-            try:
-                # These might not be available on all systems
-                io_read_bytes = props_interface.Get('org.freedesktop.systemd1.Service', 'IOReadBytes')
-                io_write_bytes = props_interface.Get('org.freedesktop.systemd1.Service', 'IOWriteBytes')
-                io_read = int(io_read_bytes)
-                io_write = int(io_write_bytes)
-            except Exception:
-                # If I/O stats aren't available, leave as 0
-                pass
+        Args:
+            service: Service name
+            metrics: Sample to store
+        """
+        history = self._ensure_history(service)
+        values = [getattr(metrics, name) for name, _ in self.HISTORY_FIELDS]
+        stored = self._encode(values)
+        history.append(metrics.timestamp, *stored)
+        rollup_values = [values[i] for i in self._rollup_index]
+        for tier in self.rollups[service]:
+            tier.add(metrics.timestamp, rollup_values)
+        if self.store is not None:
+            self.store.append(service, metrics.timestamp, stored)
 
-            return Metrics(
-                timestamp=time.time(),
-                cpu_usage=cpu_usage,
-                memory_usage=memory_usage,
-                io_read=io_read,
-                io_write=io_write
-            )
+    def _encode(self, values: List[float]) -> List:
+        """Convert field values to their stored representation."""
+        return [value if scale == 1 else min(round(value * scale), 0xFFFF)
+                for value, scale in zip(values, self._scales)]
+
+    def _decode(self, stored: Iterable) -> List:
+        """Convert stored values back to field values."""
+        return [value if scale == 1 else value / scale
+                for value, scale in zip(stored, self._scales)]
+
+    def _new_history(self) -> Tuple[RingBuffer, List[RollupTier]]:
+        """Allocate an empty raw history and rollup tiers for one service."""
+        # I/O columns are only allocated once I/O monitoring records a value
+        io_fields = [name for _, name in self.IO_COUNTERS]
+        history = RingBuffer(self.history_length, self.HISTORY_FIELDS, lazy=io_fields)
+        tiers = [RollupTier(resolution, retention, self.ROLLUP_FIELDS, lazy=io_fields)
+                 for resolution, retention in self.rollup_tiers]
+        return history, tiers
+
+    def _ensure_history(self, service: str) -> RingBuffer:
+        """Get a service's history, creating an empty one if needed."""
+        history = self.metrics_history.get(service)
+        if history is None:
+            history, self.rollups[service] = self._new_history()
+            self.metrics_history[service] = history
+        return history
+
+    def _read_stored(self, service: str) -> Tuple[RingBuffer, List[RollupTier]]:
+        """Build a service's history from its ring file (runs on the worker pool).
+
+        The raw ring gets the newest samples, the rollup tiers as much of
+        the stored span as they retain.
+        """
+        history, tiers = self._new_history()
+        stored = self.store.open(service)
+        if stored is None:
+            return history, tiers
+        first_raw = max(0, len(stored) - history.capacity)
+        for index, (timestamp, *values) in enumerate(stored.rows()):
+            if index >= first_raw:
+                history.append(timestamp, *values)
+            values = self._decode(values)
+            rollup_values = [values[i] for i in self._rollup_index]
+            for tier in tiers:
+                tier.add(timestamp, rollup_values)
+        return history, tiers
+
+    async def get_current_metrics(self, service: str) -> Optional[Metrics]:
+        """Get current metrics for a service without blocking the event loop."""
+        try:
+            sample = await self.systemd_manager.run_blocking(self._read_sample, service)
         except Exception as e:
             # Service might not exist or other error
             logger.warning(f"Error getting metrics for service {service}: {e}")
             return None
+        self._apply_sample(service, sample)
+        return sample.metrics
+
+    def _apply_sample(self, service: str, sample: _Sample) -> None:
+        """Update per-service sampling state from a finished read (event loop thread).
+
+        A read that timed out never gets here, so it cannot resurrect the
+        state of a service that was cleaned up in the meantime. The
+        memory.events watch follows the unit's cgroup from here too, so
+        it never races with the unwatch in cleanup_stale_services().
+        """
+        if self._memory_watcher is not None and service in self._services:
+            # A dict lookup unless the unit is new or its cgroup changed
+            self._memory_watcher.watch(service, sample.cgroup)
+        if sample.io_keys is None:
+            return
+        if not self._io_monitoring:
+            # Turned off while the read ran
+            for key in sample.io_keys:
+                self._rates.discard(key)
+            return
+        for key in set(self._io_keys.get(service, ())) - set(sample.io_keys):
+            self._rates.discard(key)  # device gone
+        self._io_keys[service] = sample.io_keys
+
+    def _read_sample(self, service: str) -> _Sample:
+        """Read metrics with one blocking GetAll (runs on the D-Bus worker pool).
+
+        Only the thread-safe RateTracker is updated here; everything else
+        is returned for _apply_sample().
+        """
+        if not service.endswith('.service'):
+            service_name = f"{service}.service"
+        else:
+            service_name = service
+
+        props = self.systemd_manager.get_unit_properties(service_name, self.METRIC_PROPERTIES)
+        if not props:
+            raise RuntimeError("no D-Bus connection to systemd")
+
+        now = time.monotonic()
+        # A new invocation (restart) resets systemd's counters
+        generation = bytes(props.get('InvocationID') or b'').hex()
+        rates = {}
+        for prop, field_name, scale in self.RATE_COUNTERS:
+            value = props.get(prop)
+            if value is None or value == _COUNTER_UNSET:
+                self._rates.discard((service, prop))
+                continue
+            rate = self._rates.update((service, prop), value, now, generation)
+            if rate is not None:
+                rates[field_name] = rate * scale
+
+        memory = props.get('MemoryCurrent')
+        metrics = Metrics(
+            timestamp=time.time(),
+            cpu_usage=rates.get('cpu_usage', 0.0),
+            memory_usage=0 if memory in (None, _COUNTER_UNSET) else int(memory),
+            ip_ingress=rates.get('ip_ingress', 0.0),
+            ip_egress=rates.get('ip_egress', 0.0)
+        )
+        cgroup = str(props.get('ControlGroup') or '')
+        self._read_pressure(service, cgroup, metrics, now, generation)
+        io_keys = None
+        if self._io_monitoring:
+            io_keys = self._read_io(service, cgroup, metrics, now, generation)
+        return _Sample(metrics, cgroup, io_keys)
+
+    def _read_pressure(self, service: str, cgroup: str, metrics: Metrics,
+                       now: float, generation: str) -> None:
+        """Fill the PSI fields of a sample from the unit's cgroup pressure files."""
+        pressures = self._cgroups.read_pressure(cgroup)
+        for resource in PRESSURE_RESOURCES:
+            some = pressures.get(resource, {}).get('some')
+            key = (service, f'{resource}.pressure')
+            if some is None:
+                self._rates.discard(key)
+                continue
+            setattr(metrics, f'{resource}_pressure_avg10', some.avg10)
+            setattr(metrics, f'{resource}_pressure_avg60', some.avg60)
+            rate = self._rates.update(key, some.total_usec, now, generation)
+            if rate is not None:
+                setattr(metrics, f'{resource}_pressure_stall', rate / 1e6 * 100)
+
+    def _read_io(self, service: str, cgroup: str, metrics: Metrics,
+                 now: float, generation: str) -> List[Tuple[str, str, str, str]]:
+        """Fill the I/O fields of a sample from the unit's cgroup io.stat.
+
+        Every device's counters get their own rate, so a device that
+        appears, disappears or resets does not disturb the others; the
+        sample holds the sum over the devices.
+
+        Returns:
+            Rate keys of the devices read
+        """
+        keys = []
+        totals = dict.fromkeys((name for _, name in self.IO_COUNTERS), 0.0)
+        for device, counters in self._cgroups.read_io(cgroup).items():
+            for counter, field_name in self.IO_COUNTERS:
+                value = counters.get(counter)
+                if value is None:
+                    continue
+                key = (service, 'io.stat', device, counter)
+                keys.append(key)
+                rate = self._rates.update(key, value, now, generation)
+                if rate is not None:
+                    totals[field_name] += rate
+        for field_name, total in totals.items():
+            setattr(metrics, field_name, total)
+        return keys
+
+    def _discard_io(self, service: str) -> None:
+        """Forget the io.stat baselines of a service."""
+        for key in self._io_keys.pop(service, ()):
+            self._rates.discard(key)
+
+    def add_memory_event_callback(self, callback: Callable[[MemoryEvent], None]) -> None:
+        """Call callback(event) as soon as a memory.events counter of a service rises.
+
+        Callbacks run in the event loop thread; event.unit is the service name.
+
+        Args:
+            callback: Function taking a MemoryEvent
+        """
+        if self._memory_watcher is not None:
+            self._memory_watcher.add_callback(callback)
+
+    def _record_memory_event(self, event: MemoryEvent) -> None:
+        """Append a memory.events increase to the service's event history."""
+        history = self.memory_events.get(event.unit)
+        if history is None:
+            history = RingBuffer(self.MEMORY_EVENT_HISTORY, self.MEMORY_EVENT_FIELDS)
+            self.memory_events[event.unit] = history
+        history.append(event.timestamp, MEMORY_EVENT_COUNTERS.index(event.counter),
+                       int(event.local), event.increase, event.count)
+        if event.counter in ('oom', 'oom_kill'):
+            logger.warning(f"Memory event in {event.unit}: {event.counter} +{event.increase}")
 
-    def get_history(self, service: str, duration: int = 60) -> List[Metrics]:
+    def get_memory_events(self, service: str, duration: float = 3600,
+                          now: Optional[float] = None) -> List[MemoryEvent]:
+        """Get the memory.events increases of the last duration seconds.
+
+        Args:
+            service: Service name
+            duration: Duration in seconds
+            now: End of the window (default: current time)
+
+        Returns:
+            List of MemoryEvent, oldest first
+        """
+        history = self.memory_events.get(service)
+        if history is None:
+            return []
+        start, stop = history.window((time.time() if now is None else now) - duration)
+        return [MemoryEvent(service, MEMORY_EVENT_COUNTERS[counter], increase, count,
+                            timestamp, local=bool(local))
+                for timestamp, counter, local, increase, count in history.rows(start, stop)]
+
+    def get_history(self, service: str, duration: int = 60,
+                    now: Optional[float] = None) -> List[Metrics]:
         """Get historical metrics.
 
         Args:
             service: Service name
             duration: Duration in seconds
+            now: End of the window (default: current time)
 
         Returns:
             List of historical metrics
         """
-        history = self.metrics_history.get(service, [])
+        history = self.metrics_history.get(service)
+        if history is None:
+            return []
         # Return last 'duration' seconds of data
-        return list(history)
\ No newline at end of file
+        start, stop = history.window((time.time() if now is None else now) - duration)
+        return [Metrics(row[0], *self._decode(row[1:])) for row in history.rows(start, stop)]
+
+    def get_series(self, service: str, fields: List[str], duration: int = 60,
+                   now: Optional[float] = None) -> Dict[str, List[memoryview]]:
+        """Get zero-copy column views of the last duration seconds, e.g. for charts.
+
+        Args:
+            service: Service name
+            fields: Columns to return ('timestamp', 'cpu_usage', ...)
+            duration: Duration in seconds
+            now: End of the window (default: current time)
+
+        Returns:
+            Dictionary mapping field -> memoryview segments (oldest first);
+            fields listed in FIELD_SCALES are in stored units
+        """
+        history = self.metrics_history.get(service)
+        if history is None:
+            return {name: [] for name in fields}
+        start, stop = history.window((time.time() if now is None else now) - duration)
+        return {name: history.segments(name, start, stop) for name in fields}
+
+    def get_summary(self, service: str, duration: int = 60, now: Optional[float] = None,
+                    percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """Aggregate every metric over the last duration seconds.
+
+        Args:
+            service: Service name
+            duration: Duration in seconds
+            now: End of the window (default: current time)
+            percentiles: Percentiles to compute (0-100)
+
+        Returns:
+            Dictionary mapping metric -> {count, min, max, mean, p50, ...}
+        """
+        history = self.metrics_history.get(service)
+        if history is None:
+            return {}
+        start, stop = history.window((time.time() if now is None else now) - duration)
+        summary = {}
+        for (name, _), scale in zip(self.HISTORY_FIELDS, self._scales):
+            stats = history.aggregate(name, start, stop, percentiles)
+            if scale != 1:
+                stats = {key: value if key == 'count' else value / scale
+                         for key, value in stats.items()}
+            summary[name] = stats
+        return summary
+
+    def get_rollup(self, service: str, duration: float,
+                   now: Optional[float] = None) -> Tuple[float, List[Bucket]]:
+        """Get min/max/avg/last buckets of the last duration seconds.
+
+        The finest tier that covers the range is used: the raw history if
+        duration fits into history_length samples, else the first rollup
+        tier retaining at least duration seconds, else the coarsest tier.
+
+        Args:
+            service: Service name
+            duration: Duration in seconds
+            now: End of the window (default: current time)
+
+        Returns:
+            Tuple of (bucket width in seconds, buckets oldest first)
+        """
+        since = (time.time() if now is None else now) - duration
+        tiers = self.rollups.get(service)
+        if not tiers or duration <= self.history_length * self.interval:
+            history = self.metrics_history.get(service)
+            if history is None:
+                return self.interval, []
+            fields = history.fields[1:]
+            start, stop = history.window(since)
+            buckets = []
+            for timestamp, *values in history.rows(start, stop):
+                point = dict(zip(fields, self._decode(values)))
+                buckets.append(Bucket(timestamp, 1, point, point, point, point))
+            return self.interval, buckets
+        tier = next((t for t in tiers if t.retention >= duration), tiers[-1])
+        return tier.resolution, tier.buckets(since)
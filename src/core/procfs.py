@@ -0,0 +1,167 @@
+"""One-pass /proc scanner mapping processes to systemd units."""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROC_ROOT = '/proc'
+
+# Unit types that own processes; slices only group other units
+PROCESS_UNIT_SUFFIXES = ('.service', '.scope', '.socket', '.mount', '.swap')
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def unit_from_cgroup(cgroup: str) -> Optional[str]:
+    """Get the system unit owning a cgroup path.
+
+    This is the first path component below the slices, so processes in
+    a delegated subtree (e.g. user@1000.service/app.slice/...) count for
+    the unit the subtree was delegated to.
+
+    Args:
+        cgroup: cgroup path, e.g. /system.slice/sshd.service
+
+    Returns:
+        Unit name, or None for the root cgroup and slices
+    """
+    for part in cgroup.split('/'):
+        if not part or part.endswith('.slice'):
+            continue
+        return part if part.endswith(PROCESS_UNIT_SUFFIXES) else None
+    return None
+
+
+@dataclass
+class ProcessInfo:
+    """Accounting of one process, from /proc/<pid>/stat and fd."""
+    pid: int
+    start_time: int  # clock ticks after boot; tells a reused PID apart
+    cpu_time: float  # user + system seconds
+    threads: int
+    rss_bytes: int
+    fds: Optional[int] = None  # None if not counted or not readable
+
+
+@dataclass
+class UnitProcesses:
+    """Processes of one unit with their totals."""
+    unit: str
+    processes: Dict[int, ProcessInfo] = field(default_factory=dict)
+    threads: int = 0
+    rss_bytes: int = 0
+    fds: int = 0  # over the processes whose fd directory was readable
+    cpu_time: float = 0.0
+
+    @property
+    def pids(self) -> Set[int]:
+        """PIDs of the unit's processes."""
+        return set(self.processes)
+
+    def add(self, info: ProcessInfo) -> None:
+        """Add one process to the totals."""
+        self.processes[info.pid] = info
+        self.threads += info.threads
+        self.rss_bytes += info.rss_bytes
+        self.fds += info.fds or 0
+        self.cpu_time += info.cpu_time
+
+
+class ProcScanner:
+    """Build a unit -> processes index with one pass over /proc.
+
+    Each process costs a read of its cgroup file; stat (and the fd
+    directory) are read only for processes of the requested units.
+    This finds every process in a unit, including workers that are not
+    children of MainPID, without any per-service systemctl call.
+    """
+
+    def __init__(self, root: str = DEFAULT_PROC_ROOT, count_fds: bool = True):
+        """Initialize the scanner.
+
+        Args:
+            root: procfs mount point
+            count_fds: Count open file descriptors (one listdir per process)
+        """
+        self.root = root
+        self.count_fds = count_fds
+
+    def scan(self, units: Optional[Iterable[str]] = None) -> Dict[str, UnitProcesses]:
+        """Scan every process once.
+
+        Args:
+            units: Only collect these units (default: all units)
+
+        Returns:
+            Dictionary mapping unit name -> UnitProcesses
+        """
+        wanted = set(units) if units is not None else None
+        result: Dict[str, UnitProcesses] = {}
+        try:
+            entries = os.scandir(self.root)
+        except OSError as e:
+            logger.warning(f"Cannot scan {self.root}: {e}")
+            return result
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                cgroup = self._read_cgroup(entry.path)
+                unit = unit_from_cgroup(cgroup) if cgroup else None
+                if unit is None or (wanted is not None and unit not in wanted):
+                    continue
+                info = self._read_process(int(entry.name), entry.path)
+                if info is None:
+                    continue  # exited during the scan
+                if unit not in result:
+                    result[unit] = UnitProcesses(unit)
+                result[unit].add(info)
+        return result
+
+    @staticmethod
+    def _read_cgroup(directory: str) -> Optional[str]:
+        """Read a process's systemd cgroup path (unified or name=systemd hierarchy)."""
+        try:
+            with open(f'{directory}/cgroup') as f:
+                text = f.read()
+        except OSError:
+            return None
+        fallback = None
+        for line in text.splitlines():
+            hierarchy, _, rest = line.partition(':')
+            controllers, _, path = rest.partition(':')
+            if hierarchy == '0' and not controllers:
+                return path
+            if controllers == 'name=systemd':
+                fallback = path
+        return fallback
+
+    def _read_process(self, pid: int, directory: str) -> Optional[ProcessInfo]:
+        """Read one process's stat line and count its file descriptors."""
+        try:
+            with open(f'{directory}/stat') as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # Fields after the parenthesised command name, starting at field 3 (state)
+        fields = stat.rpartition(')')[2].split()
+        try:
+            info = ProcessInfo(
+                pid=pid,
+                start_time=int(fields[19]),
+                cpu_time=(int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+                threads=int(fields[17]),
+                rss_bytes=int(fields[21]) * _PAGE_SIZE,
+            )
+        except (IndexError, ValueError):
+            return None
+        if self.count_fds:
+            try:
+                info.fds = len(os.listdir(f'{directory}/fd'))
+            except OSError:
+                pass  # other users' processes need privileges
+        return info
@@ -0,0 +1,67 @@
+"""Rates derived from cumulative counters sampled over time."""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class RateTracker:
+    """Per-key rate of change of cumulative counters.
+
+    Keeps the previous value, a monotonic timestamp and a generation token
+    per key (a unit, cgroup or process). update() returns the rate since
+    the previous sample without sleeping. When the generation changes
+    (unit restarted, PID reused) or the counter goes backwards (counter
+    reset), the sample becomes the new baseline and no rate is reported.
+    """
+
+    def __init__(self):
+        self._samples: Dict[Hashable, Tuple[float, float, Any]] = {}  # key -> (value, timestamp, generation)
+        self._lock = threading.Lock()
+        self.resets = 0
+
+    def update(self, key: Hashable, value: float, now: Optional[float] = None,
+               generation: Any = None) -> Optional[float]:
+        """Record a counter sample.
+
+        Args:
+            key: Counter identity
+            value: Cumulative counter value
+            now: Monotonic timestamp of the sample (default: time.monotonic())
+            generation: Token that changes when the counter's owner is replaced
+
+        Returns:
+            Units per second since the previous sample, or None for a baseline
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            previous = self._samples.get(key)
+            self._samples[key] = (value, now, generation)
+            if previous is None:
+                return None
+            prev_value, prev_time, prev_generation = previous
+            if prev_generation != generation or value < prev_value:
+                self.resets += 1
+                return None
+        elapsed = now - prev_time
+        if elapsed <= 0:
+            return None
+        return (value - prev_value) / elapsed
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the previous sample of a key."""
+        with self._lock:
+            self._samples.pop(key, None)
+
+    def retain(self, keys: Iterable[Hashable]) -> None:
+        """Forget every key not in keys (e.g. processes that exited)."""
+        keep = set(keys)
+        with self._lock:
+            for key in [k for k in self._samples if k not in keep]:
+                del self._samples[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._samples
+
+    def __len__(self) -> int:
+        return len(self._samples)
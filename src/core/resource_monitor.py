@@ -1,14 +1,22 @@
 # src/core/resource_monitor.py
 """Resource monitoring for systemd services"""
 
+import logging
 import psutil
 import subprocess
 import time
 import threading
-from typing import Dict, Optional, List
-from dataclasses import dataclass
+from typing import Dict, Optional, List, Set
+from dataclasses import dataclass, field
 from functools import lru_cache
 
+from .cache import ResultCache
+from .cgroup import CgroupCollector, CgroupStats, DEFAULT_CGROUP_ROOT, Pressure
+from .procfs import DEFAULT_PROC_ROOT, PROCESS_UNIT_SUFFIXES, ProcScanner, UnitProcesses
+from .rates import RateTracker
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ServiceResources:
@@ -17,173 +25,308 @@ class ServiceResources:
     memory_mb: float = 0.0
     memory_percent: float = 0.0
     process_count: int = 0
+    thread_count: int = 0
+    fd_count: int = 0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+    pressure: Dict[str, Pressure] = field(default_factory=dict)  # resource -> PSI "some" line
 
+    def some_pressure(self, resource: str) -> Pressure:
+        """Get the PSI "some" line of a resource (zeros if unavailable)"""
+        return self.pressure.get(resource) or Pressure()
 
-class ResourceMonitor:
-    """Monitor resource usage of systemd services"""
 
-    def __init__(self):
-        self._cache: Dict[str, ServiceResources] = {}
-        self._cache_lock = threading.Lock()
-        self._last_cpu_times: Dict[int, float] = {}  # pid -> last cpu_time
-        self._last_check_time: Dict[int, float] = {}  # pid -> last check time
+class ResourceMonitor:
+    """Monitor resource usage of systemd services
+
+    Samples are cached with a TTL and bounded in number. An expired sample
+    is still returned while a background sampler thread refreshes it
+    (stale-while-revalidate), so reads only block on a unit's first sample.
+
+    Memory, CPU and I/O come from the unit's cgroup v2 files when
+    available; process, thread and FD counts (and, without cgroup v2,
+    memory and CPU) come from one /proc scan per batch.
+    """
+
+    DEFAULT_CACHE_TTL = 5.0  # seconds
+    DEFAULT_MAX_ENTRIES = 256
+    DEFAULT_REFRESH_INTERVAL = 2.0  # seconds between sampler passes
+    ACTIVE_WINDOW = 60.0  # units read within this many seconds keep being refreshed
+
+    def __init__(self, cgroup_root: str = DEFAULT_CGROUP_ROOT, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 background_refresh: bool = True, proc_root: str = DEFAULT_PROC_ROOT):
+        self._cache = ResultCache(cache_ttl, max_entries)
+        self._pid_rates: Dict[str, RateTracker] = {}  # service -> per-PID CPU time rates
+        self._unit_cgroups: Dict[str, str] = {}  # service -> ControlGroup
+        # Guards _pid_rates and _unit_cgroups: the sampler thread and inline
+        # samples from the caller's thread both update them
+        self._state_lock = threading.Lock()
+        self._cgroups = CgroupCollector(cgroup_root)
+        self._procs = ProcScanner(proc_root)
+        self._refresh_interval = refresh_interval
+        self._background_refresh = background_refresh
+        self._pending: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
 
     def get_service_resources(self, service_name: str) -> ServiceResources:
         """Get resource usage for a specific service"""
-        # Check cache first (thread-safe)
-        with self._cache_lock:
-            cached = self._cache.get(service_name)
-            if cached:
-                return cached
+        cached = self._cache.get_stale(service_name)
+        if cached is not None:
+            resources, fresh = cached
+            if fresh or self._schedule_refresh([service_name]):
+                return resources
+        return self._sample_one(service_name)
+
+    def get_multiple_resources(self, service_names: List[str]) -> Dict[str, ServiceResources]:
+        """Get resources for multiple services at once
+
+        Cached samples are returned immediately (stale ones are queued for
+        the background sampler); only never-seen units are sampled inline,
+        in one batch.
+        """
+        if not service_names:
+            return {}
 
+        results: Dict[str, ServiceResources] = {}
+        missing = []
+        stale = []
+        for service_name in service_names:
+            cached = self._cache.get_stale(service_name)
+            if cached is None:
+                missing.append(service_name)
+                continue
+            results[service_name], fresh = cached
+            if not fresh:
+                stale.append(service_name)
+
+        if stale and not self._schedule_refresh(stale):
+            missing.extend(stale)
+        if missing:
+            results.update(self._sample_batch(missing))
+        return {name: results.get(name, ServiceResources()) for name in service_names}
+
+    def stop(self):
+        """Stop the background sampler thread"""
+        self._stopping.set()
+        self._wake.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=self._refresh_interval + 1)
+            self._sampler = None
+        self._stopping.clear()
+
+    @property
+    def cache_stats(self) -> Dict[str, float]:
+        """Get resource cache counters (hits, stale_hits, misses, evictions, entries, hit_rate)"""
+        return self._cache.stats
+
+    def _schedule_refresh(self, service_names: List[str]) -> bool:
+        """Queue services for the background sampler, starting it if needed"""
+        if not self._background_refresh:
+            return False
+        with self._pending_lock:
+            self._pending.update(service_names)
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sampler_loop,
+                                                 name='resource-sampler', daemon=True)
+                self._sampler.start()
+        self._wake.set()
+        return True
+
+    def _sampler_loop(self):
+        """Refresh queued and recently read services until stopped"""
+        while not self._stopping.is_set():
+            # Cleared before taking the queue, so a wake-up arriving while
+            # sampling makes the wait below return at once
+            self._wake.clear()
+            with self._pending_lock:
+                names = self._pending
+                self._pending = set()
+            names.update(self._cache.recently_read(self.ACTIVE_WINDOW))
+            if names:
+                try:
+                    self._sample_batch(sorted(names))
+                except Exception as e:
+                    logger.debug(f"Background resource sampling failed: {e}")
+            self._prune()
+            self._wake.wait(self._refresh_interval)
+
+    def _prune(self):
+        """Drop per-unit sample state of services no longer cached"""
+        cached = set(self._cache.keys())
+        with self._state_lock:
+            for service_name in [n for n in self._pid_rates if n not in cached]:
+                del self._pid_rates[service_name]
+            stale = [self._unit_cgroups.pop(n) for n in list(self._unit_cgroups) if n not in cached]
+        for cgroup in stale:
+            self._cgroups.forget(cgroup)
+
+    def _sample_one(self, service_name: str,
+                    procs: Optional[Dict[str, UnitProcesses]] = None) -> ServiceResources:
+        """Sample one service from its cgroup and the /proc scan
+
+        The cgroup is located with one systemctl show call; procs is a scan
+        already done by _sample_batch, else this service is scanned alone.
+        Used for single lookups and when the batched call fails.
+        """
         try:
-            # Get MainPID from systemd
+            if procs is None:
+                procs = self._scan_processes([service_name])
+            if not self._cgroups.available:
+                return self._collect(service_name, {}, procs)
+
+            # Get the ControlGroup from systemd
             result = subprocess.run(
-                ['systemctl', 'show', service_name, '--property=MainPID'],
+                ['systemctl', 'show', service_name, '--property=ControlGroup'],
                 capture_output=True,
                 text=True,
                 timeout=2
             )
 
-            if result.returncode != 0:
-                return ServiceResources()
-
-            # Parse MainPID
-            main_pid_str = result.stdout.strip().split('=')[1]
-            if not main_pid_str or main_pid_str == '0':
-                return ServiceResources()
-
-            main_pid = int(main_pid_str)
-
-            # Get process and all children
-            try:
-                process = psutil.Process(main_pid)
-                processes = [process] + process.children(recursive=True)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                return ServiceResources()
-
-            # Calculate total resources with proper CPU measurement
-            total_cpu = 0.0
-            total_mem = 0.0
-            process_count = len(processes)
-
-            current_time = time.time()
-            for proc in processes:
-                try:
-                    # Fix: Use two-sample method for accurate CPU%
-                    # First call initializes, second call returns actual percentage
-                    cpu1 = proc.cpu_percent(interval=None)
-                    # Small delay for accurate measurement
-                    time.sleep(0.05)
-                    cpu2 = proc.cpu_percent(interval=None)
-                    total_cpu += cpu2
-
-                    total_mem += proc.memory_info().rss / (1024 * 1024)  # MB
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-
-            total_mem_system = psutil.virtual_memory().total / (1024 * 1024)
-            mem_percent = (total_mem / total_mem_system) * 100 if total_mem_system > 0 else 0
-
-            resources = ServiceResources(
-                cpu_percent=round(total_cpu, 1),
-                memory_mb=round(total_mem, 1),
-                memory_percent=round(mem_percent, 2),
-                process_count=process_count
-            )
-
-            # Cache result (thread-safe)
-            with self._cache_lock:
-                self._cache[service_name] = resources
-            return resources
+            blocks = self._parse_show_output(result.stdout) if result.returncode == 0 else []
+            return self._collect(service_name, blocks[0] if blocks else {}, procs)
 
         except Exception:
             # Return cached value or empty
-            with self._cache_lock:
-                return self._cache.get(service_name, ServiceResources())
-
-    def get_multiple_resources(self, service_names: List[str]) -> Dict[str, ServiceResources]:
-        """Get resources for multiple services at once - batch PID fetching"""
-        if not service_names:
-            return {}
+            cached = self._cache.get_stale(service_name)
+            return cached[0] if cached else ServiceResources()
 
+    def _sample_batch(self, service_names: List[str]) -> Dict[str, ServiceResources]:
+        """Sample several services with ONE /proc scan and ONE subprocess call"""
         results = {}
+        procs = self._scan_processes(service_names)
+        if not self._cgroups.available:
+            return {name: self._collect(name, {}, procs) for name in service_names}
 
-        # Batch fetch all MainPIDs in ONE subprocess call
-        cmd = ['systemctl', 'show', '--property=MainPID'] + service_names
+        cmd = ['systemctl', 'show', '--property=ControlGroup'] + service_names
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
             if result.returncode != 0:
                 # Fallback to individual calls if batch fails
-                return {name: self.get_service_resources(name) for name in service_names}
-
-            # Parse all PIDs from output
-            pid_map: Dict[str, Optional[int]] = {}
-            for line in result.stdout.strip().split('\n'):
-                if '=' in line:
-                    name, pid_str = line.split('=', 1)
-                    if pid_str and pid_str != '0':
-                        try:
-                            pid_map[name] = int(pid_str)
-                        except ValueError:
-                            pid_map[name] = None
-                    else:
-                        pid_map[name] = None
-
-            # Now get resources for each service using the fetched PIDs
-            for service_name in service_names:
-                pid = pid_map.get(service_name)
-                if pid and pid > 0:
-                    results[service_name] = self._get_resources_for_pid(service_name, pid)
-                else:
-                    results[service_name] = ServiceResources()
+                return {name: self._sample_one(name, procs) for name in service_names}
+
+            # systemctl prints one block per unit, in argument order
+            blocks = self._parse_show_output(result.stdout)
+            if len(blocks) != len(service_names):
+                return {name: self._sample_one(name, procs) for name in service_names}
+
+            for service_name, props in zip(service_names, blocks):
+                results[service_name] = self._collect(service_name, props, procs)
 
         except Exception:
             # Fallback to individual calls
-            return {name: self.get_service_resources(name) for name in service_names}
+            return {name: self._sample_one(name, procs) for name in service_names}
 
         return results
 
-    def _get_resources_for_pid(self, service_name: str, main_pid: int) -> ServiceResources:
-        """Get resources for a service given its MainPID (internal helper)"""
+    def _scan_processes(self, service_names: List[str]) -> Dict[str, UnitProcesses]:
+        """Index the processes of the given services with one /proc pass"""
         try:
-            process = psutil.Process(main_pid)
-            processes = [process] + process.children(recursive=True)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return ServiceResources()
+            return self._procs.scan(self._unit_name(name) for name in service_names)
+        except Exception as e:
+            logger.debug(f"Process scan failed: {e}")
+            return {}
 
-        total_cpu = 0.0
-        total_mem = 0.0
-        process_count = len(processes)
-
-        for proc in processes:
-            try:
-                # Two-sample method for accurate CPU%
-                cpu1 = proc.cpu_percent(interval=None)
-                time.sleep(0.05)
-                cpu2 = proc.cpu_percent(interval=None)
-                total_cpu += cpu2
-
-                total_mem += proc.memory_info().rss / (1024 * 1024)  # MB
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+    @staticmethod
+    def _unit_name(service_name: str) -> str:
+        """Get the full unit name ("sshd" -> "sshd.service")"""
+        if service_name.endswith(PROCESS_UNIT_SUFFIXES):
+            return service_name
+        return f"{service_name}.service"
+
+    @staticmethod
+    def _parse_show_output(output: str) -> List[Dict[str, str]]:
+        """Split `systemctl show` output into one property dict per unit"""
+        blocks = []
+        current: Dict[str, str] = {}
+        for line in output.strip().split('\n'):
+            if not line.strip():
+                if current:
+                    blocks.append(current)
+                    current = {}
                 continue
+            key, _, value = line.partition('=')
+            current[key] = value
+        if current:
+            blocks.append(current)
+        return blocks
+
+    def _collect(self, service_name: str, props: Dict[str, str],
+                 procs: Dict[str, UnitProcesses]) -> ServiceResources:
+        """Read a service's resources from its cgroup and/or the /proc scan"""
+        resources = None
+        cgroup = props.get('ControlGroup', '')
+        if cgroup and self._cgroups.available:
+            stats = self._cgroups.sample(cgroup)
+            if stats is not None:
+                with self._state_lock:
+                    self._unit_cgroups[service_name] = cgroup
+                resources = self._resources_from_cgroup(stats)
+
+        unit = procs.get(self._unit_name(service_name))
+        if unit is None:
+            with self._state_lock:
+                self._pid_rates.pop(service_name, None)
+        elif resources is None:
+            resources = self._resources_from_procs(service_name, unit)
+        else:
+            resources.process_count = len(unit.processes)
+            resources.thread_count = unit.threads
+            resources.fd_count = unit.fds
+
+        resources = resources or ServiceResources()
+        self._cache.put(service_name, resources)
+        return resources
 
-        total_mem_system = psutil.virtual_memory().total / (1024 * 1024)
-        mem_percent = (total_mem / total_mem_system) * 100 if total_mem_system > 0 else 0
+    @staticmethod
+    def _resources_from_cgroup(stats: CgroupStats) -> ServiceResources:
+        """Convert a cgroup sample into ServiceResources"""
+        total_mem_system = psutil.virtual_memory().total
+        mem_percent = (stats.memory_current / total_mem_system) * 100 if total_mem_system > 0 else 0
+        return ServiceResources(
+            cpu_percent=round(stats.cpu_percent or 0.0, 1),
+            memory_mb=round(stats.memory_current / (1024 * 1024), 1),
+            memory_percent=round(mem_percent, 2),
+            process_count=stats.pids_current,
+            io_read_bytes=stats.io_read_bytes,
+            io_write_bytes=stats.io_write_bytes,
+            pressure={resource: lines['some'] for resource, lines in stats.pressure.items()
+                      if 'some' in lines}
+        )
 
-        resources = ServiceResources(
+    def _resources_from_procs(self, service_name: str, unit: UnitProcesses) -> ServiceResources:
+        """Convert a unit's /proc scan into ServiceResources (no cgroup v2)
+
+        CPU% is the CPU time delta of each process since the previous scan
+        of this service; processes seen for the first time count as 0.
+        """
+        with self._state_lock:
+            rates = self._pid_rates.setdefault(service_name, RateTracker())
+        total_cpu = 0.0
+        now = time.monotonic()
+        for info in unit.processes.values():
+            # start_time tells a reused PID apart from the old process
+            rate = rates.update(info.pid, info.cpu_time, now, info.start_time)
+            if rate is not None:
+                total_cpu += rate * 100
+        rates.retain(unit.processes)
+
+        total_mem_system = psutil.virtual_memory().total
+        mem_percent = (unit.rss_bytes / total_mem_system) * 100 if total_mem_system > 0 else 0
+
+        return ServiceResources(
             cpu_percent=round(total_cpu, 1),
-            memory_mb=round(total_mem, 1),
+            memory_mb=round(unit.rss_bytes / (1024 * 1024), 1),
             memory_percent=round(mem_percent, 2),
-            process_count=process_count
+            process_count=len(unit.processes),
+            thread_count=unit.threads,
+            fd_count=unit.fds
         )
 
-        # Cache result (thread-safe)
-        with self._cache_lock:
-            self._cache[service_name] = resources
-        return resources
-
     def clear_cache(self):
         """Clear cached resource data"""
-        with self._cache_lock:
-            self._cache.clear()
\ No newline at end of file
+        self._cache.clear()
\ No newline at end of file
@@ -7,6 +7,8 @@ import json
 import logging
 from pathlib import Path
 
+from .config import find_config_file
+
 logger = logging.getLogger(__name__)
 
 
@@ -84,15 +86,9 @@ class ServiceGroupManager:
             config_path = config_dir / 'groups.json'
 
         if templates_path is None:
-            # Look for templates in config directory first, then package config
-            config_dir = Path.home() / '.config' / 'cachyos-service-manager'
-            user_templates = config_dir / 'group_templates.json'
-            if user_templates.exists():
-                templates_path = user_templates
-            else:
-                # Fallback to package config
-                package_root = Path(__file__).parent.parent.parent
-                templates_path = package_root / 'config' / 'group_templates.json'
+            # User config directory first, then the installed or source copy;
+            # None falls back to the built-in templates
+            templates_path = find_config_file('group_templates.json')
 
         self.config_path = config_path
         self.templates_path = templates_path
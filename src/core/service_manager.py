@@ -1,14 +1,23 @@
 """Complete service manager with full systemd integration."""
 
 import subprocess
-import time
 import logging
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
-from .service import ServiceState
+from .cache import ResultCache
+from .service import Service, ServiceState
+from .unit_files import UnitFileIndex
+
+# D-Bus is optional - fall back to systemctl subprocesses without it
+try:
+    from .systemd import SystemdManager
+    from .unit_store import UnitStateStore
+except ImportError:
+    SystemdManager = None
+    UnitStateStore = None
 
 logger = logging.getLogger(__name__)
 
@@ -58,91 +67,208 @@ class ServiceManager:
     DEFAULT_TIMEOUT = 5.0
     DEFAULT_ACTION_TIMEOUT = 10.0
     DEFAULT_CACHE_TTL = 2.0  # seconds
+    DEFAULT_CACHE_ENTRIES = 32
+
+    # Properties fetched for status views
+    STATUS_PROPERTIES = ['Description', 'LoadState', 'ActiveState', 'SubState', 'UnitFileState']
+    RUNTIME_PROPERTIES = ['MainPID', 'MemoryCurrent', 'CPUUsageNSec']
+
+    # ActiveStates shown by `systemctl list-units` without --all
+    RUNNING_STATES = ['active', 'activating', 'deactivating', 'reloading', 'failed']
+
+    # Unit types fetched together by get_unit_snapshot()
+    SNAPSHOT_TYPES = [ServiceType.SERVICE, ServiceType.TIMER, ServiceType.SOCKET]
+
+    # Unit file states reported as "enabled"
+    ENABLED_FILE_STATES = ['enabled', 'static']
 
-    def __init__(self, timeout: float = DEFAULT_TIMEOUT, action_timeout: float = DEFAULT_ACTION_TIMEOUT, cache_ttl: float = DEFAULT_CACHE_TTL):
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, action_timeout: float = DEFAULT_ACTION_TIMEOUT,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, use_dbus: bool = True):
         """Initialize service manager.
 
         Args:
             timeout: Timeout for list/status operations in seconds
             action_timeout: Timeout for start/stop/restart/enable/disable operations
             cache_ttl: Cache time-to-live for service listings in seconds
+            use_dbus: Query systemd over D-Bus instead of spawning systemctl
         """
-        self._cache: Dict[str, ServiceInfo] = {}
-        self._cache_timestamp = 0.0
         self._cache_ttl = cache_ttl
+        # Pre-sorted listings keyed by query parameters
+        self._results = ResultCache(cache_ttl, self.DEFAULT_CACHE_ENTRIES)
+        self._unit_files = UnitFileIndex()
         self._filter_type: Optional[ServiceType] = None
         self._timeout = timeout
         self._action_timeout = action_timeout
+        self._use_dbus = use_dbus and SystemdManager is not None
+        self._systemd = None  # connected lazily by _get_systemd()
+        self._store = None  # signal-driven unit store, see enable_live_updates()
+
+    def _get_systemd(self):
+        """Get the shared SystemdManager, connecting on first use.
+
+        Returns:
+            SystemdManager with a live manager interface, or None to use systemctl
+        """
+        if not self._use_dbus:
+            return None
+        if self._systemd is None:
+            try:
+                self._systemd = SystemdManager()
+            except Exception as e:
+                logger.warning(f"D-Bus backend unavailable, using systemctl: {e}")
+                self._use_dbus = False
+                return None
+            if not self._systemd.manager_interface:
+                self._use_dbus = False
+                return None
+        return self._systemd
+
+    def enable_live_updates(self) -> bool:
+        """Switch listings to a unit store kept fresh by systemd signals.
+
+        Once live, list_all_services() answers from memory without
+        re-listing systemd, and callers no longer need to poll.
+
+        Returns:
+            True if live updates are active
+        """
+        if self._store is not None and self._store.live:
+            return True
+        systemd = self._get_systemd()
+        if systemd is None:
+            return False
+        self._store = UnitStateStore(systemd, self._make_service_info)
+        return self._store.start()
+
+    @property
+    def live_updates(self) -> bool:
+        """Whether listings come from the live unit store."""
+        return self._store is not None and self._store.live
+
+    def add_change_listener(self, callback) -> None:
+        """Register a callback invoked with a unit name whenever it changes.
+
+        Only effective after enable_live_updates() succeeded. The callback
+        runs on the D-Bus dispatch thread and must not block.
+
+        Args:
+            callback: Function taking the changed unit name
+        """
+        if self._store is not None:
+            self._store.add_listener(callback)
 
     def list_all_services(self, service_type: Optional[ServiceType] = None,
-                          show_inactive: bool = True) -> List[ServiceInfo]:
+                          show_inactive: bool = True,
+                          states: Optional[List[str]] = None,
+                          patterns: Optional[List[str]] = None,
+                          enabled: Optional[bool] = None) -> List[ServiceInfo]:
         """List all systemd services.
 
+        Filters are pushed down to systemd where possible, so only matching
+        units are transferred and turned into ServiceInfo objects. Unfiltered
+        listings of services, timers and sockets are answered from one
+        shared get_unit_snapshot() fetch.
+
         Args:
             service_type: Filter by service type
-            show_inactive: Include inactive services
+            show_inactive: Include inactive services (ignored if states is given)
+            states: Only include units in one of these load/active/sub states
+            patterns: Only include units whose name matches one of these globs
+            enabled: Only include enabled (True) or not enabled (False) units
 
         Returns:
             List of ServiceInfo objects
         """
-        # Check cache first
-        now = time.time()
-        if now - self._cache_timestamp < self._cache_ttl and self._cache:
-            logger.debug("Returning cached service list")
-            return sorted(self._cache.values(), key=lambda s: s.display_name.lower())
+        service_type = service_type or ServiceType.SERVICE
+        if not (states or patterns or enabled is not None) and service_type in self.SNAPSHOT_TYPES:
+            return list(self.get_unit_snapshot(show_inactive)[service_type])
+
+        if not states and not show_inactive:
+            states = self.RUNNING_STATES
+        live = self.live_updates
+        key = (service_type.value, tuple(states or ()), tuple(patterns or ()), enabled)
+        services = None if live else self._results.get(key)
+        if services is None:
+            services = sorted(self._fetch_units([service_type.value], states, patterns, enabled),
+                              key=lambda s: s.display_name.lower())
+            if not live:
+                self._results.put(key, services)
+        return list(services)
+
+    def get_unit_snapshot(self, show_inactive: bool = True) -> Dict[ServiceType, List[ServiceInfo]]:
+        """Fetch services, timers and sockets at once, partitioned by type.
+
+        Units and unit file states of all SNAPSHOT_TYPES come from a single
+        listing round trip; the result is cached for cache_ttl seconds and
+        shared by list_all_services(), list_timers() and list_sockets().
 
-        try:
-            # Get list of all units
-            type_filter = service_type.value if service_type else "service"
-            cmd = ['systemctl', 'list-units', f'--type={type_filter}',
-                   '--all' if show_inactive else '', '--no-pager', '--no-legend']
-            cmd = [c for c in cmd if c]  # Remove empty strings
+        Args:
+            show_inactive: Include inactive units
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self._timeout)
+        Returns:
+            Dictionary mapping ServiceType -> sorted list of ServiceInfo
+        """
+        live = self.live_updates
+        key = ('snapshot', show_inactive)
+        snapshot = None if live else self._results.get(key)
+        if snapshot is not None:
+            logger.debug("Returning cached unit snapshot")
+            return snapshot
+
+        type_filters = [t.value for t in self.SNAPSHOT_TYPES]
+        states = None if show_inactive else self.RUNNING_STATES
+        units = self._fetch_units(type_filters, states, None, None)
+
+        snapshot = {t: [] for t in self.SNAPSHOT_TYPES}
+        for service_info in sorted(units, key=lambda s: s.display_name.lower()):
+            unit_type = ServiceType(service_info.name.rsplit('.', 1)[-1])
+            snapshot[unit_type].append(service_info)
+
+        if not live:
+            self._results.put(key, snapshot)
+        return snapshot
 
-            if result.returncode != 0:
-                logger.warning(f"systemctl list-units failed: {result.stderr}")
-                return []
+    @property
+    def cache_stats(self) -> Dict[str, float]:
+        """Get listing cache counters (hits, misses, evictions, entries, hit_rate)."""
+        return self._results.stats
 
-            # Batch fetch enabled states in ONE subprocess call instead of N+1
-            enabled_map = self._get_all_enabled_states()
+    def _fetch_units(self, type_filters: List[str], states: Optional[List[str]],
+                     patterns: Optional[List[str]], enabled: Optional[bool]) -> List[ServiceInfo]:
+        """Fetch units of the given types from the live store, D-Bus or systemctl.
 
-            services = []
-            for line in result.stdout.strip().split('\n'):
-                if not line.strip():
-                    continue
+        Args:
+            type_filters: Unit type suffixes (service, timer, ...)
+            states: Load/active/sub states to match (None = all)
+            patterns: Name globs to match (None = all)
+            enabled: Enablement filter (None = no filter)
+
+        Returns:
+            Unsorted list of ServiceInfo objects
+        """
+        if self.live_updates:
+            unit_patterns = self._unit_patterns(type_filters, patterns) if patterns else None
+            services = [info for type_filter in type_filters
+                        for info in self._store.list_units(type_filter, states, unit_patterns)]
+            if enabled is not None:
+                services = [s for s in services if s.enabled == enabled]
+            return services
+
+        try:
+            services = None
+            systemd = self._get_systemd()
+            if systemd is not None:
+                try:
+                    services = self._list_units_dbus(systemd, type_filters, states, patterns, enabled)
+                except Exception as e:
+                    logger.warning(f"D-Bus listing failed, falling back to systemctl: {e}")
+            if services is None:
+                services = self._list_units_systemctl(type_filters, states, patterns, enabled)
+            if services is None:
+                return []
 
-                parts = line.split(None, 4)
-                if len(parts) >= 4:
-                    name = parts[0]
-                    loaded = parts[1]
-                    active = parts[2]
-                    sub = parts[3]
-                    desc = parts[4] if len(parts) > 4 else ""
-
-                    # Use batch lookup instead of per-service subprocess
-                    enabled = enabled_map.get(name, False)
-
-                    # Map state
-                    state = self._map_state(active)
-
-                    service_info = ServiceInfo(
-                        name=name,
-                        display_name=name.replace('.service', ''),
-                        state=state,
-                        enabled=enabled,
-                        description=desc,
-                        loaded=loaded == "loaded",
-                        active_state=active,
-                        sub_state=sub
-                    )
-
-                    services.append(service_info)
-                    self._cache[name] = service_info
-
-            self._cache_timestamp = now
-            logger.debug(f"Loaded {len(services)} services from systemd")
-            return sorted(services, key=lambda s: s.display_name.lower())
+            logger.debug(f"Loaded {len(services)} units from systemd")
+            return services
 
         except subprocess.TimeoutExpired:
             logger.error(f"Timeout listing services after {self._timeout}s")
@@ -151,66 +277,153 @@ class ServiceManager:
             logger.error(f"Error listing services: {e}")
             return []
 
-    def get_service_status(self, service_name: str) -> Optional[ServiceInfo]:
-        """Get detailed status of a service.
+    @staticmethod
+    def _unit_patterns(type_filters: List[str], patterns: Optional[List[str]]) -> List[str]:
+        """Restrict name globs to the given unit types.
 
         Args:
-            service_name: Service name
+            type_filters: Unit type suffixes (service, timer, ...)
+            patterns: Name globs, with or without type suffix
 
         Returns:
-            ServiceInfo or None
+            Globs that all end in one of the type suffixes
         """
-        try:
-            # Ensure .service suffix
-            if not service_name.endswith('.service'):
-                service_name += '.service'
+        suffixes = [f'.{t}' for t in type_filters]
+        if not patterns:
+            return [f'*{suffix}' for suffix in suffixes]
+        unit_patterns = []
+        for pattern in patterns:
+            if pattern.endswith(tuple(suffixes)):
+                unit_patterns.append(pattern)
+            else:
+                unit_patterns.extend(f'{pattern}{suffix}' for suffix in suffixes)
+        return unit_patterns
 
-            # Get status
-            result = subprocess.run(
-                ['systemctl', 'status', service_name],
-                capture_output=True, text=True, timeout=self._timeout
-            )
+    def _list_units_dbus(self, systemd, type_filters: List[str], states: Optional[List[str]],
+                         patterns: Optional[List[str]], enabled: Optional[bool]) -> List[ServiceInfo]:
+        """List units with one ListUnitsByPatterns + ListUnitFilesByPatterns round trip.
 
-            # Get show output for more details
-            show_result = subprocess.run(
-                ['systemctl', 'show', service_name],
-                capture_output=True, text=True, timeout=self._timeout
-            )
+        Args:
+            systemd: Connected SystemdManager
+            type_filters: Unit type suffixes (service, timer, ...)
+            states: Load/active/sub states to match (None = all)
+            patterns: Name globs to match (None = all)
+            enabled: Enablement filter (None = no filter)
 
-            # Parse show output
-            show_data = {}
-            for line in show_result.stdout.split('\n'):
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    show_data[key] = value
+        Returns:
+            List of ServiceInfo objects
+        """
+        patterns = self._unit_patterns(type_filters, patterns)
+        if enabled:
+            # Resolve enabled unit files first and list exactly those units
+            file_states = systemd.list_unit_files_by_patterns(self.ENABLED_FILE_STATES, patterns)
+            if not file_states:
+                return []
+            patterns = sorted(file_states)
+        else:
+            file_states = systemd.list_unit_files_by_patterns([], patterns)
+        units = systemd.list_units_by_patterns(states or [], patterns)
+
+        services = []
+        for unit in units:
+            unit_enabled = file_states.get(unit.name) in self.ENABLED_FILE_STATES
+            if enabled is False and unit_enabled:
+                continue
+            services.append(self._make_service_info(
+                unit.name, unit.load_state, unit.active_state,
+                unit.sub_state, unit.description, unit_enabled
+            ))
+        return services
+
+    def _list_units_systemctl(self, type_filters: List[str], states: Optional[List[str]],
+                              patterns: Optional[List[str]],
+                              enabled: Optional[bool]) -> Optional[List[ServiceInfo]]:
+        """List units by parsing `systemctl list-units` output.
 
-            state = self._map_state(show_data.get('ActiveState', 'unknown'))
-            enabled = show_data.get('UnitFileState', 'disabled') in ['enabled', 'static']
+        Args:
+            type_filters: Unit type suffixes (service, timer, ...)
+            states: Load/active/sub states to match (None = all)
+            patterns: Name globs to match (None = all)
+            enabled: Enablement filter (None = no filter)
 
-            service_info = ServiceInfo(
-                name=service_name,
-                display_name=service_name.replace('.service', ''),
-                state=state,
-                enabled=enabled,
-                description=show_data.get('Description', ''),
-                loaded=show_data.get('LoadState', 'not-found') == 'loaded',
-                active_state=show_data.get('ActiveState', 'unknown'),
-                sub_state=show_data.get('SubState', 'unknown'),
-                pid=int(show_data.get('MainPID', '0')) or None,
-                memory=show_data.get('MemoryCurrent', None),
-                cpu=show_data.get('CPUUsageNSec', None)
-            )
+        Returns:
+            List of ServiceInfo objects, or None if systemctl failed
+        """
+        cmd = ['systemctl', 'list-units', f"--type={','.join(type_filters)}", '--all',
+               '--no-pager', '--no-legend']
+        if states:
+            cmd.append(f"--state={','.join(states)}")
+        if patterns:
+            cmd.extend(patterns)
 
-            self._cache[service_name] = service_info
-            return service_info
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=self._timeout)
 
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout getting status for {service_name} after {self._timeout}s")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting service status for {service_name}: {e}")
+        if result.returncode != 0:
+            logger.warning(f"systemctl list-units failed: {result.stderr}")
             return None
 
+        # Batch fetch enabled states in ONE subprocess call instead of N+1
+        enabled_map = self._get_all_enabled_states(type_filters)
+
+        services = []
+        for line in result.stdout.strip().split('\n'):
+            if not line.strip():
+                continue
+
+            # Failed units are prefixed with a status marker
+            parts = line.lstrip('● ').split(None, 4)
+            if len(parts) >= 4:
+                name = parts[0]
+                desc = parts[4] if len(parts) > 4 else ""
+                unit_enabled = enabled_map.get(name, False)
+                if enabled is not None and unit_enabled != enabled:
+                    continue
+                services.append(self._make_service_info(
+                    name, parts[1], parts[2], parts[3], desc, unit_enabled
+                ))
+        return services
+
+    def _make_service_info(self, name: str, load_state: str, active_state: str,
+                           sub_state: str, description: str, enabled: bool) -> ServiceInfo:
+        """Build a ServiceInfo from one unit listing row.
+
+        Args:
+            name: Unit name
+            load_state: Load state (loaded, not-found, masked, ...)
+            active_state: Active state (active, inactive, failed, ...)
+            sub_state: Sub state (running, dead, exited, ...)
+            description: Unit description
+            enabled: Whether the unit file is enabled
+
+        Returns:
+            ServiceInfo object
+        """
+        return ServiceInfo(
+            name=name,
+            display_name=name.rsplit('.', 1)[0],
+            state=self._map_state(active_state),
+            enabled=enabled,
+            description=description,
+            loaded=load_state == "loaded",
+            active_state=active_state,
+            sub_state=sub_state
+        )
+
+    def get_service_status(self, service_name: str) -> Optional[ServiceInfo]:
+        """Get detailed status of a service.
+
+        Args:
+            service_name: Service name
+
+        Returns:
+            ServiceInfo or None
+        """
+        # Ensure .service suffix
+        if not service_name.endswith('.service'):
+            service_name += '.service'
+        return self._get_unit_status(service_name, 'status',
+                                     self.STATUS_PROPERTIES + self.RUNTIME_PROPERTIES)
+
     def start_service(self, service_name: str) -> Tuple[bool, str]:
         """Start a service.
 
@@ -299,47 +512,9 @@ class ServiceManager:
         Returns:
             ServiceInfo or None
         """
-        try:
-            if not timer_name.endswith('.timer'):
-                timer_name += '.timer'
-
-            show_result = subprocess.run(
-                ['systemctl', 'show', timer_name],
-                capture_output=True, text=True, timeout=self._timeout
-            )
-
-            show_data = {}
-            for line in show_result.stdout.split('\n'):
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    show_data[key] = value
-
-            state = self._map_state(show_data.get('ActiveState', 'unknown'))
-            enabled = show_data.get('UnitFileState', 'disabled') in ['enabled', 'static']
-
-            service_info = ServiceInfo(
-                name=timer_name,
-                display_name=timer_name.replace('.timer', ''),
-                state=state,
-                enabled=enabled,
-                description=show_data.get('Description', ''),
-                loaded=show_data.get('LoadState', 'not-found') == 'loaded',
-                active_state=show_data.get('ActiveState', 'unknown'),
-                sub_state=show_data.get('SubState', 'unknown'),
-                pid=None,
-                memory=None,
-                cpu=None
-            )
-
-            self._cache[timer_name] = service_info
-            return service_info
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout getting timer status for {timer_name} after {self._timeout}s")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting timer status for {timer_name}: {e}")
-            return None
+        if not timer_name.endswith('.timer'):
+            timer_name += '.timer'
+        return self._get_unit_status(timer_name, 'timer status', self.STATUS_PROPERTIES)
 
     def get_socket_status(self, socket_name: str) -> Optional[ServiceInfo]:
         """Get detailed status of a socket.
@@ -350,55 +525,104 @@ class ServiceManager:
         Returns:
             ServiceInfo or None
         """
-        try:
-            if not socket_name.endswith('.socket'):
-                socket_name += '.socket'
+        if not socket_name.endswith('.socket'):
+            socket_name += '.socket'
+        return self._get_unit_status(socket_name, 'socket status', self.STATUS_PROPERTIES)
 
-            show_result = subprocess.run(
-                ['systemctl', 'show', socket_name],
-                capture_output=True, text=True, timeout=self._timeout
-            )
+    def _get_unit_status(self, unit_name: str, kind: str, properties: List[str]) -> Optional[ServiceInfo]:
+        """Build a ServiceInfo from one property fetch.
 
-            show_data = {}
-            for line in show_result.stdout.split('\n'):
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    show_data[key] = value
+        Args:
+            unit_name: Full unit name
+            kind: What is fetched, for log messages
+            properties: Unit properties to request
 
-            state = self._map_state(show_data.get('ActiveState', 'unknown'))
-            enabled = show_data.get('UnitFileState', 'disabled') in ['enabled', 'static']
+        Returns:
+            ServiceInfo or None
+        """
+        try:
+            props = self._fetch_unit_properties(unit_name, properties)
 
+            active_state = str(props.get('ActiveState', 'unknown'))
             service_info = ServiceInfo(
-                name=socket_name,
-                display_name=socket_name.replace('.socket', ''),
-                state=state,
-                enabled=enabled,
-                description=show_data.get('Description', ''),
-                loaded=show_data.get('LoadState', 'not-found') == 'loaded',
-                active_state=show_data.get('ActiveState', 'unknown'),
-                sub_state=show_data.get('SubState', 'unknown'),
-                pid=None,
-                memory=None,
-                cpu=None
+                name=unit_name,
+                display_name=unit_name.rsplit('.', 1)[0],
+                state=self._map_state(active_state),
+                enabled=props.get('UnitFileState', 'disabled') in self.ENABLED_FILE_STATES,
+                description=str(props.get('Description', '')),
+                loaded=props.get('LoadState', 'not-found') == 'loaded',
+                active_state=active_state,
+                sub_state=str(props.get('SubState', 'unknown')),
+                pid=int(props.get('MainPID') or 0) or None,
+                memory=self._format_counter(props.get('MemoryCurrent')),
+                cpu=self._format_counter(props.get('CPUUsageNSec'))
             )
 
-            self._cache[socket_name] = service_info
             return service_info
 
         except subprocess.TimeoutExpired:
-            logger.error(f"Timeout getting socket status for {socket_name} after {self._timeout}s")
+            logger.error(f"Timeout getting {kind} for {unit_name} after {self._timeout}s")
             return None
         except Exception as e:
-            logger.error(f"Error getting socket status for {socket_name}: {e}")
+            logger.error(f"Error getting {kind} for {unit_name}: {e}")
+            return None
+
+    def _fetch_unit_properties(self, unit_name: str, properties: List[str]) -> Dict[str, object]:
+        """Fetch unit properties over D-Bus, or with one `systemctl show` call.
+
+        Args:
+            unit_name: Full unit name
+            properties: Property names to fetch
+
+        Returns:
+            Dictionary mapping property name -> value (typed over D-Bus,
+            strings from systemctl)
+        """
+        systemd = self._get_systemd()
+        if systemd is not None:
+            try:
+                return systemd.get_unit_properties(unit_name, properties)
+            except Exception as e:
+                logger.warning(f"D-Bus property fetch failed for {unit_name}, using systemctl: {e}")
+
+        show_result = subprocess.run(
+            ['systemctl', 'show', unit_name, f"--property={','.join(properties)}"],
+            capture_output=True, text=True, timeout=self._timeout
+        )
+
+        show_data = {}
+        for line in show_result.stdout.split('\n'):
+            if '=' in line:
+                key, value = line.split('=', 1)
+                show_data[key] = value
+        return show_data
+
+    @staticmethod
+    def _format_counter(value) -> Optional[str]:
+        """Format a systemd resource counter, hiding unset values.
+
+        Args:
+            value: Counter as int or string; systemd reports UINT64_MAX
+                (or '[not set]' via systemctl) when accounting is off
+
+        Returns:
+            Decimal string or None
+        """
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return None
+        if number >= 2 ** 64 - 1:
             return None
+        return str(number)
 
     def list_timers(self, show_inactive: bool = True) -> List[ServiceInfo]:
         """List all systemd timers."""
-        return self.list_all_services(service_type=ServiceType.TIMER, show_inactive=show_inactive)
+        return list(self.get_unit_snapshot(show_inactive)[ServiceType.TIMER])
 
     def list_sockets(self, show_inactive: bool = True) -> List[ServiceInfo]:
         """List all systemd sockets."""
-        return self.list_all_services(service_type=ServiceType.SOCKET, show_inactive=show_inactive)
+        return list(self.get_unit_snapshot(show_inactive)[ServiceType.SOCKET])
 
     def get_next_timer_activations(self) -> List[Dict[str, str]]:
         """Get next activation times for all timers."""
@@ -467,7 +691,7 @@ class ServiceManager:
             if result.returncode == 0:
                 logger.info(f"Successfully {action}ed {service_name}")
                 # Invalidate cache after successful action
-                self._cache_timestamp = 0
+                self._results.invalidate()
                 return True, f"Successfully {action}ed {service_name}"
             else:
                 logger.warning(f"Failed to {action} {service_name}: {result.stderr}")
@@ -480,16 +704,28 @@ class ServiceManager:
             logger.error(f"Error executing {action} on {service_name}: {e}")
             return False, f"Error: {e}"
 
-    def _get_all_enabled_states(self) -> Dict[str, bool]:
-        """Batch-fetch enabled states for all services in one subprocess call.
+    def _get_all_enabled_states(self, type_filters: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Batch-fetch enabled states for all units.
+
+        Reads the in-process unit file index; only spawns one
+        `systemctl list-unit-files` if no unit directory exists.
+
+        Args:
+            type_filters: Unit type suffixes to include (default: SNAPSHOT_TYPES)
 
         Returns:
-            Dictionary mapping service name -> enabled state
+            Dictionary mapping unit name -> enabled state
         """
+        type_filters = type_filters or [t.value for t in self.SNAPSHOT_TYPES]
+        if self._unit_files.available:
+            return {name: state in self.ENABLED_FILE_STATES
+                    for name, state in self._unit_files.file_states(type_filters).items()}
+
         enabled_map: Dict[str, bool] = {}
         try:
             result = subprocess.run(
-                ['systemctl', 'list-unit-files', '--type=service', '--no-pager', '--no-legend'],
+                ['systemctl', 'list-unit-files', f"--type={','.join(type_filters)}",
+                 '--no-pager', '--no-legend'],
                 capture_output=True, text=True, timeout=self._timeout
             )
             if result.returncode == 0:
@@ -500,7 +736,7 @@ class ServiceManager:
                     if len(parts) >= 2:
                         name = parts[0]
                         state = parts[1]
-                        enabled_map[name] = state in ('enabled', 'static')
+                        enabled_map[name] = state in self.ENABLED_FILE_STATES
         except Exception as e:
             logger.warning(f"Failed to fetch enabled states: {e}")
         return enabled_map
@@ -514,12 +750,14 @@ class ServiceManager:
         Returns:
             True if enabled
         """
+        if self._unit_files.available:
+            return self._unit_files.get_state(service_name) in self.ENABLED_FILE_STATES
         try:
             result = subprocess.run(
                 ['systemctl', 'is-enabled', service_name],
                 capture_output=True, text=True, timeout=1
             )
-            return result.stdout.strip() in ['enabled', 'static']
+            return result.stdout.strip() in self.ENABLED_FILE_STATES
         except Exception:
             return False
 
@@ -596,15 +834,11 @@ class ServiceManager:
                 if not service_name.endswith('.service'):
                     service_name += '.service'
 
-                # Get unit file content
-                result = subprocess.run(
-                    ['systemctl', 'cat', service_name],
-                    capture_output=True, text=True, timeout=self._timeout
-                )
-
-                if result.returncode == 0:
+                # Served from the unit file index and its content cache
+                unit_file = self.get_unit_file(service_name)
+                if unit_file is not None:
                     backup_data['services'][service_name] = {
-                        'unit_file': result.stdout,
+                        'unit_file': unit_file,
                         'enabled': self._is_enabled(service_name)
                     }
 
@@ -678,6 +912,11 @@ class ServiceManager:
             if not service_name.endswith('.service'):
                 service_name += '.service'
 
+            if self._unit_files.available:
+                content = self._unit_files.cat(service_name)
+                if content is not None:
+                    return content
+
             result = subprocess.run(
                 ['systemctl', 'cat', service_name],
                 capture_output=True, text=True, timeout=self._timeout
@@ -688,4 +927,31 @@ class ServiceManager:
             return None
         except Exception as e:
             logger.error(f"Error getting unit file for {service_name}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_service(self, service_name: str) -> Optional[Service]:
+        """Get a service model including its unit file and preset.
+
+        Args:
+            service_name: Service name
+
+        Returns:
+            Service or None if the status could not be read
+        """
+        info = self.get_service_status(service_name)
+        if info is None:
+            return None
+        service = Service(
+            name=info.name,
+            description=info.description,
+            state=info.state,
+            sub_state=info.sub_state,
+            load_state='loaded' if info.loaded else 'not-found',
+            active_state=info.active_state,
+            enabled=info.enabled,
+            main_pid=info.pid
+        )
+        if self._unit_files.available:
+            service.unit_file = self._unit_files.fragment_path(info.name)
+            service.preset = self._unit_files.preset(info.name)
+        return service
@@ -0,0 +1,99 @@
+"""Slice hierarchy with resource usage rolled up from its units."""
+
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .top import UnitUsage
+
+ROOT_SLICE = '-.slice'
+
+
+@dataclass
+class SliceNode:
+    """A slice (or a unit leaf) of the cgroup tree.
+
+    For units the totals are the unit's own usage; for slices they are
+    the sums over every unit below.
+    """
+    name: str
+    cgroup: str
+    usage: Optional[UnitUsage] = None  # set for unit leaves
+    children: List['SliceNode'] = field(default_factory=list)
+    cpu_percent: float = 0.0
+    memory_bytes: int = 0
+    tasks: int = 0
+    io_read_rate: float = 0.0  # bytes/s
+    io_write_rate: float = 0.0  # bytes/s
+    unit_count: int = 0
+
+    @property
+    def is_slice(self) -> bool:
+        """Whether this node is a slice rather than a unit."""
+        return self.usage is None
+
+    @property
+    def io_rate(self) -> float:
+        """Read plus write bytes/s."""
+        return self.io_read_rate + self.io_write_rate
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, 'SliceNode']]:
+        """Iterate (depth, node) pairs in pre-order."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def find(self, name: str) -> Optional['SliceNode']:
+        """Find a node by slice or unit name."""
+        return next((node for _, node in self.walk() if node.name == name), None)
+
+
+def build_slice_tree(usages: Iterable[UnitUsage]) -> SliceNode:
+    """Arrange unit usage by cgroup path and roll it up into the slices.
+
+    Slices are created from the unit cgroup paths, then one bottom-up
+    (post-order) walk sums every node's children into it.
+
+    Args:
+        usages: Unit rows, e.g. from TopSampler.ranking()
+
+    Returns:
+        Root slice node ("-.slice")
+    """
+    root = SliceNode(ROOT_SLICE, '/')
+    slices = {'': root}
+    for usage in usages:
+        parent = root
+        path = ''
+        for part in usage.cgroup.strip('/').split('/')[:-1]:
+            path = f'{path}/{part}'
+            node = slices.get(path)
+            if node is None:
+                node = SliceNode(part, path)
+                slices[path] = node
+                parent.children.append(node)
+            parent = node
+        parent.children.append(SliceNode(
+            usage.unit, usage.cgroup, usage=usage,
+            cpu_percent=usage.cpu_percent,
+            memory_bytes=usage.memory_bytes,
+            tasks=usage.tasks,
+            io_read_rate=usage.io_read_rate,
+            io_write_rate=usage.io_write_rate,
+            unit_count=1,
+        ))
+    _roll_up(root)
+    return root
+
+
+def _roll_up(node: SliceNode) -> None:
+    """Sum the children's totals into each slice, deepest first."""
+    if not node.is_slice:
+        return
+    for child in node.children:
+        _roll_up(child)
+        node.cpu_percent += child.cpu_percent
+        node.memory_bytes += child.memory_bytes
+        node.tasks += child.tasks
+        node.io_read_rate += child.io_read_rate
+        node.io_write_rate += child.io_write_rate
+        node.unit_count += child.unit_count
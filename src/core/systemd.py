@@ -1,13 +1,128 @@
 """systemd D-Bus API wrapper."""
 
-from typing import List, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 import asyncio
+import functools
+import threading
 import dbus
 import dbus.exceptions
 import dbus.service
 import dbus.mainloop.glib
 
 
+SYSTEMD_BUS_NAME = 'org.freedesktop.systemd1'
+SYSTEMD_OBJECT_PATH = '/org/freedesktop/systemd1'
+MANAGER_INTERFACE = 'org.freedesktop.systemd1.Manager'
+UNIT_INTERFACE = 'org.freedesktop.systemd1.Unit'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+
+def to_python(value: Any) -> Any:
+    """Convert a dbus-python value into the equivalent plain Python value.
+
+    Args:
+        value: Value returned by a D-Bus call
+
+    Returns:
+        bool, int, float, str, list, tuple or dict
+    """
+    if isinstance(value, dbus.Boolean):
+        return bool(value)
+    if isinstance(value, (dbus.Byte, dbus.Int16, dbus.UInt16, dbus.Int32, dbus.UInt32,
+                          dbus.Int64, dbus.UInt64)):
+        return int(value)
+    if isinstance(value, dbus.Double):
+        return float(value)
+    if isinstance(value, (dbus.String, dbus.ObjectPath, dbus.Signature)):
+        return str(value)
+    if isinstance(value, dbus.Struct):
+        return tuple(to_python(v) for v in value)
+    if isinstance(value, dbus.Array):
+        return [to_python(v) for v in value]
+    if isinstance(value, dbus.Dictionary):
+        return {to_python(k): to_python(v) for k, v in value.items()}
+    return value
+
+
+class UnitEntry(NamedTuple):
+    """One row of a systemd ListUnits/ListUnitsByPatterns reply."""
+    name: str
+    description: str
+    load_state: str
+    active_state: str
+    sub_state: str
+    followed: str
+    path: str
+    job_id: int
+    job_type: str
+    job_path: str
+
+
+class UnitProxyCache:
+    """Bounded LRU cache mapping unit name -> (object path, Properties proxy).
+
+    One instance lives on each SystemdManager and is shared by everything
+    using that manager (ServiceManager, MonitoringEngine, UnitStateStore),
+    so a unit is resolved with LoadUnit once instead of on every call.
+    Entries are dropped on UnitRemoved, when UnitNew reports a different
+    object path for a cached name, or when a proxy turns out to be stale.
+    """
+
+    DEFAULT_MAX_ENTRIES = 512
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached units
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Tuple[str, Any]]:
+        """Get the cached (path, proxy) for a unit and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+            return entry
+
+    def put(self, name: str, path: str, proxy: Any) -> None:
+        """Cache a unit's path and proxy, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[name] = (path, proxy)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        """Drop a unit from the cache."""
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def on_unit_new(self, name: str, path: str) -> None:
+        """Drop a cached unit whose object path changed."""
+        with self._lock:
+            entry = self._entries.get(str(name))
+            if entry is not None and entry[0] != str(path):
+                del self._entries[str(name)]
+
+    def on_unit_removed(self, name: str, path: str) -> None:
+        """Drop a unit that systemd unloaded."""
+        self.invalidate(str(name))
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class SystemdManager:
     """Central interface to systemd via D-Bus.
     
@@ -16,10 +131,31 @@ class SystemdManager:
     - Service lifecycle management
     - Unit file manipulation
     - Status monitoring
+
+    The async methods never block the event loop: D-Bus calls run on a
+    bounded worker pool sharing one thread-safe connection, so concurrent
+    callers (e.g. asyncio.gather over many units) overlap their round
+    trips. Every call carries a D-Bus timeout and an asyncio deadline.
     """
+
+    DEFAULT_CALL_TIMEOUT = 5.0  # seconds
+    DEFAULT_MAX_CONCURRENT_CALLS = 16
     
-    def __init__(self):
-        """Initialize SystemdManager."""
+    def __init__(self, call_timeout: float = DEFAULT_CALL_TIMEOUT,
+                 max_concurrent_calls: int = DEFAULT_MAX_CONCURRENT_CALLS,
+                 max_cached_units: int = UnitProxyCache.DEFAULT_MAX_ENTRIES):
+        """Initialize SystemdManager.
+
+        Args:
+            call_timeout: Default timeout for a single D-Bus call in seconds
+            max_concurrent_calls: Maximum number of D-Bus calls in flight
+            max_cached_units: Size bound of the unit proxy cache
+        """
+        self._call_timeout = call_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_calls,
+                                            thread_name_prefix='systemd-dbus')
+        self.unit_cache = UnitProxyCache(max_cached_units)
+        self._watching_units = False
         self._initialize_dbus()
     
     def _initialize_dbus(self):
@@ -32,10 +168,10 @@ class SystemdManager:
             self.bus = dbus.SystemBus()
             
             # Get the systemd manager object
-            self.systemd_object = self.bus.get_object('org.freedesktop.systemd1', '/org/freedesktop/systemd1')
+            self.systemd_object = self.bus.get_object(SYSTEMD_BUS_NAME, SYSTEMD_OBJECT_PATH)
             
             # Get the manager interface
-            self.manager_interface = dbus.Interface(self.systemd_object, 'org.freedesktop.systemd1.Manager')
+            self.manager_interface = dbus.Interface(self.systemd_object, MANAGER_INTERFACE)
             
         except Exception as e:
             print(f"Failed to initialize D-Bus connection: {e}")
@@ -43,35 +179,241 @@ class SystemdManager:
             self.bus = None
             self.systemd_object = None
             self.manager_interface = None
+
+    def list_units_by_patterns(self, states: Optional[List[str]] = None,
+                               patterns: Optional[List[str]] = None) -> List[UnitEntry]:
+        """List loaded units matching the given states and glob patterns.
+
+        This is a blocking D-Bus call; systemd does the filtering so only
+        matching units are transferred.
+
+        Args:
+            states: Load/active/sub states to match (empty = all)
+            patterns: Unit name glob patterns (empty = all)
+
+        Returns:
+            List of UnitEntry tuples
+        """
+        if not self.manager_interface:
+            return []
+
+        units = self.manager_interface.ListUnitsByPatterns(
+            dbus.Array(states or [], signature='s'),
+            dbus.Array(patterns or [], signature='s'),
+            timeout=self._call_timeout
+        )
+        return [
+            UnitEntry(str(u[0]), str(u[1]), str(u[2]), str(u[3]), str(u[4]),
+                      str(u[5]), str(u[6]), int(u[7]), str(u[8]), str(u[9]))
+            for u in units
+        ]
+
+    def watch_unit_changes(self) -> bool:
+        """Keep the unit proxy cache coherent via UnitNew/UnitRemoved signals.
+
+        Only call this when a GLib main loop dispatches D-Bus signals;
+        otherwise unread signals pile up on the connection.
+
+        Returns:
+            True if the signal receivers are installed
+        """
+        if self._watching_units:
+            return True
+        if not self.manager_interface:
+            return False
+        try:
+            self.manager_interface.Subscribe()
+            for signal, handler in (('UnitNew', self.unit_cache.on_unit_new),
+                                    ('UnitRemoved', self.unit_cache.on_unit_removed)):
+                self.bus.add_signal_receiver(
+                    handler, signal_name=signal, dbus_interface=MANAGER_INTERFACE,
+                    bus_name=SYSTEMD_BUS_NAME, path=SYSTEMD_OBJECT_PATH
+                )
+            self._watching_units = True
+        except Exception as e:
+            print(f"Failed to watch unit changes: {e}")
+        return self._watching_units
+
+    def get_unit_path(self, name: str) -> Optional[str]:
+        """Get a unit's object path (cached).
+
+        Args:
+            name: Full unit name (e.g. 'sshd.service')
+
+        Returns:
+            D-Bus object path, or None without a D-Bus connection
+        """
+        entry = self._resolve_unit(name)
+        return entry[0] if entry else None
+
+    def get_unit_properties_proxy(self, name: str) -> Optional[dbus.Interface]:
+        """Get the cached org.freedesktop.DBus.Properties proxy for a unit.
+
+        Uses LoadUnit, so units that are not currently loaded resolve too
+        (their LoadState reads 'not-found' if no unit file exists).
+
+        Args:
+            name: Full unit name (e.g. 'sshd.service')
+
+        Returns:
+            Properties interface proxy, or None without a D-Bus connection
+        """
+        entry = self._resolve_unit(name)
+        return entry[1] if entry else None
+
+    def _resolve_unit(self, name: str) -> Optional[Tuple[str, Any]]:
+        """Look up (path, proxy) in the unit cache, resolving it on a miss."""
+        if not self.manager_interface:
+            return None
+        entry = self.unit_cache.get(name)
+        if entry is None:
+            unit_path = str(self.manager_interface.LoadUnit(name, timeout=self._call_timeout))
+            unit_object = self.bus.get_object(SYSTEMD_BUS_NAME, unit_path)
+            entry = (unit_path, dbus.Interface(unit_object, PROPERTIES_INTERFACE))
+            self.unit_cache.put(name, *entry)
+        return entry
+
+    def get_unit_properties(self, name: str, properties: List[str],
+                            retry: bool = True) -> Dict[str, Any]:
+        """Fetch unit properties in a single GetAll round trip (blocking).
+
+        Args:
+            name: Full unit name (e.g. 'sshd.service')
+            properties: Property names to return, from any unit interface
+            retry: Re-resolve the unit once if its cached proxy is stale
+
+        Returns:
+            Dictionary mapping property name -> typed Python value
+        """
+        proxy = self.get_unit_properties_proxy(name)
+        if proxy is None:
+            return {}
+
+        try:
+            # An empty interface name returns the properties of every interface
+            values = proxy.GetAll('', timeout=self._call_timeout)
+        except dbus.exceptions.DBusException as e:
+            if retry and e.get_dbus_name() == 'org.freedesktop.DBus.Error.UnknownObject':
+                # Stale cached path - resolve the unit again
+                self.unit_cache.invalidate(name)
+                return self.get_unit_properties(name, properties, retry=False)
+
+            unit_type = name.rsplit('.', 1)[-1].capitalize()
+            values = dict(proxy.GetAll(UNIT_INTERFACE, timeout=self._call_timeout))
+            try:
+                values.update(proxy.GetAll(f'org.freedesktop.systemd1.{unit_type}',
+                                           timeout=self._call_timeout))
+            except dbus.exceptions.DBusException:
+                pass  # unit type without its own interface
+
+        return {key: to_python(values[key]) for key in properties if key in values}
+
+    def list_unit_files_by_patterns(self, states: Optional[List[str]] = None,
+                                    patterns: Optional[List[str]] = None) -> Dict[str, str]:
+        """List unit files and their enablement state (blocking D-Bus call).
+
+        Args:
+            states: Unit file states to match (empty = all)
+            patterns: Unit name glob patterns (empty = all)
+
+        Returns:
+            Dictionary mapping unit name -> unit file state
+        """
+        if not self.manager_interface:
+            return {}
+
+        files = self.manager_interface.ListUnitFilesByPatterns(
+            dbus.Array(states or [], signature='s'),
+            dbus.Array(patterns or [], signature='s'),
+            timeout=self._call_timeout
+        )
+        return {str(path).rsplit('/', 1)[-1]: str(state) for path, state in files}
     
+    def submit_blocking(self, func: Callable, *args) -> Future:
+        """Queue a blocking D-Bus call on the worker pool without waiting.
+
+        For callers without an asyncio loop, e.g. GLib signal handlers.
+
+        Args:
+            func: Blocking callable
+            *args: Arguments for func
+
+        Returns:
+            concurrent.futures.Future with the result of func
+        """
+        return self._executor.submit(func, *args)
+
+    async def run_blocking(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Run a blocking D-Bus call on the worker pool.
+
+        Args:
+            func: Blocking callable
+            *args: Arguments for func
+            timeout: Deadline in seconds (defaults to the call timeout)
+
+        Returns:
+            Result of func
+
+        Raises:
+            asyncio.TimeoutError: If the call did not finish in time
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, functools.partial(func, *args)),
+            timeout or self._call_timeout
+        )
+
+    async def _call_manager(self, method: str, *args, timeout: Optional[float] = None) -> Any:
+        """Call a Manager method without blocking the event loop.
+
+        Args:
+            method: Manager method name (e.g. 'StartUnit')
+            *args: Method arguments
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Method reply
+        """
+        timeout = timeout or self._call_timeout
+        dbus_method = getattr(self.manager_interface, method)
+        return await self.run_blocking(functools.partial(dbus_method, timeout=timeout), *args,
+                               timeout=timeout)
+
+    async def get_unit_properties_async(self, name: str, properties: List[str],
+                                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Async variant of get_unit_properties().
+
+        Args:
+            name: Full unit name
+            properties: Property names to return
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Dictionary mapping property name -> typed Python value
+        """
+        return await self.run_blocking(self.get_unit_properties, name, properties, timeout=timeout)
+
     async def list_services(self) -> List['Service']:
         """List all services."""
         if not self.manager_interface:
             return []
         
         try:
-            # Get list of all units
-            units = self.manager_interface.ListUnits()
+            units = await self.run_blocking(self.list_units_by_patterns, [], ['*.service'])
             
-            # Filter for service units and convert to Service objects
-            services = []
-            for unit in units:
-                unit_name, unit_description, load_state, active_state, sub_state, \
-                followed_unit, unit_object_path, job_id, job_type, job_object_path = unit
-                
-                if unit_name.endswith('.service'):
-                    service = Service(
-                        name=unit_name,
-                        description=unit_description or "",
-                        load_state=load_state,
-                        active_state=active_state,
-                        sub_state=sub_state,
-                        can_start=False,  # Will be set when getting specific service
-                        can_stop=False    # Will be set when getting specific service
-                    )
-                    services.append(service)
-            
-            return services
+            # can_start/can_stop are only fetched by get_service()
+            return [
+                Service(
+                    name=unit.name,
+                    description=unit.description,
+                    load_state=unit.load_state,
+                    active_state=unit.active_state,
+                    sub_state=unit.sub_state,
+                    can_start=False,
+                    can_stop=False
+                )
+                for unit in units
+            ]
         except Exception as e:
             print(f"Error listing services: {e}")
             return []
@@ -86,37 +428,18 @@ class SystemdManager:
             if not name.endswith('.service'):
                 name = f"{name}.service"
             
-            # Get the unit
-            unit_path = self.manager_interface.GetUnit(name)
-            
-            # Get the unit object
-            unit_object = self.bus.get_object('org.freedesktop.systemd1', unit_path)
-            
-            # Get properties interface
-            props_interface = dbus.Interface(unit_object, 'org.freedesktop.DBus.Properties')
-            
-            # Get service properties
-            description = props_interface.Get('org.freedesktop.systemd1.Unit', 'Description')
-            load_state = props_interface.Get('org.freedesktop.systemd1.Unit', 'LoadState')
-            active_state = props_interface.Get('org.freedesktop.systemd1.Unit', 'ActiveState')
-            sub_state = props_interface.Get('org.freedesktop.systemd1.Unit', 'SubState')
-            try:
-                can_start = props_interface.Get('org.freedesktop.systemd1.Service', 'CanStart')
-            except Exception:
-                can_start = False
-            try:
-                can_stop = props_interface.Get('org.freedesktop.systemd1.Service', 'CanStop')
-            except Exception:
-                can_stop = False
+            props = await self.get_unit_properties_async(
+                name, ['Description', 'LoadState', 'ActiveState', 'SubState', 'CanStart', 'CanStop']
+            )
             
             return Service(
                 name=name,
-                description=str(description),
-                load_state=str(load_state),
-                active_state=str(active_state),
-                sub_state=str(sub_state),
-                can_start=bool(can_start),
-                can_stop=bool(can_stop)
+                description=props.get('Description', ''),
+                load_state=props.get('LoadState', ''),
+                active_state=props.get('ActiveState', ''),
+                sub_state=props.get('SubState', ''),
+                can_start=bool(props.get('CanStart', False)),
+                can_stop=bool(props.get('CanStop', False))
             )
         except Exception as e:
             print(f"Error getting service {name}: {e}")
@@ -124,74 +447,35 @@ class SystemdManager:
     
     async def start_service(self, name: str) -> bool:
         """Start a service."""
-        if not self.manager_interface:
-            return False
-        
-        try:
-            # Ensure the name ends with .service
-            if not name.endswith('.service'):
-                name = f"{name}.service"
-            
-            # Start the service
-            self.manager_interface.StartUnit(name, 'replace')
-            return True
-        except Exception as e:
-            print(f"Error starting service {name}: {e}")
-            return False
+        return await self._unit_action('StartUnit', name, 'starting')
     
     async def stop_service(self, name: str) -> bool:
         """Stop a service."""
-        if not self.manager_interface:
-            return False
-        
-        try:
-            # Ensure the name ends with .service
-            if not name.endswith('.service'):
-                name = f"{name}.service"
-            
-            # Stop the service
-            self.manager_interface.StopUnit(name, 'replace')
-            return True
-        except Exception as e:
-            print(f"Error stopping service {name}: {e}")
-            return False
+        return await self._unit_action('StopUnit', name, 'stopping')
     
     async def restart_service(self, name: str) -> bool:
         """Restart a service."""
-        if not self.manager_interface:
-            return False
-        
-        try:
-            # Ensure the name ends with .service
-            if not name.endswith('.service'):
-                name = f"{name}.service"
-            
-            # Restart the service
-            self.manager_interface.RestartUnit(name, 'replace')
-            return True
-        except Exception as e:
-            print(f"Error restarting service {name}: {e}")
-            return False
+        return await self._unit_action('RestartUnit', name, 'restarting')
     
     async def enable_service(self, name: str) -> bool:
         """Enable a service (autostart)."""
-        if not self.manager_interface:
-            return False
-        
-        try:
-            # Ensure the name ends with .service
-            if not name.endswith('.service'):
-                name = f"{name}.service"
-            
-            # Enable the service
-            self.manager_interface.EnableUnitFiles([name], False, True)
-            return True
-        except Exception as e:
-            print(f"Error enabling service {name}: {e}")
-            return False
+        return await self._unit_action('EnableUnitFiles', name, 'enabling')
     
     async def disable_service(self, name: str) -> bool:
         """Disable a service (no autostart)."""
+        return await self._unit_action('DisableUnitFiles', name, 'disabling')
+
+    async def _unit_action(self, method: str, name: str, verb: str) -> bool:
+        """Run a lifecycle or enablement Manager method on a service.
+
+        Args:
+            method: StartUnit, StopUnit, RestartUnit, EnableUnitFiles or DisableUnitFiles
+            name: Service name
+            verb: Action description for error messages
+
+        Returns:
+            True on success
+        """
         if not self.manager_interface:
             return False
         
@@ -200,13 +484,21 @@ class SystemdManager:
             if not name.endswith('.service'):
                 name = f"{name}.service"
             
-            # Disable the service
-            self.manager_interface.DisableUnitFiles([name])
+            if method == 'EnableUnitFiles':
+                await self._call_manager(method, [name], False, True)
+            elif method == 'DisableUnitFiles':
+                await self._call_manager(method, [name], False)
+            else:
+                await self._call_manager(method, name, 'replace')
             return True
         except Exception as e:
-            print(f"Error disabling service {name}: {e}")
+            print(f"Error {verb} service {name}: {e}")
             return False
 
+    def close(self) -> None:
+        """Shut down the D-Bus worker pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 class Service:
     """Represents a systemd service."""
@@ -0,0 +1,370 @@
+"""Compact columnar ring buffers for metric histories."""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+def summarize(segments: List[memoryview],
+              percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+    """Aggregate the values of column segments.
+
+    min/max/percentiles come from one C-level sort of the segments and
+    the mean from math.fsum; percentiles interpolate linearly between the
+    closest ranks.
+
+    Args:
+        segments: memoryviews as returned by RingBuffer.segments()
+        percentiles: Percentiles to compute (0-100)
+
+    Returns:
+        Dictionary with count, min, max, mean and p<N> keys (empty if no samples)
+    """
+    values = sorted(chain.from_iterable(segments))
+    count = len(values)
+    if not count:
+        return {}
+    summary = {
+        'count': count,
+        'min': values[0],
+        'max': values[-1],
+        'mean': math.fsum(values) / count,
+    }
+    for pct in percentiles:
+        rank = (count - 1) * pct / 100
+        low = math.floor(rank)
+        high = math.ceil(rank)
+        summary[f'p{pct:g}'] = values[low] + (values[high] - values[low]) * (rank - low)
+    return summary
+
+
+class ColumnView(Sequence):
+    """Read-only chronological view of one ring buffer column.
+
+    Indexing maps straight into the underlying array, so no values are
+    copied; the view reflects later appends (and reallocations).
+    """
+
+    def __init__(self, buffer: 'RingBuffer', column: int):
+        self._buffer = buffer
+        self._column = column
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self._buffer)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('ring buffer index out of range')
+        data = self._buffer._columns[self._column]
+        if data is None:
+            return 0  # lazy column never written
+        return data[self._buffer._physical(index)]
+
+
+class RingBuffer:
+    """Fixed-capacity time series with one preallocated array per column.
+
+    A sample costs one slot in each column (8 bytes for 'd'/'q' columns)
+    instead of a Python object per value; once full, the oldest sample is
+    overwritten. Readers get zero-copy memoryview segments or
+    chronological ColumnViews.
+
+    Lazy columns cost nothing until the first non-zero value arrives,
+    e.g. metrics that are only collected when a feature is turned on.
+    With initial, the arrays start smaller and double as samples arrive,
+    so a series that never fills up never costs its full capacity.
+    """
+
+    def __init__(self, capacity: int, fields: List[Tuple[str, str]],
+                 columns: Optional[List[Sequence]] = None, lazy: Iterable[str] = (),
+                 initial: Optional[int] = None):
+        """Allocate the buffer.
+
+        Args:
+            capacity: Maximum number of samples kept
+            fields: (name, array typecode) of each value column; a 'd'
+                timestamp column is always added first
+            columns: Writable sequences of capacity items to use instead of
+                new arrays (timestamp first), e.g. memoryviews of a mapped file
+            lazy: Fields whose array is only allocated once a non-zero value
+                is appended; they read as 0 until then (ignored with columns)
+            initial: Slots allocated up front (default: capacity); ignored
+                with columns
+        """
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self.fields = ('timestamp',) + tuple(name for name, _ in fields)
+        self._typecodes = ('d',) + tuple(typecode for _, typecode in fields)
+        if columns is not None:
+            self._columns = list(columns)
+            self._allocated = capacity
+        else:
+            lazy = set(lazy)
+            self._allocated = capacity if initial is None else max(1, min(initial, capacity))
+            self._columns = [array('d', bytes(8 * self._allocated))]
+            for name, typecode in fields:
+                self._columns.append(None if name in lazy
+                                     else array(typecode, [0]) * self._allocated)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._head = 0  # slot of the next write
+        self._size = 0
+
+    def append(self, timestamp: float, *values) -> None:
+        """Append one sample, overwriting the oldest one when full.
+
+        Args:
+            timestamp: Sample time
+            *values: One value per field, in field order
+        """
+        if len(values) != len(self._columns) - 1:
+            raise ValueError(f'expected {len(self._columns) - 1} values, got {len(values)}')
+        head = self._head
+        if head == self._allocated:
+            self._grow()
+        columns = self._columns
+        columns[0][head] = timestamp
+        for i, value in enumerate(values, 1):
+            column = columns[i]
+            if column is None:
+                if not value:
+                    continue
+                column = columns[i] = array(self._typecodes[i], [0]) * self._allocated
+            column[head] = value
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column arrays."""
+        return sum(c.itemsize * len(c) for c in self._columns if c is not None)
+
+    def column(self, name: str) -> ColumnView:
+        """Get a chronological view of one column (oldest first)."""
+        return ColumnView(self, self._index[name])
+
+    def segments(self, name: str, start: int = 0, stop: Optional[int] = None) -> List[memoryview]:
+        """Get zero-copy views of a column range, oldest first.
+
+        The range may wrap around the end of the ring, so up to two
+        memoryviews are returned; concatenated they hold samples
+        [start, stop) in chronological order.
+
+        Args:
+            name: Field name
+            start: First chronological index
+            stop: End chronological index (default: all samples)
+
+        Returns:
+            List of zero, one or two memoryviews
+        """
+        start, stop, _ = slice(start, stop).indices(self._size)
+        if start >= stop:
+            return []
+        index = self._index[name]
+        if self._columns[index] is None:
+            return [memoryview(array(self._typecodes[index], [0]) * (stop - start))]
+        view = memoryview(self._columns[index])
+        first = self._physical(start)
+        last = self._physical(stop - 1) + 1
+        if first < last:
+            return [view[first:last]]
+        return [view[first:], view[:last]]
+
+    def window(self, since: float, until: Optional[float] = None) -> Tuple[int, int]:
+        """Find the samples with since <= timestamp <= until by binary search.
+
+        Timestamps are expected to be appended in non-decreasing order.
+
+        Args:
+            since: Earliest timestamp
+            until: Latest timestamp (default: no upper bound)
+
+        Returns:
+            (start, stop) chronological index range
+        """
+        timestamps = self.column('timestamp')
+        start = bisect_left(timestamps, since)
+        stop = self._size if until is None else bisect_right(timestamps, until, start)
+        return start, stop
+
+    def aggregate(self, name: str, start: int = 0, stop: Optional[int] = None,
+                  percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Summarize a column range, see summarize()."""
+        return summarize(self.segments(name, start, stop), percentiles)
+
+    def row(self, index: int) -> Tuple:
+        """Get one sample as a tuple (timestamp, *values)."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('ring buffer index out of range')
+        slot = self._physical(index)
+        return tuple(0 if column is None else column[slot] for column in self._columns)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple]:
+        """Iterate samples [start, stop) as tuples, oldest first."""
+        start, stop, _ = slice(start, stop).indices(self._size)
+        for index in range(start, stop):
+            slot = self._physical(index)
+            yield tuple(0 if column is None else column[slot] for column in self._columns)
+
+    def clear(self) -> None:
+        """Drop all samples (the arrays stay allocated)."""
+        self._head = 0
+        self._size = 0
+
+    def _grow(self) -> None:
+        """Double the allocated slots, up to capacity.
+
+        Only happens before the ring first wraps, so slots keep their
+        positions. New arrays are built instead of resizing in place,
+        which would fail while a caller holds a segment.
+        """
+        size = min(self.capacity, self._allocated * 2)
+        for i, column in enumerate(self._columns):
+            if column is not None:
+                self._columns[i] = column + array(self._typecodes[i], [0]) * (size - self._allocated)
+        self._allocated = size
+
+    def _physical(self, index: int) -> int:
+        """Map a chronological index to an array slot."""
+        return (self._head - self._size + index) % self.capacity
+
+
+ROLLUP_AGGREGATES = ('min', 'max', 'avg', 'last')
+
+
+@dataclass
+class Bucket:
+    """Aggregated samples of one time bucket."""
+    timestamp: float  # bucket start
+    count: int
+    min: Dict[str, float]
+    max: Dict[str, float]
+    avg: Dict[str, float]
+    last: Dict[str, float]
+
+
+class RollupTier:
+    """Downsampled series keeping min/max/avg/last per fixed-width bucket.
+
+    Samples are folded into the open bucket as they arrive; when a sample
+    falls into a later bucket, the open one is appended to a RingBuffer
+    holding up to retention / resolution buckets. Its arrays grow with the
+    closed buckets, so memory is bounded but only paid for spans that
+    were actually recorded.
+    """
+
+    INITIAL_BUCKETS = 16  # allocated up front, doubled as buckets close
+
+    def __init__(self, resolution: float, retention: float, fields: List[str],
+                 lazy: Iterable[str] = ()):
+        """Allocate the tier.
+
+        Args:
+            resolution: Bucket width in seconds
+            retention: Seconds of buckets kept
+            fields: Names of the aggregated values
+            lazy: Fields whose bucket arrays are allocated on the first
+                non-zero value (see RingBuffer)
+        """
+        self.resolution = resolution
+        self.retention = retention
+        self.fields = list(fields)
+        columns = [('count', 'I')] + [(f'{name}.{agg}', 'f')
+                                      for agg in ROLLUP_AGGREGATES for name in self.fields]
+        lazy = set(lazy)
+        self._buffer = RingBuffer(max(1, math.ceil(retention / resolution)), columns,
+                                  lazy=[f'{name}.{agg}' for agg in ROLLUP_AGGREGATES
+                                        for name in self.fields if name in lazy],
+                                  initial=self.INITIAL_BUCKETS)
+        self._open: Optional[float] = None  # start of the open bucket
+        self._count = 0
+        self._min: List[float] = []
+        self._max: List[float] = []
+        self._sum: List[float] = []
+        self._last: List[float] = []
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the bucket arrays."""
+        return self._buffer.nbytes
+
+    def add(self, timestamp: float, values: List[float]) -> None:
+        """Fold one sample into its bucket.
+
+        Args:
+            timestamp: Sample time
+            values: One value per field, in field order
+        """
+        start = timestamp - timestamp % self.resolution
+        if self._open is not None and start != self._open:
+            if start > self._open:
+                self._flush()
+            else:
+                start = self._open  # late sample: keep it in the open bucket
+        if self._open is None:
+            self._open = start
+            self._count = 0
+            self._min = list(values)
+            self._max = list(values)
+            self._sum = [0.0] * len(values)
+        self._count += 1
+        for i, value in enumerate(values):
+            if value < self._min[i]:
+                self._min[i] = value
+            elif value > self._max[i]:
+                self._max[i] = value
+            self._sum[i] += value
+        self._last = list(values)
+
+    def buckets(self, since: float, until: Optional[float] = None) -> List[Bucket]:
+        """Get the buckets overlapping [since, until], including the open one.
+
+        Args:
+            since: Earliest time
+            until: Latest time (default: no upper bound)
+
+        Returns:
+            Buckets, oldest first
+        """
+        start, stop = self._buffer.window(since - self.resolution, until)
+        buckets = [self._to_bucket(row) for row in self._buffer.rows(start, stop)
+                   if row[0] + self.resolution > since]
+        if (self._open is not None and self._open + self.resolution > since
+                and (until is None or self._open <= until)):
+            count = self._count
+            buckets.append(self._to_bucket(
+                (self._open, count, *self._min, *self._max,
+                 *(total / count for total in self._sum), *self._last)))
+        return buckets
+
+    def _flush(self) -> None:
+        """Append the open bucket to the ring buffer."""
+        count = self._count
+        self._buffer.append(self._open, count, *self._min, *self._max,
+                            *(total / count for total in self._sum), *self._last)
+        self._open = None
+
+    def _to_bucket(self, row: Tuple) -> Bucket:
+        """Build a Bucket from a (timestamp, count, aggregates...) row."""
+        n = len(self.fields)
+        aggregates = [dict(zip(self.fields, row[2 + i * n:2 + (i + 1) * n]))
+                      for i in range(len(ROLLUP_AGGREGATES))]
+        return Bucket(row[0], row[1], *aggregates)
@@ -0,0 +1,516 @@
+"""In-process index of systemd unit files, drop-ins, enablement links and presets."""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (entry name, is directory, symlink target or None)
+_Listing = List[Tuple[str, bool, Optional[str]]]
+
+# ((path, mtime_ns, inode, size), ...) of a fragment and its drop-ins
+_ContentKey = Tuple[Tuple[str, int, int, int], ...]
+
+
+class UnitContentCache:
+    """Size-bounded LRU cache of rendered unit file text.
+
+    Keys carry the path, mtime, inode and size of every file that went
+    into the text, so an edited, replaced or newly added drop-in yields a
+    new key and stale text is never returned.
+    """
+
+    DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Upper bound on the total size of cached text
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[_ContentKey, str]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(paths: List[Path]) -> Optional[_ContentKey]:
+        """Build the cache key of a list of files (None if one is missing)."""
+        key = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            key.append((str(path), st.st_mtime_ns, st.st_ino, st.st_size))
+        return tuple(key)
+
+    def get(self, key: _ContentKey) -> Optional[str]:
+        """Get cached text and mark it most recently used."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: _ContentKey, text: str) -> None:
+        """Cache text, evicting least recently used entries beyond max_bytes."""
+        size = len(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = text
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total length of cached text."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UnitFileIndex:
+    """Index of the system unit search path, refreshed incrementally.
+
+    Every directory of the search path (and its ``.wants/``, ``.requires/``,
+    ``.upholds/`` and ``.d/`` subdirectories) is listed once and then only
+    re-listed when its mtime changes, so a refresh costs one stat() per
+    directory. Answers the questions `systemctl list-unit-files`,
+    `is-enabled` and `cat` would, without spawning systemctl.
+
+    Units are enabled by symlinks in the ``.wants/``, ``.requires/`` and
+    ``.upholds/`` directories or by an ``Alias=`` symlink under /etc or
+    /run. Units from the generator and transient directories report
+    ``generated`` and ``transient``. The ``*.control`` and ``*.attached``
+    directories (set-property drop-ins, portable services) are not indexed.
+    """
+
+    # Unit search path, highest precedence first
+    DEFAULT_UNIT_DIRS = (
+        '/run/systemd/transient',
+        '/run/systemd/generator.early',
+        '/etc/systemd/system',
+        '/run/systemd/system',
+        '/run/systemd/generator',
+        '/usr/local/lib/systemd/system',
+        '/usr/lib/systemd/system',
+        '/run/systemd/generator.late',
+    )
+    # Unit file state of every unit defined in these directories
+    GENERATED_DIRS = {
+        '/run/systemd/transient': 'transient',
+        '/run/systemd/generator.early': 'generated',
+        '/run/systemd/generator': 'generated',
+        '/run/systemd/generator.late': 'generated',
+    }
+    DEFAULT_PRESET_DIRS = (
+        '/etc/systemd/system-preset',
+        '/run/systemd/system-preset',
+        '/usr/local/lib/systemd/system-preset',
+        '/usr/lib/systemd/system-preset',
+    )
+    UNIT_SUFFIXES = frozenset((
+        'service', 'socket', 'timer', 'target', 'path', 'mount',
+        'automount', 'swap', 'slice', 'scope', 'device',
+    ))
+    DEPENDENCY_DIR_SUFFIXES = ('.wants', '.requires', '.upholds')
+    DEFAULT_REFRESH_INTERVAL = 1.0  # seconds
+
+    def __init__(self, root: str = '/', unit_dirs: Optional[Iterable[str]] = None,
+                 preset_dirs: Optional[Iterable[str]] = None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 max_content_bytes: int = UnitContentCache.DEFAULT_MAX_BYTES):
+        """Initialize the index; nothing is scanned until first use.
+
+        Args:
+            root: Filesystem root the search path is resolved against
+            unit_dirs: Unit directories, highest precedence first
+            preset_dirs: Preset directories, highest precedence first
+            refresh_interval: Minimum seconds between automatic refreshes
+            max_content_bytes: Size bound of the cat() content cache
+        """
+        self._root = Path(root)
+        self._unit_dirs = [(d, self._root / d.lstrip('/')) for d in unit_dirs or self.DEFAULT_UNIT_DIRS]
+        self._preset_dirs = [self._root / d.lstrip('/') for d in preset_dirs or self.DEFAULT_PRESET_DIRS]
+        self._refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._last_refresh: Optional[float] = None
+
+        self._dir_mtimes: Dict[Path, Optional[int]] = {}
+        self._listings: Dict[Path, _Listing] = {}
+        self._install_cache: Dict[Path, Tuple[int, bool]] = {}  # fragment -> (mtime_ns, has [Install])
+        self.content_cache = UnitContentCache(max_content_bytes)
+
+        self._fragments: Dict[str, Path] = {}
+        self._masked: Dict[str, str] = {}  # unit name -> masked / masked-runtime
+        self._aliases: Dict[str, str] = {}  # alias name -> unit name
+        self._links: Dict[str, str] = {}  # unit name -> enabled / enabled-runtime
+        self._generated: Dict[str, str] = {}  # unit name -> generated / transient
+        self._dropins: Dict[str, Dict[str, Path]] = {}  # unit name -> conf name -> path
+        self._presets: List[Tuple[str, str]] = []  # (pattern, enable/disable), first match wins
+        self.scans = 0  # directories (re)listed so far
+
+    @property
+    def available(self) -> bool:
+        """Whether any unit directory exists under the root."""
+        self._maybe_refresh()
+        with self._lock:
+            return any(self._dir_mtimes.get(path) is not None for _, path in self._unit_dirs)
+
+    def refresh(self) -> bool:
+        """Re-list every directory whose mtime changed since the last refresh.
+
+        Returns:
+            True if anything changed
+        """
+        with self._lock:
+            seen = set()
+            changed = False
+
+            def visit(path: Path) -> _Listing:
+                nonlocal changed
+                seen.add(path)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if path not in self._dir_mtimes or self._dir_mtimes[path] != mtime:
+                    self._listings[path] = self._list_dir(path) if mtime is not None else []
+                    self._dir_mtimes[path] = mtime
+                    self.scans += 1
+                    changed = True
+                return self._listings[path]
+
+            for _, unit_dir in self._unit_dirs:
+                for name, is_dir, _ in visit(unit_dir):
+                    if is_dir and name.endswith(self.DEPENDENCY_DIR_SUFFIXES + ('.d',)):
+                        visit(unit_dir / name)
+            for preset_dir in self._preset_dirs:
+                visit(preset_dir)
+
+            for path in [p for p in self._dir_mtimes if p not in seen]:
+                del self._dir_mtimes[path]
+                del self._listings[path]
+                changed = True
+
+            if changed:
+                self._rebuild()
+            self._last_refresh = time.monotonic()
+            return changed
+
+    def file_states(self, type_filters: Optional[List[str]] = None) -> Dict[str, str]:
+        """Get the unit file state of every known unit.
+
+        Args:
+            type_filters: Only include these unit types (default: all)
+
+        Returns:
+            Dictionary mapping unit name -> state as in `systemctl list-unit-files`
+        """
+        self._maybe_refresh()
+        with self._lock:
+            names = set(self._fragments) | set(self._masked) | set(self._aliases) | set(self._links)
+            if type_filters:
+                suffixes = tuple(f'.{t}' for t in type_filters)
+                names = {n for n in names if n.endswith(suffixes)}
+            states = {}
+            for name in names:
+                state = self._state(name)
+                if state is not None:
+                    states[name] = state
+            return states
+
+    def get_state(self, name: str) -> Optional[str]:
+        """Get the unit file state of one unit.
+
+        Args:
+            name: Full unit name
+
+        Returns:
+            enabled, enabled-runtime, static, masked, masked-runtime, alias,
+            generated, transient, disabled, or None if no unit file exists
+        """
+        self._maybe_refresh()
+        with self._lock:
+            return self._state(name)
+
+    def fragment_path(self, name: str) -> Optional[Path]:
+        """Get the unit file that defines a unit (None if missing or masked)."""
+        self._maybe_refresh()
+        with self._lock:
+            return self._fragment(name)
+
+    def dropin_paths(self, name: str) -> List[Path]:
+        """Get the drop-in files applied to a unit, in application order."""
+        self._maybe_refresh()
+        with self._lock:
+            return self._dropin_paths(name)
+
+    def preset(self, name: str) -> str:
+        """Get the preset policy of a unit.
+
+        Args:
+            name: Full unit name
+
+        Returns:
+            'enabled' or 'disabled' (units matched by no rule default to enabled)
+        """
+        self._maybe_refresh()
+        with self._lock:
+            for pattern, action in self._presets:
+                if fnmatchcase(name, pattern):
+                    return 'enabled' if action == 'enable' else 'disabled'
+            return 'enabled'
+
+    def cat(self, name: str) -> Optional[str]:
+        """Render a unit's fragment and drop-ins like `systemctl cat`.
+
+        Unchanged files are served from the content cache, costing only a
+        stat() per file.
+
+        Args:
+            name: Full unit name
+
+        Returns:
+            Concatenated unit file text, or None if the unit has no fragment
+        """
+        self._maybe_refresh()
+        with self._lock:
+            fragment = self._fragment(name)
+            if fragment is None:
+                return None
+            paths = [fragment] + self._dropin_paths(name)
+        key = self.content_cache.key_for(paths)
+        if key is not None:
+            text = self.content_cache.get(key)
+            if text is not None:
+                return text
+        parts = []
+        for path in paths:
+            try:
+                parts.append(f"# {self._display_path(path)}\n{path.read_text()}")
+            except OSError as e:
+                logger.debug(f"Could not read {path}: {e}")
+        if not parts:
+            return None
+        text = '\n'.join(parts)
+        if key is not None and len(parts) == len(paths):
+            self.content_cache.put(key, text)
+        return text
+
+    def _maybe_refresh(self) -> None:
+        """Refresh if the last refresh is older than refresh_interval."""
+        last = self._last_refresh
+        if last is None or time.monotonic() - last >= self._refresh_interval:
+            self.refresh()
+
+    @staticmethod
+    def _list_dir(path: Path) -> _Listing:
+        """List one directory, recording symlink targets."""
+        listing = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    target = None
+                    if entry.is_symlink():
+                        try:
+                            target = os.readlink(entry.path)
+                        except OSError:
+                            pass
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    listing.append((entry.name, is_dir, target))
+        except OSError as e:
+            logger.debug(f"Could not list {path}: {e}")
+        return listing
+
+    def _rebuild(self) -> None:
+        """Merge the per-directory listings into the unit maps (lock held)."""
+        fragments: Dict[str, Path] = {}
+        masked: Dict[str, str] = {}
+        aliases: Dict[str, str] = {}
+        links: Dict[str, str] = {}
+        generated: Dict[str, str] = {}
+        dropins: Dict[str, Dict[str, Path]] = {}
+
+        for configured, unit_dir in self._unit_dirs:
+            origin = self.GENERATED_DIRS.get(configured.rstrip('/'))
+            runtime = configured.startswith('/run/')
+            config = origin is None and (runtime or configured.startswith('/etc/'))
+            enabled = 'enabled-runtime' if runtime else 'enabled'
+            for name, is_dir, target in self._listings.get(unit_dir, []):
+                if is_dir:
+                    subdir = unit_dir / name
+                    if name.endswith('.d'):
+                        confs = dropins.setdefault(name[:-2], {})
+                        for conf, _, _ in self._listings.get(subdir, []):
+                            if conf.endswith('.conf'):
+                                confs.setdefault(conf, subdir / conf)
+                    elif config and name.endswith(self.DEPENDENCY_DIR_SUFFIXES):
+                        for link, _, _ in self._listings.get(subdir, []):
+                            links.setdefault(link, enabled)
+                    continue
+                if not self._is_unit_name(name) or name in fragments or name in masked:
+                    continue
+                if target == '/dev/null':
+                    masked[name] = 'masked-runtime' if runtime else 'masked'
+                    continue
+                path = unit_dir / name
+                if target is not None:
+                    target_name = os.path.basename(target)
+                    if target_name != name and self._is_unit_name(target_name):
+                        aliases[name] = target_name
+                        if config:
+                            # An Alias= symlink enables its target like a .wants link
+                            links.setdefault(target_name, enabled)
+                    # Absolute targets are resolved under the indexed root
+                    if os.path.isabs(target):
+                        path = self._root / target.lstrip('/')
+                    else:
+                        path = unit_dir / target
+                    path = Path(os.path.normpath(path))
+                fragments[name] = path
+                if origin is not None:
+                    generated[name] = origin
+
+        presets: Dict[str, Path] = {}
+        for preset_dir in self._preset_dirs:
+            for name, is_dir, _ in self._listings.get(preset_dir, []):
+                if not is_dir and name.endswith('.preset'):
+                    presets.setdefault(name, preset_dir / name)
+        rules = []
+        for name in sorted(presets):
+            rules.extend(self._parse_preset(presets[name]))
+
+        self._fragments, self._masked, self._aliases = fragments, masked, aliases
+        self._links, self._dropins, self._presets = links, dropins, rules
+        self._generated = generated
+
+    @staticmethod
+    def _parse_preset(path: Path) -> List[Tuple[str, str]]:
+        """Parse the enable/disable rules of one .preset file."""
+        rules = []
+        try:
+            for line in path.read_text().splitlines():
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] in ('enable', 'disable'):
+                    rules.append((parts[1], parts[0]))
+        except OSError as e:
+            logger.debug(f"Could not read preset file {path}: {e}")
+        return rules
+
+    def _is_unit_name(self, name: str) -> bool:
+        """Check whether a file name looks like a unit file."""
+        stem, _, suffix = name.rpartition('.')
+        return bool(stem) and suffix in self.UNIT_SUFFIXES
+
+    @staticmethod
+    def _template_name(name: str) -> Optional[str]:
+        """Get the template of an instance name (foo@bar.service -> foo@.service)."""
+        prefix, at, rest = name.partition('@')
+        if not at or rest.startswith('.'):
+            return None
+        return f"{prefix}@.{rest.rpartition('.')[2]}"
+
+    def _fragment(self, name: str) -> Optional[Path]:
+        """Resolve the fragment of a unit, falling back to its template (lock held)."""
+        if name in self._masked:
+            return None
+        fragment = self._fragments.get(name)
+        if fragment is None:
+            template = self._template_name(name)
+            if template is not None and template not in self._masked:
+                fragment = self._fragments.get(template)
+        return fragment
+
+    def _dropin_paths(self, name: str) -> List[Path]:
+        """Collect drop-ins for the unit type, template and unit (lock held)."""
+        confs: Dict[str, Path] = {}
+        for key in (name.rpartition('.')[2], self._template_name(name), name):
+            if key is not None:
+                confs.update(self._dropins.get(key, {}))
+        return [confs[conf] for conf in sorted(confs)]
+
+    def _state(self, name: str) -> Optional[str]:
+        """Compute the unit file state of a unit (lock held)."""
+        if name in self._masked:
+            return self._masked[name]
+        if name in self._aliases:
+            return 'alias'
+        fragment = self._fragment(name)
+        if fragment is None:
+            return None
+        if name in self._generated:
+            return self._generated[name]
+        if name in self._links:
+            return self._links[name]
+        if name.endswith('@.' + name.rpartition('.')[2]):
+            prefix = name.rpartition('.')[0]
+            for link, state in self._links.items():
+                if link.startswith(prefix) and link.endswith(name[len(prefix):]):
+                    return state
+        if not self._has_install(fragment):
+            return 'static'
+        return 'disabled'
+
+    def _has_install(self, path: Path) -> bool:
+        """Check whether a unit file has a non-empty [Install] section (cached by mtime)."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        cached = self._install_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        has_install = False
+        try:
+            section = None
+            for line in path.read_text(errors='replace').splitlines():
+                line = line.strip()
+                if not line or line[0] in '#;':
+                    continue
+                if line.startswith('['):
+                    section = line
+                elif section == '[Install]' and '=' in line:
+                    has_install = True
+                    break
+        except OSError as e:
+            logger.debug(f"Could not read {path}: {e}")
+        self._install_cache[path] = (mtime, has_install)
+        return has_install
+
+    def _display_path(self, path: Path) -> str:
+        """Show a path as seen from the indexed root."""
+        if self._root == Path('/'):
+            return str(path)
+        try:
+            return '/' + str(path.relative_to(self._root))
+        except ValueError:
+            return str(path)
@@ -0,0 +1,357 @@
+"""Live unit-state store patched from systemd D-Bus signals."""
+
+import logging
+import threading
+from concurrent.futures import Future
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .systemd import (
+    MANAGER_INTERFACE, PROPERTIES_INTERFACE, SYSTEMD_BUS_NAME, SYSTEMD_OBJECT_PATH, UNIT_INTERFACE
+)
+
+try:
+    from gi.repository import GLib
+except ImportError:
+    GLib = None
+
+logger = logging.getLogger(__name__)
+
+# Unit properties mirrored into ServiceInfo
+_UNIT_FIELDS = ('Description', 'LoadState', 'ActiveState', 'SubState')
+
+
+def _call_later(delay: float, func: Callable[[], None]) -> None:
+    """Run func on the GLib main loop after delay seconds (on a timer thread without GLib)."""
+    if GLib is not None:
+        GLib.timeout_add(int(delay * 1000), _once(func))
+    else:
+        timer = threading.Timer(delay, func)
+        timer.daemon = True
+        timer.start()
+
+
+def _call_on_main(func: Callable[[], None]) -> None:
+    """Run func on the GLib main loop (in the calling thread without GLib)."""
+    if GLib is not None:
+        GLib.idle_add(_once(func))
+    else:
+        func()
+
+
+def _once(func: Callable[[], None]) -> Callable[[], bool]:
+    """Wrap func as a GLib source callback that runs only once."""
+    def callback() -> bool:
+        func()
+        return False
+    return callback
+
+
+class UnitStateStore:
+    """Keeps an always-fresh ServiceInfo per loaded unit.
+
+    The store is filled once with ListUnitsByPatterns and then patched in
+    place from UnitNew, UnitRemoved, JobRemoved, PropertiesChanged and
+    UnitFilesChanged signals, so reads never have to re-list systemd.
+    Signals are dispatched by the GLib main loop (GTK, or Qt's GLib
+    event dispatcher); readers may run on any thread.
+
+    Handlers never block the main loop: units that need a D-Bus round
+    trip are only marked dirty, and one debounced refresh per burst of
+    signals fetches them together on the SystemdManager worker pool.
+    The results are applied back on the main loop.
+    """
+
+    REFRESH_DELAY = 0.1  # seconds to collect a burst of signals
+
+    def __init__(self, systemd, make_info: Callable[..., 'ServiceInfo']):
+        """Initialize the store.
+
+        Args:
+            systemd: Connected SystemdManager
+            make_info: Builder called as make_info(name, load_state,
+                active_state, sub_state, description, enabled)
+        """
+        self._systemd = systemd
+        self._make_info = make_info
+        self._lock = threading.Lock()
+        self._units: Dict[str, Dict[str, 'ServiceInfo']] = {}  # type suffix -> name -> info
+        self._paths: Dict[str, str] = {}  # object path -> unit name
+        self._unit_paths: Dict[str, str] = {}  # unit name -> object path
+        self._raw: Dict[str, Dict[str, str]] = {}  # unit name -> unit properties
+        self._file_states: Dict[str, str] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._dirty: Dict[str, str] = {}  # unit name -> object path awaiting a refresh
+        self._files_dirty = False  # unit file states need reloading
+        self._removed: Set[str] = set()  # units unloaded while a refresh runs
+        self._refresh_pending = False  # a refresh is scheduled or running
+        self._signal_matches = []
+        self.live = False
+
+    def start(self) -> bool:
+        """Load all units and subscribe to systemd change signals.
+
+        Returns:
+            True if the store is live
+        """
+        if self.live:
+            return True
+        try:
+            bus = self._systemd.bus
+            self._systemd.watch_unit_changes()
+            for signal, handler in (('UnitNew', self._on_unit_new),
+                                    ('UnitRemoved', self._on_unit_removed),
+                                    ('JobRemoved', self._on_job_removed),
+                                    ('UnitFilesChanged', self._on_unit_files_changed)):
+                self._signal_matches.append(bus.add_signal_receiver(
+                    handler, signal_name=signal, dbus_interface=MANAGER_INTERFACE,
+                    bus_name=SYSTEMD_BUS_NAME, path=SYSTEMD_OBJECT_PATH
+                ))
+            self._signal_matches.append(bus.add_signal_receiver(
+                self._on_properties_changed, signal_name='PropertiesChanged',
+                dbus_interface=PROPERTIES_INTERFACE, bus_name=SYSTEMD_BUS_NAME,
+                path_keyword='path'
+            ))
+            self.load()
+            self.live = True
+        except Exception as e:
+            logger.warning(f"Live unit updates unavailable: {e}")
+            self.stop()
+        return self.live
+
+    def stop(self) -> None:
+        """Unsubscribe from signals; the store stops being live."""
+        for match in self._signal_matches:
+            try:
+                match.remove()
+            except Exception:
+                pass
+        self._signal_matches = []
+        self.live = False
+
+    def load(self) -> None:
+        """(Re)load every unit and unit file state in one round trip."""
+        units = self._systemd.list_units_by_patterns([], [])
+        file_states = self._systemd.list_unit_files_by_patterns([], [])
+        with self._lock:
+            self._units.clear()
+            self._paths.clear()
+            self._unit_paths.clear()
+            self._raw.clear()
+            self._file_states = file_states
+            for unit in units:
+                self._paths[unit.path] = unit.name
+                self._unit_paths[unit.name] = unit.path
+                self._store(unit.name, {
+                    'Description': unit.description,
+                    'LoadState': unit.load_state,
+                    'ActiveState': unit.active_state,
+                    'SubState': unit.sub_state,
+                })
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Register a callback invoked with the unit name after each change.
+
+        Callbacks run on the D-Bus dispatch thread and must not block.
+
+        Args:
+            callback: Function taking the changed unit name
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        """Unregister a change callback."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def get(self, name: str) -> Optional['ServiceInfo']:
+        """Get the current ServiceInfo of a loaded unit.
+
+        Args:
+            name: Full unit name (e.g. 'sshd.service')
+
+        Returns:
+            ServiceInfo or None if the unit is not loaded
+        """
+        with self._lock:
+            return self._units.get(self._suffix(name), {}).get(name)
+
+    def list_units(self, type_suffix: str, states: Optional[List[str]] = None,
+                   patterns: Optional[List[str]] = None) -> List['ServiceInfo']:
+        """List loaded units of one type.
+
+        Args:
+            type_suffix: Unit type (service, timer, ...)
+            states: Only include units whose load, active or sub state matches
+            patterns: Only include units whose name matches one of these globs
+
+        Returns:
+            List of ServiceInfo objects (unsorted)
+        """
+        with self._lock:
+            units = self._units.get(type_suffix, {})
+            if not states and not patterns:
+                return list(units.values())
+            wanted = set(states or [])
+            return [info for name, info in units.items()
+                    if (not wanted or wanted.intersection((self._raw[name].get('LoadState'),
+                                                           info.active_state, info.sub_state)))
+                    and (not patterns or any(fnmatchcase(name, p) for p in patterns))]
+
+    def _store(self, name: str, props: Dict[str, str]) -> None:
+        """Build and store the ServiceInfo for a unit (lock must be held)."""
+        self._raw[name] = props
+        enabled = self._file_states.get(name) in ('enabled', 'static')
+        self._units.setdefault(self._suffix(name), {})[name] = self._make_info(
+            name, props.get('LoadState', ''), props.get('ActiveState', ''),
+            props.get('SubState', ''), props.get('Description', ''), enabled
+        )
+
+    def _patch(self, name: str, changed: Dict[str, str]) -> None:
+        """Merge changed unit properties into the stored entry and notify."""
+        with self._lock:
+            props = dict(self._raw.get(name, {}))
+            props.update(changed)
+            self._store(name, props)
+        self._notify(name)
+
+    def _mark_dirty(self, name: str, path: str) -> None:
+        """Queue a unit for the next refresh."""
+        with self._lock:
+            self._dirty[name] = path
+            self._removed.discard(name)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        """Start the debounce timer unless a refresh is already pending."""
+        with self._lock:
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        _call_later(self.REFRESH_DELAY, self._start_refresh)
+
+    def _start_refresh(self) -> None:
+        """Hand the dirty units to the worker pool (main loop)."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            files, self._files_dirty = self._files_dirty, False
+            self._removed.clear()
+        try:
+            future = self._systemd.submit_blocking(self._fetch, list(dirty), files)
+        except Exception as e:
+            logger.debug(f"Could not queue unit refresh: {e}")
+            with self._lock:
+                self._refresh_pending = False
+            return
+        future.add_done_callback(lambda done: _call_on_main(lambda: self._apply(dirty, done)))
+
+    def _fetch(self, names: List[str], files: bool) -> Tuple[Dict[str, Dict[str, Any]],
+                                                            Optional[Dict[str, str]]]:
+        """Fetch unit properties and, if requested, unit file states (worker pool).
+
+        Returns:
+            Tuple of (unit name -> properties, unit file states or None)
+        """
+        props = {}
+        for name in names:
+            try:
+                props[name] = self._systemd.get_unit_properties(name, list(_UNIT_FIELDS))
+            except Exception as e:
+                logger.debug(f"Could not refresh {name}: {e}")
+        file_states = None
+        if files:
+            try:
+                file_states = self._systemd.list_unit_files_by_patterns([], [])
+            except Exception as e:
+                logger.debug(f"Could not reload unit file states: {e}")
+        return props, file_states
+
+    def _apply(self, dirty: Dict[str, str], future: Future) -> None:
+        """Store the results of a finished refresh and notify (main loop)."""
+        try:
+            props, file_states = future.result()
+        except Exception as e:
+            logger.debug(f"Unit refresh failed: {e}")
+            props, file_states = {}, None
+        changed = []
+        with self._lock:
+            if file_states is not None:
+                self._file_states = file_states
+                for name, raw in list(self._raw.items()):
+                    self._store(name, raw)
+            for name, values in props.items():
+                if name in self._removed:
+                    continue  # unloaded while the refresh ran
+                path = dirty[name]
+                self._paths[path] = name
+                self._unit_paths[name] = path
+                raw = dict(self._raw.get(name, {}))
+                raw.update({key: str(value) for key, value in values.items()})
+                self._store(name, raw)
+                changed.append(name)
+            self._refresh_pending = False
+            again = bool(self._dirty) or self._files_dirty
+        for name in changed:
+            self._notify(name)
+        if file_states is not None:
+            self._notify('')
+        if again:
+            self._schedule_refresh()
+
+    def _notify(self, name: str) -> None:
+        """Invoke change listeners for a unit."""
+        for callback in list(self._listeners):
+            try:
+                callback(name)
+            except Exception as e:
+                logger.error(f"Unit store listener failed: {e}")
+
+    @staticmethod
+    def _suffix(name: str) -> str:
+        """Get the type suffix of a unit name."""
+        return name.rsplit('.', 1)[-1] if '.' in name else ''
+
+    def _on_unit_new(self, name, path):
+        """Handle Manager.UnitNew: a unit was loaded."""
+        self._mark_dirty(str(name), str(path))
+
+    def _on_unit_removed(self, name, path):
+        """Handle Manager.UnitRemoved: a unit was unloaded."""
+        name = str(name)
+        with self._lock:
+            self._paths.pop(str(path), None)
+            self._unit_paths.pop(name, None)
+            self._raw.pop(name, None)
+            self._units.get(self._suffix(name), {}).pop(name, None)
+            self._dirty.pop(name, None)
+            self._removed.add(name)
+        self._notify(name)
+
+    def _on_job_removed(self, job_id, job_path, name, result):
+        """Handle Manager.JobRemoved: re-read the unit the finished job touched."""
+        name = str(name)
+        with self._lock:
+            path = self._unit_paths.get(name)
+        if path:
+            self._mark_dirty(name, path)
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        """Handle Properties.PropertiesChanged on a unit object."""
+        if str(interface) != UNIT_INTERFACE:
+            return
+        with self._lock:
+            name = self._paths.get(str(path))
+        if name is None:
+            return
+        if any(str(key) in _UNIT_FIELDS for key in invalidated):
+            self._mark_dirty(name, str(path))
+            return
+        patch = {str(key): str(value) for key, value in changed.items() if str(key) in _UNIT_FIELDS}
+        if patch:
+            self._patch(name, patch)
+
+    def _on_unit_files_changed(self):
+        """Handle Manager.UnitFilesChanged: enablement may have changed."""
+        with self._lock:
+            self._files_dirty = True
+        self._schedule_refresh()
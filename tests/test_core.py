@@ -1,8 +1,11 @@
 """Unit tests for CachyOS Service Manager core functionality."""
 
+import mmap
+import os
 import pytest
+import shutil
 import sys
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from pathlib import Path
 
 # Mock dbus for testing on Windows
@@ -16,6 +19,20 @@ from core.service import Service, ServiceState
 from core.service_manager import ServiceManager, ServiceInfo, ServiceType
 from core.service_group import ServiceGroup, ServiceGroupManager
 from core.resource_monitor import ResourceMonitor, ServiceResources
+from core.systemd import UnitEntry
+from core.unit_store import UnitStateStore
+from core.cache import ResultCache
+from core.unit_files import UnitFileIndex
+from core.cgroup import CgroupCollector, Pressure
+from core.procfs import ProcScanner, UnitProcesses, unit_from_cgroup
+from core.top import TopSampler, UnitUsage
+from core.slices import build_slice_tree
+from core.rates import RateTracker
+from core.timeseries import RingBuffer, RollupTier
+from core.metrics_store import MetricsStore, RingFile
+from core.monitor import MonitoringEngine, Metrics, _Sample
+from core.config import load_config
+from core.memory_events import MemoryEventWatcher
 
 
 class TestServiceState:
@@ -194,6 +211,160 @@ class TestServiceManager:
         results = mgr.search_services("nonexistent", services)
         assert len(results) == 0
 
+    def test_list_all_services_dbus(self):
+        systemd = Mock()
+        systemd.list_units_by_patterns.return_value = [
+            UnitEntry("sshd.service", "OpenSSH Daemon", "loaded", "active", "running", "",
+                      "/org/freedesktop/systemd1/unit/sshd_2eservice", 0, "", "/"),
+            UnitEntry("cups.service", "CUPS Scheduler", "loaded", "failed", "failed", "",
+                      "/org/freedesktop/systemd1/unit/cups_2eservice", 0, "", "/"),
+        ]
+        systemd.list_unit_files_by_patterns.return_value = {"sshd.service": "enabled",
+                                                           "cups.service": "disabled"}
+        mgr = ServiceManager(cache_ttl=0)
+        mgr._systemd = systemd
+
+        services = mgr.list_all_services()
+        assert [s.name for s in services] == ["cups.service", "sshd.service"]
+        assert services[0].state == ServiceState.FAILED
+        assert services[0].enabled is False
+        assert services[1].display_name == "sshd"
+        assert services[1].enabled is True
+        systemd.list_units_by_patterns.assert_called_once_with(
+            [], ["*.service", "*.timer", "*.socket"])
+
+    def test_list_all_services_dbus_running_only(self):
+        systemd = Mock()
+        systemd.list_units_by_patterns.return_value = []
+        systemd.list_unit_files_by_patterns.return_value = {}
+        mgr = ServiceManager(cache_ttl=0)
+        mgr._systemd = systemd
+        mgr.list_all_services(service_type=ServiceType.TIMER, show_inactive=False)
+        systemd.list_units_by_patterns.assert_called_once_with(
+            ServiceManager.RUNNING_STATES, ["*.service", "*.timer", "*.socket"])
+
+    def test_unit_snapshot_one_fetch_for_all_types(self):
+        systemd = Mock()
+        systemd.list_units_by_patterns.return_value = [
+            UnitEntry("sshd.service", "OpenSSH Daemon", "loaded", "active", "running", "",
+                      "/org/freedesktop/systemd1/unit/sshd_2eservice", 0, "", "/"),
+            UnitEntry("fstrim.timer", "Discard unused blocks", "loaded", "active", "waiting", "",
+                      "/org/freedesktop/systemd1/unit/fstrim_2etimer", 0, "", "/"),
+            UnitEntry("cups.socket", "CUPS Socket", "loaded", "active", "listening", "",
+                      "/org/freedesktop/systemd1/unit/cups_2esocket", 0, "", "/"),
+        ]
+        systemd.list_unit_files_by_patterns.return_value = {"fstrim.timer": "enabled",
+                                                           "cups.socket": "disabled"}
+        mgr = ServiceManager(cache_ttl=60)
+        mgr._systemd = systemd
+
+        timers = mgr.list_timers()
+        sockets = mgr.list_sockets()
+        services = mgr.list_all_services()
+        assert [t.name for t in timers] == ["fstrim.timer"]
+        assert timers[0].enabled is True
+        assert timers[0].display_name == "fstrim"
+        assert [s.name for s in sockets] == ["cups.socket"]
+        assert sockets[0].enabled is False
+        assert [s.name for s in services] == ["sshd.service"]
+        assert systemd.list_units_by_patterns.call_count == 1
+        assert systemd.list_unit_files_by_patterns.call_count == 1
+
+    def test_list_all_services_pushes_filters_down(self):
+        systemd = Mock()
+        systemd.list_units_by_patterns.return_value = []
+        systemd.list_unit_files_by_patterns.return_value = {}
+        mgr = ServiceManager(cache_ttl=0)
+        mgr._systemd = systemd
+        mgr.list_all_services(states=["failed"], patterns=["ssh*", "cups.service"])
+        systemd.list_units_by_patterns.assert_called_once_with(
+            ["failed"], ["ssh*.service", "cups.service"])
+
+    def test_list_all_services_enabled_pushdown(self):
+        systemd = Mock()
+        systemd.list_unit_files_by_patterns.return_value = {"sshd.service": "enabled"}
+        systemd.list_units_by_patterns.return_value = [
+            UnitEntry("sshd.service", "OpenSSH Daemon", "loaded", "active", "running", "",
+                      "/org/freedesktop/systemd1/unit/sshd_2eservice", 0, "", "/"),
+        ]
+        mgr = ServiceManager(cache_ttl=0)
+        mgr._systemd = systemd
+        services = mgr.list_all_services(enabled=True)
+        assert [s.name for s in services] == ["sshd.service"]
+        systemd.list_unit_files_by_patterns.assert_called_once_with(
+            ServiceManager.ENABLED_FILE_STATES, ["*.service"])
+        systemd.list_units_by_patterns.assert_called_once_with([], ["sshd.service"])
+
+    def test_filtered_listing_does_not_poison_cache(self):
+        systemd = Mock()
+        systemd.list_unit_files_by_patterns.return_value = {}
+        systemd.list_units_by_patterns.return_value = []
+        mgr = ServiceManager(cache_ttl=60)
+        mgr._systemd = systemd
+        mgr.list_all_services(states=["failed"])
+        mgr.list_all_services()
+        assert systemd.list_units_by_patterns.call_count == 2
+
+    def test_listing_cache_keyed_by_parameters(self):
+        systemd = Mock()
+        systemd.list_unit_files_by_patterns.return_value = {}
+        systemd.list_units_by_patterns.return_value = []
+        mgr = ServiceManager(cache_ttl=60)
+        mgr._systemd = systemd
+        mgr.list_all_services(show_inactive=True)
+        mgr.list_all_services(show_inactive=False)
+        mgr.list_all_services(states=["failed"])
+        mgr.list_all_services(states=["failed"])
+        mgr.list_timers(show_inactive=False)
+        assert systemd.list_units_by_patterns.call_count == 3
+        assert mgr.cache_stats['hits'] == 2
+        assert mgr.cache_stats['misses'] == 3
+
+    @patch('subprocess.run')
+    def test_list_all_services_systemctl_fallback(self, mock_run, tmp_path):
+        mock_run.side_effect = [
+            Mock(returncode=0, stdout="sshd.service loaded active running OpenSSH Daemon\n"),
+            Mock(returncode=0, stdout="sshd.service enabled enabled\n"),
+        ]
+        mgr = ServiceManager(cache_ttl=0, use_dbus=False)
+        mgr._unit_files = UnitFileIndex(root=str(tmp_path))
+        services = mgr.list_all_services()
+        assert len(services) == 1
+        assert services[0].description == "OpenSSH Daemon"
+        assert services[0].enabled is True
+        assert "--type=service,timer,socket" in mock_run.call_args_list[0][0][0]
+        assert "--type=service,timer,socket" in mock_run.call_args_list[1][0][0]
+
+    def test_get_service_status_dbus(self):
+        systemd = Mock()
+        systemd.get_unit_properties.return_value = {
+            "Description": "OpenSSH Daemon", "LoadState": "loaded", "ActiveState": "active",
+            "SubState": "running", "UnitFileState": "enabled", "MainPID": 812,
+            "MemoryCurrent": 4096, "CPUUsageNSec": 2 ** 64 - 1,
+        }
+        mgr = ServiceManager()
+        mgr._systemd = systemd
+        info = mgr.get_service_status("sshd")
+        assert info.name == "sshd.service"
+        assert info.enabled is True
+        assert info.pid == 812
+        assert info.memory == "4096"
+        assert info.cpu is None
+        assert systemd.get_unit_properties.call_count == 1
+
+    @patch('subprocess.run')
+    def test_get_timer_status_single_systemctl_call(self, mock_run):
+        mock_run.return_value = Mock(returncode=0, stdout=(
+            "Description=Daily apt\nLoadState=loaded\nActiveState=active\n"
+            "SubState=waiting\nUnitFileState=enabled\n"))
+        mgr = ServiceManager(use_dbus=False)
+        info = mgr.get_timer_status("apt-daily")
+        assert info.name == "apt-daily.timer"
+        assert info.display_name == "apt-daily"
+        assert info.sub_state == "waiting"
+        assert info.pid is None
+        assert mock_run.call_count == 1
+
     def test_init_with_custom_timeouts(self):
         mgr = ServiceManager(timeout=10.0, action_timeout=30.0, cache_ttl=5.0)
         assert mgr._timeout == 10.0
@@ -201,6 +372,219 @@ class TestServiceManager:
         assert mgr._cache_ttl == 5.0
 
 
+class TestResultCache:
+    """Tests for the bounded TTL/LRU result cache."""
+
+    def test_lru_eviction(self):
+        cache = ResultCache(ttl=60, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.stats['evictions'] == 1
+
+    def test_expired_entry_is_miss(self):
+        cache = ResultCache(ttl=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+        assert cache.stats['misses'] == 1
+        assert cache.stats['hit_rate'] == 0.0
+
+
+class TestUnitFileIndex:
+    """Tests for the filesystem unit file index."""
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        etc = tmp_path / "etc/systemd/system"
+        lib = tmp_path / "usr/lib/systemd/system"
+        presets = tmp_path / "usr/lib/systemd/system-preset"
+        for directory in (etc / "multi-user.target.wants", etc / "sshd.service.d", lib, presets):
+            directory.mkdir(parents=True)
+        (lib / "sshd.service").write_text("[Service]\nExecStart=/usr/bin/sshd\n\n[Install]\nWantedBy=multi-user.target\n")
+        (lib / "nginx.service").write_text("[Service]\nExecStart=/usr/bin/nginx\n\n[Install]\nWantedBy=multi-user.target\n")
+        (lib / "systemd-journald.service").write_text("[Service]\nExecStart=/usr/lib/systemd/systemd-journald\n")
+        (lib / "cups.service").write_text("[Service]\nExecStart=/usr/bin/cupsd\n")
+        (etc / "multi-user.target.wants/sshd.service").symlink_to(lib / "sshd.service")
+        (etc / "cups.service").symlink_to("/dev/null")
+        (etc / "sshd.service.d/override.conf").write_text("[Service]\nNice=5\n")
+        (presets / "90-default.preset").write_text("enable sshd.service\ndisable *\n")
+        return tmp_path
+
+    def test_file_states(self, root):
+        index = UnitFileIndex(root=str(root), refresh_interval=0)
+        states = index.file_states(["service"])
+        assert states == {"sshd.service": "enabled", "nginx.service": "disabled",
+                          "systemd-journald.service": "static", "cups.service": "masked"}
+        assert index.fragment_path("cups.service") is None
+
+    def test_alias_symlink_enables_target(self, root):
+        etc = root / "etc/systemd/system"
+        lib = root / "usr/lib/systemd/system"
+        (lib / "sddm.service").write_text("[Service]\nExecStart=/usr/bin/sddm\n\n"
+                                          "[Install]\nAlias=display-manager.service\n")
+        # Absolute target as on a real system: resolved under the index root
+        (etc / "display-manager.service").symlink_to("/usr/lib/systemd/system/sddm.service")
+        index = UnitFileIndex(root=str(root), refresh_interval=0)
+        assert index.get_state("sddm.service") == "enabled"
+        assert index.get_state("display-manager.service") == "alias"
+        assert index.fragment_path("display-manager.service") == lib / "sddm.service"
+        assert "ExecStart=/usr/bin/sddm" in index.cat("display-manager.service")
+
+    def test_generated_units(self, root):
+        generator = root / "run/systemd/generator"
+        generator.mkdir(parents=True)
+        (generator / "home.mount").write_text("[Mount]\nWhat=/dev/sda2\nWhere=/home\n")
+        (generator / "local-fs.target.requires").mkdir()
+        (generator / "local-fs.target.requires/home.mount").symlink_to("../home.mount")
+        index = UnitFileIndex(root=str(root), refresh_interval=0)
+        assert index.get_state("home.mount") == "generated"
+        assert index.fragment_path("home.mount") == generator / "home.mount"
+
+    def test_cat_includes_dropins(self, root):
+        index = UnitFileIndex(root=str(root))
+        text = index.cat("sshd.service")
+        assert text.startswith("# /usr/lib/systemd/system/sshd.service\n[Service]")
+        assert "\n\n# /etc/systemd/system/sshd.service.d/override.conf\n[Service]\nNice=5\n" in text
+
+    def test_preset(self, root):
+        index = UnitFileIndex(root=str(root))
+        assert index.preset("sshd.service") == "enabled"
+        assert index.preset("nginx.service") == "disabled"
+
+    def test_incremental_refresh(self, root):
+        index = UnitFileIndex(root=str(root), refresh_interval=0)
+        index.refresh()
+        scans = index.scans
+        assert index.refresh() is False
+        assert index.scans == scans
+        wants = root / "etc/systemd/system/multi-user.target.wants"
+        (wants / "nginx.service").symlink_to(root / "usr/lib/systemd/system/nginx.service")
+        assert index.get_state("nginx.service") == "enabled"
+        assert index.scans == scans + 1
+
+    def test_cat_content_cache(self, root):
+        index = UnitFileIndex(root=str(root), refresh_interval=0)
+        first = index.cat("sshd.service")
+        assert index.cat("sshd.service") == first
+        assert index.content_cache.hits == 1
+        override = root / "etc/systemd/system/sshd.service.d/override.conf"
+        override.write_text("[Service]\nNice=10\n")
+        assert "Nice=10" in index.cat("sshd.service")
+        assert index.content_cache.misses == 2
+
+    def test_content_cache_size_bound(self, root):
+        index = UnitFileIndex(root=str(root), max_content_bytes=200)
+        index.cat("sshd.service")
+        index.cat("nginx.service")
+        assert index.content_cache.size <= 200
+        assert len(index.content_cache) == 1
+
+    @patch('subprocess.run')
+    def test_service_manager_uses_index(self, mock_run, root):
+        mgr = ServiceManager(use_dbus=False)
+        mgr._unit_files = UnitFileIndex(root=str(root))
+        assert mgr._get_all_enabled_states()["sshd.service"] is True
+        assert mgr._is_enabled("nginx.service") is False
+        assert "Nice=5" in mgr.get_unit_file("sshd")
+        mock_run.assert_not_called()
+
+    @patch('subprocess.run')
+    def test_backup_without_subprocesses(self, mock_run, root, tmp_path):
+        import json
+        mgr = ServiceManager(use_dbus=False)
+        mgr._unit_files = UnitFileIndex(root=str(root))
+        output = tmp_path / "backup.json"
+        success, _ = mgr.backup_services(["sshd", "nginx"], str(output))
+        assert success is True
+        services = json.loads(output.read_text())["services"]
+        assert services["sshd.service"]["enabled"] is True
+        assert services["nginx.service"]["enabled"] is False
+        mock_run.assert_not_called()
+
+
+class TestUnitStateStore:
+    """Tests for the signal-driven UnitStateStore."""
+
+    SSHD_PATH = "/org/freedesktop/systemd1/unit/sshd_2eservice"
+
+    @pytest.fixture
+    def store(self):
+        systemd = Mock()
+        systemd.list_units_by_patterns.return_value = [
+            UnitEntry("sshd.service", "OpenSSH Daemon", "loaded", "active", "running", "",
+                      self.SSHD_PATH, 0, "", "/"),
+            UnitEntry("fstrim.timer", "Discard unused blocks", "loaded", "inactive", "dead", "",
+                      "/org/freedesktop/systemd1/unit/fstrim_2etimer", 0, "", "/"),
+        ]
+        systemd.list_unit_files_by_patterns.return_value = {"sshd.service": "enabled"}
+        store = UnitStateStore(systemd, ServiceManager()._make_service_info)
+        store.load()
+        return store
+
+    def test_load_partitions_by_type(self, store):
+        assert [s.name for s in store.list_units("service")] == ["sshd.service"]
+        assert [s.name for s in store.list_units("timer")] == ["fstrim.timer"]
+        assert store.get("sshd.service").enabled is True
+
+    def test_list_units_state_filter(self, store):
+        assert store.list_units("timer", ["active"]) == []
+        assert len(store.list_units("timer", ["dead"])) == 1
+
+    def test_properties_changed_patches_entry(self, store):
+        changes = []
+        store.add_listener(changes.append)
+        store._on_properties_changed("org.freedesktop.systemd1.Unit",
+                                     {"ActiveState": "failed", "SubState": "failed"}, [],
+                                     path=self.SSHD_PATH)
+        info = store.get("sshd.service")
+        assert info.state == ServiceState.FAILED
+        assert info.description == "OpenSSH Daemon"
+        assert changes == ["sshd.service"]
+
+    def test_properties_changed_ignores_other_interfaces(self, store):
+        store._on_properties_changed("org.freedesktop.systemd1.Service",
+                                     {"ActiveState": "failed"}, [], path=self.SSHD_PATH)
+        assert store.get("sshd.service").state == ServiceState.ACTIVE
+
+    def test_list_units_patterns(self, store):
+        assert [s.name for s in store.list_units("service", patterns=["ssh*"])] == ["sshd.service"]
+        assert store.list_units("service", patterns=["cups*"]) == []
+
+    def test_unit_removed(self, store):
+        store._on_unit_removed("sshd.service", self.SSHD_PATH)
+        assert store.get("sshd.service") is None
+        assert store.list_units("service") == []
+
+    def test_signal_burst_is_one_background_refresh(self, store):
+        from concurrent.futures import ThreadPoolExecutor
+        timers = []
+        executor = ThreadPoolExecutor(max_workers=1)
+        store._systemd.submit_blocking.side_effect = executor.submit
+        store._systemd.get_unit_properties.return_value = {"ActiveState": "inactive",
+                                                           "SubState": "dead"}
+        changes = []
+        store.add_listener(changes.append)
+        with patch('core.unit_store._call_later', lambda delay, func: timers.append(func)):
+            for _ in range(20):
+                store._on_job_removed(1, "/job/1", "sshd.service", "done")
+            store._on_unit_new("cups.service", "/org/freedesktop/systemd1/unit/cups_2eservice")
+            store._on_unit_files_changed()
+            # Handlers made no D-Bus calls on the main loop
+            store._systemd.get_unit_properties.assert_not_called()
+            assert len(timers) == 1
+            timers[0]()
+            executor.shutdown(wait=True)
+
+        assert store._systemd.get_unit_properties.call_count == 2
+        assert store._systemd.list_unit_files_by_patterns.call_count == 2  # load() + refresh
+        assert store.get("sshd.service").state == ServiceState.INACTIVE
+        assert store.get("cups.service") is not None
+        assert sorted(changes) == ["", "cups.service", "sshd.service"]
+
+
 class TestServiceGroup:
     """Tests for ServiceGroup dataclass."""
 
@@ -331,6 +715,725 @@ class TestServiceGroupManager:
         assert len(groups) == 2
 
 
+def _write_cgroup(root, cgroup, usage_usec=0, memory=0, pids=1, io="8:0 rbytes=0 wbytes=0\n"):
+    """Create or update a unit cgroup in a fake cgroup v2 tree."""
+    (root / "cgroup.controllers").write_text("cpu io memory pids\n")
+    directory = root / cgroup.lstrip("/")
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "cpu.stat").write_text(f"usage_usec {usage_usec}\nuser_usec {usage_usec}\nsystem_usec 0\n")
+    (directory / "memory.current").write_text(f"{memory}\n")
+    (directory / "memory.stat").write_text(f"anon {memory}\nfile 0\n")
+    (directory / "io.stat").write_text(io)
+    (directory / "pids.current").write_text(f"{pids}\n")
+
+
+def _write_pressure(root, cgroup, resource, avg10=0.0, avg60=0.0, total=0):
+    """Write a PSI file with equal "some" and "full" lines."""
+    directory = root / cgroup.lstrip("/")
+    directory.mkdir(parents=True, exist_ok=True)
+    line = f"avg10={avg10:.2f} avg60={avg60:.2f} avg300=0.00 total={total}"
+    (directory / f"{resource}.pressure").write_text(f"some {line}\nfull {line}\n")
+
+
+class TestCgroupCollector:
+    """Tests for the cgroup v2 collector."""
+
+    def test_read(self, tmp_path):
+        _write_cgroup(tmp_path, "/system.slice/sshd.service", usage_usec=500, memory=4096, pids=3,
+                      io="8:0 rbytes=100 wbytes=10\n259:0 rbytes=50 wbytes=5\n")
+        stats = CgroupCollector(str(tmp_path)).read("/system.slice/sshd.service")
+        assert stats.cpu_usage_usec == 500
+        assert stats.memory_current == 4096
+        assert stats.memory_stat["anon"] == 4096
+        assert stats.pids_current == 3
+        assert stats.io_read_bytes == 150
+        assert stats.io_write_bytes == 15
+
+    def test_cpu_percent_from_deltas(self, tmp_path):
+        collector = CgroupCollector(str(tmp_path))
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=1_000_000)
+        assert collector.sample("/system.slice/a.service", now=10.0).cpu_percent is None
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=1_500_000)
+        assert collector.sample("/system.slice/a.service", now=12.0).cpu_percent == pytest.approx(25.0)
+
+    def test_counter_reset_starts_new_baseline(self, tmp_path):
+        collector = CgroupCollector(str(tmp_path))
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=9_000_000)
+        collector.sample("/system.slice/a.service", now=1.0)
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=100)
+        assert collector.sample("/system.slice/a.service", now=2.0).cpu_percent is None
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=100_100)
+        assert collector.sample("/system.slice/a.service", now=3.0).cpu_percent == pytest.approx(10.0)
+
+    def test_pressure_stall_share(self, tmp_path):
+        collector = CgroupCollector(str(tmp_path))
+        _write_cgroup(tmp_path, "/system.slice/a.service")
+        _write_pressure(tmp_path, "/system.slice/a.service", "memory", 12.5, 3.25, 1_000_000)
+        first = collector.sample("/system.slice/a.service", now=10.0)
+        some = first.some_pressure("memory")
+        assert (some.avg10, some.avg60, some.total_usec) == (12.5, 3.25, 1_000_000)
+        assert some.stall_percent is None
+        assert first.some_pressure("io").avg10 == 0.0  # no io.pressure file
+        _write_pressure(tmp_path, "/system.slice/a.service", "memory", 12.5, 3.25, 1_500_000)
+        second = collector.sample("/system.slice/a.service", now=12.0)
+        assert second.pressure["memory"]["full"].stall_percent == pytest.approx(25.0)
+
+    def test_io_rates(self, tmp_path):
+        collector = CgroupCollector(str(tmp_path))
+        _write_cgroup(tmp_path, "/system.slice/a.service", io="8:0 rbytes=1000 wbytes=0\n")
+        assert collector.sample("/system.slice/a.service", now=1.0).io_read_rate is None
+        _write_cgroup(tmp_path, "/system.slice/a.service", io="8:0 rbytes=5000 wbytes=2000\n")
+        stats = collector.sample("/system.slice/a.service", now=3.0)
+        assert (stats.io_read_rate, stats.io_write_rate) == (2000.0, 1000.0)
+
+    def test_walk_units(self, tmp_path):
+        _write_cgroup(tmp_path, "/system.slice/a.service")
+        _write_cgroup(tmp_path, "/system.slice/a.service/payload")
+        _write_cgroup(tmp_path, "/user.slice/user-1000.slice/user@1000.service")
+        _write_cgroup(tmp_path, "/init.scope")
+        assert CgroupCollector(str(tmp_path)).walk_units() == {
+            "a.service": "/system.slice/a.service",
+            "user@1000.service": "/user.slice/user-1000.slice/user@1000.service",
+            "init.scope": "/init.scope",
+        }
+
+    def test_missing_cgroup(self, tmp_path):
+        collector = CgroupCollector(str(tmp_path))
+        assert collector.available is False
+        assert collector.sample("/system.slice/gone.service") is None
+
+
+def _write_proc(root, pid, cgroup, utime=0, stime=0, threads=1, rss_pages=0, start=100, fds=0,
+                v1=False):
+    """Create a process in a fake procfs tree."""
+    directory = root / str(pid)
+    (directory / "fd").mkdir(parents=True, exist_ok=True)
+    for fd in range(fds):
+        (directory / "fd" / str(fd)).touch()
+    line = f"1:name=systemd:{cgroup}\n" if v1 else f"0::{cgroup}\n"
+    (directory / "cgroup").write_text(line)
+    (directory / "stat").write_text(
+        f"{pid} (odd (name)) S 1 1 1 0 -1 0 0 0 0 0 {utime} {stime} 0 0 20 0 {threads} 0 "
+        f"{start} 0 {rss_pages} 0\n")
+
+
+class TestProcScanner:
+    """Tests for the /proc unit scanner."""
+
+    def test_unit_from_cgroup(self):
+        assert unit_from_cgroup("/system.slice/sshd.service") == "sshd.service"
+        assert unit_from_cgroup("/system.slice/docker.service/payload") == "docker.service"
+        assert unit_from_cgroup("/user.slice/user-1000.slice/user@1000.service/app.slice/x.service") == \
+            "user@1000.service"
+        assert unit_from_cgroup("/init.scope") == "init.scope"
+        assert unit_from_cgroup("/") is None
+        assert unit_from_cgroup("/system.slice") is None
+
+    def test_scan_groups_processes_by_unit(self, tmp_path):
+        _write_proc(tmp_path, 1, "/init.scope")
+        _write_proc(tmp_path, 2, "/")  # kernel thread
+        _write_proc(tmp_path, 100, "/system.slice/nginx.service", utime=50, stime=50, threads=2,
+                    rss_pages=10, fds=3)
+        _write_proc(tmp_path, 101, "/system.slice/nginx.service", threads=4, rss_pages=5, fds=2,
+                    v1=True)
+        (tmp_path / "self").mkdir()
+        units = ProcScanner(str(tmp_path)).scan()
+        assert set(units) == {"init.scope", "nginx.service"}
+        nginx = units["nginx.service"]
+        assert nginx.pids == {100, 101}
+        assert nginx.threads == 6
+        assert nginx.rss_bytes == 15 * os.sysconf('SC_PAGE_SIZE')
+        assert nginx.fds == 5
+        assert nginx.cpu_time == pytest.approx(100 / os.sysconf('SC_CLK_TCK'))
+
+    def test_scan_filters_units(self, tmp_path):
+        _write_proc(tmp_path, 100, "/system.slice/a.service")
+        _write_proc(tmp_path, 200, "/system.slice/b.service")
+        (tmp_path / "300").mkdir()  # exited before its files were read
+        assert list(ProcScanner(str(tmp_path), count_fds=False).scan(["b.service"])) == ["b.service"]
+
+
+class TestTopSampler:
+    """Tests for the system-wide unit ranking."""
+
+    def test_ranking_by_key(self, tmp_path):
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=0, memory=100)
+        _write_cgroup(tmp_path, "/system.slice/b.service", usage_usec=0, memory=300)
+        _write_pressure(tmp_path, "/system.slice/a.service", "io", avg10=9.0)
+        sampler = TopSampler(str(tmp_path))
+        sampler.refresh(now=1.0)
+        _write_cgroup(tmp_path, "/system.slice/a.service", usage_usec=1_000_000, memory=100)
+        _write_cgroup(tmp_path, "/system.slice/b.service", usage_usec=200_000, memory=300)
+        sampler.refresh(now=2.0)
+        assert [u.unit for u in sampler.ranking("cpu")] == ["a.service", "b.service"]
+        assert sampler.ranking("cpu")[0].cpu_percent == pytest.approx(100.0)
+        assert [u.unit for u in sampler.ranking("memory", limit=1)] == ["b.service"]
+        top = sampler.ranking("pressure")[0]
+        assert (top.unit, top.pressure, top.pressure_resource) == ("a.service", 9.0, "io")
+
+    def test_rows_updated_in_place(self, tmp_path):
+        for name in ("a", "b", "c"):
+            _write_cgroup(tmp_path, f"/system.slice/{name}.service", memory=ord(name))
+        sampler = TopSampler(str(tmp_path))
+        sampler.refresh(now=1.0)
+        first = sampler.ranking("memory")
+        shutil.rmtree(tmp_path / "system.slice" / "c.service")
+        _write_cgroup(tmp_path, "/system.slice/d.service", memory=1)
+        sampler.refresh(now=2.0)
+        second = sampler.ranking("memory")
+        assert [u.unit for u in second] == ["b.service", "a.service", "d.service"]
+        assert second[0] is first[1]
+
+
+class TestSliceTree:
+    """Tests for slice hierarchy aggregation."""
+
+    def test_rollup_mirrors_cgroup_tree(self):
+        root = build_slice_tree([
+            UnitUsage("a.service", "/system.slice/a.service", cpu_percent=10.0, memory_bytes=100, tasks=1),
+            UnitUsage("b.service", "/system.slice/b.service", cpu_percent=5.0, memory_bytes=50, tasks=2,
+                      io_read_rate=8.0),
+            UnitUsage("db.service", "/tenant.slice/tenant-x.slice/db.service", cpu_percent=20.0,
+                      memory_bytes=1000, io_write_rate=4.0),
+            UnitUsage("init.scope", "/init.scope", memory_bytes=1),
+        ])
+        assert [child.name for child in root.children] == ["system.slice", "tenant.slice", "init.scope"]
+        system = root.find("system.slice")
+        assert (system.cpu_percent, system.memory_bytes, system.tasks, system.unit_count) == (15.0, 150, 3, 2)
+        assert system.io_rate == 8.0
+        tenant = root.find("tenant.slice")
+        assert tenant.children[0].name == "tenant-x.slice" and tenant.children[0].is_slice
+        assert (tenant.cpu_percent, tenant.memory_bytes, tenant.io_write_rate) == (20.0, 1000, 4.0)
+        assert (root.cpu_percent, root.memory_bytes, root.unit_count) == (35.0, 1151, 4)
+        assert not root.find("db.service").is_slice
+        assert [depth for depth, _ in root.walk()][:4] == [0, 1, 2, 2]
+
+    def test_from_sampler(self, tmp_path):
+        _write_cgroup(tmp_path, "/user.slice/user-1000.slice/user@1000.service", memory=300, pids=4)
+        _write_cgroup(tmp_path, "/user.slice/user-1001.slice/user@1001.service", memory=200, pids=1)
+        sampler = TopSampler(str(tmp_path))
+        sampler.refresh(now=1.0)
+        user = build_slice_tree(sampler.ranking()).find("user.slice")
+        assert (user.memory_bytes, user.tasks, user.unit_count) == (500, 5, 2)
+
+
+def _write_memory_events(root, cgroup, name="memory.events", **counters):
+    """Write a memory.events file with the given counters (others 0)."""
+    directory = root / cgroup.lstrip("/")
+    directory.mkdir(parents=True, exist_ok=True)
+    keys = ("low", "high", "max", "oom", "oom_kill", "oom_group_kill")
+    (directory / name).write_text("".join(f"{key} {counters.get(key, 0)}\n" for key in keys))
+
+
+class TestMemoryEventWatcher:
+    """Tests for the inotify memory.events watcher."""
+
+    def test_reports_counter_increases(self, tmp_path):
+        cgroup = "/system.slice/sshd.service"
+        _write_memory_events(tmp_path, cgroup, high=3)
+        _write_memory_events(tmp_path, cgroup, "memory.events.local", high=3)
+        watcher = MemoryEventWatcher(str(tmp_path))
+        seen = []
+        watcher.add_callback(seen.append)
+        assert watcher.watch("sshd", cgroup)
+        assert watcher.process() == []  # idle: nothing pending
+
+        _write_memory_events(tmp_path, cgroup, high=5, oom=1, oom_kill=1)
+        events = watcher.process(timeout=1)
+        assert [(e.unit, e.counter, e.increase, e.count, e.local) for e in events] == [
+            ("sshd", "high", 2, 5, False), ("sshd", "oom", 1, 1, False),
+            ("sshd", "oom_kill", 1, 1, False)]
+        assert seen == events
+        _write_memory_events(tmp_path, cgroup, "memory.events.local", high=4)
+        assert [(e.counter, e.local) for e in watcher.process(timeout=1)] == [("high", True)]
+        watcher.close()
+
+    def test_removed_cgroup_is_rewatched(self, tmp_path):
+        cgroup = "/system.slice/sshd.service"
+        _write_memory_events(tmp_path, cgroup, oom_kill=2)
+        watcher = MemoryEventWatcher(str(tmp_path))
+        watcher.watch("sshd", cgroup)
+        shutil.rmtree(tmp_path / "system.slice")
+        assert watcher.process(timeout=1) == []
+        assert watcher.units() == []
+        # Restarted unit: the new cgroup's counters are the baseline
+        _write_memory_events(tmp_path, cgroup)
+        assert watcher.watch("sshd", cgroup)
+        _write_memory_events(tmp_path, cgroup, max=1)
+        assert [e.counter for e in watcher.process(timeout=1)] == ["max"]
+        assert not watcher.watch("other", "/system.slice/missing.service")
+        watcher.close()
+
+
+class TestRateTracker:
+    """Tests for counter rate tracking."""
+
+    def test_rate_from_delta(self):
+        rates = RateTracker()
+        assert rates.update("a", 100, now=1.0) is None
+        assert rates.update("a", 300, now=3.0) == 100.0
+
+    def test_generation_change_resets(self):
+        rates = RateTracker()
+        rates.update("a", 100, now=1.0, generation=812)
+        assert rates.update("a", 500, now=2.0, generation=913) is None
+        assert rates.update("a", 600, now=3.0, generation=913) == 100.0
+        assert rates.resets == 1
+
+    def test_retain(self):
+        rates = RateTracker()
+        rates.update(1, 0)
+        rates.update(2, 0)
+        rates.retain([2])
+        assert 1 not in rates
+        assert len(rates) == 1
+
+
+class TestRingBuffer:
+    """Tests for the columnar ring buffer."""
+
+    def test_wraps_and_keeps_order(self):
+        buffer = RingBuffer(3, [("value", "q")])
+        for i in range(5):
+            buffer.append(float(i), i * 10)
+        assert len(buffer) == 3
+        assert list(buffer.column("timestamp")) == [2.0, 3.0, 4.0]
+        assert list(buffer.rows()) == [(2.0, 20), (3.0, 30), (4.0, 40)]
+        assert buffer.row(-1) == (4.0, 40)
+
+    def test_segments_are_zero_copy(self):
+        buffer = RingBuffer(4, [("value", "d")])
+        for i in range(6):
+            buffer.append(float(i), i / 2)
+        segments = buffer.segments("value")
+        assert len(segments) == 2
+        assert [v for seg in segments for v in seg] == [1.0, 1.5, 2.0, 2.5]
+        assert all(isinstance(seg, memoryview) for seg in segments)
+        assert [v for seg in buffer.segments("value", 1, 3) for v in seg] == [1.5, 2.0]
+
+    def test_lazy_column(self):
+        buffer = RingBuffer(4, [("value", "q"), ("extra", "f")], lazy=["extra"])
+        buffer.append(1.0, 10, 0.0)
+        assert buffer.nbytes == 4 * 8 * 2
+        assert buffer.row(0) == (1.0, 10, 0)
+        assert [v for seg in buffer.segments("extra") for v in seg] == [0.0]
+        buffer.append(2.0, 20, 1.5)
+        assert buffer.nbytes == 4 * 8 * 2 + 4 * 4
+        assert list(buffer.column("extra")) == [0.0, 1.5]
+
+    def test_monitoring_engine_history(self):
+        engine = MonitoringEngine(systemd_manager=Mock(), history_length=300)
+        for i in range(400):
+            engine.record_metrics("sshd", Metrics(float(i), 1.5, 4096, 1, 2))
+        history = engine.get_history("sshd", duration=1000, now=399.0)
+        assert len(history) == 300
+        assert history[0] == Metrics(100.0, 1.5, 4096, 1, 2)
+        # 500 monitored units fit in a few MB
+        assert engine.metrics_history["sshd"].nbytes * 500 < 8 * 1024 * 1024
+        engine.close()
+
+    def test_window_binary_search(self):
+        buffer = RingBuffer(4, [("value", "d")])
+        for i in range(6):
+            buffer.append(float(i * 10), float(i))
+        # Holds timestamps 20, 30, 40, 50
+        assert buffer.window(25.0) == (1, 4)
+        assert buffer.window(30.0, 40.0) == (1, 3)
+        assert buffer.window(99.0) == (4, 4)
+
+    def test_history_duration_and_summary(self):
+        engine = MonitoringEngine(systemd_manager=Mock())
+        for i in range(100):
+            engine.record_metrics("sshd", Metrics(float(i), float(i), i * 1024))
+        assert [m.timestamp for m in engine.get_history("sshd", duration=2, now=99.0)] == [97.0, 98.0, 99.0]
+        summary = engine.get_summary("sshd", duration=10, now=99.0)
+        cpu = summary["cpu_usage"]
+        assert cpu["count"] == 11
+        assert cpu["min"] == 89.0
+        assert cpu["max"] == 99.0
+        assert cpu["mean"] == 94.0
+        assert cpu["p50"] == 94.0
+        assert cpu["p95"] == pytest.approx(98.5)
+        series = engine.get_series("sshd", ["timestamp", "cpu_usage"], duration=1, now=99.0)
+        assert [v for seg in series["cpu_usage"] for v in seg] == [98.0, 99.0]
+        engine.close()
+
+
+def _read(engine, service="sshd"):
+    """Take one sample the way get_current_metrics() does, without the executor."""
+    sample = engine._read_sample(service)
+    engine._apply_sample(service, sample)
+    return sample.metrics
+
+
+def _fake_systemd(delay):
+    """SystemdManager stand-in whose samples take delay seconds."""
+    import asyncio
+    import time
+
+    async def run_blocking(func, *args, timeout=None):
+        await asyncio.sleep(delay)
+        return _Sample(Metrics(time.time(), 0.0, 0), '', None)
+
+    systemd = Mock()
+    systemd.run_blocking = run_blocking
+    return systemd
+
+
+class TestRollupTier:
+    """Tests for downsampling tiers."""
+
+    def test_buckets_aggregate_incrementally(self):
+        tier = RollupTier(60.0, 3600.0, ["cpu"])
+        for t, value in ((0, 1.0), (30, 5.0), (59, 3.0), (60, 10.0), (130, 2.0)):
+            tier.add(float(t), [value])
+        buckets = tier.buckets(0.0)
+        assert [b.timestamp for b in buckets] == [0.0, 60.0, 120.0]
+        first = buckets[0]
+        assert first.count == 3
+        assert (first.min["cpu"], first.max["cpu"], first.avg["cpu"], first.last["cpu"]) == (1.0, 5.0, 3.0, 3.0)
+        assert buckets[-1].count == 1  # open bucket is included
+        assert [b.timestamp for b in tier.buckets(100.0)] == [60.0, 120.0]
+
+    def test_retention_bounds_memory(self):
+        tier = RollupTier(60.0, 600.0, ["cpu"])
+        for t in range(0, 3600, 10):
+            tier.add(float(t), [1.0])
+        assert len(tier.buckets(0.0)) == 11  # 10 closed buckets plus the open one
+        assert tier.nbytes == 10 * (8 + 4 + 4 * 4)
+
+    def test_storage_grows_with_buckets(self):
+        tier = RollupTier(1.0, 600.0, ["cpu"])
+        bucket = 8 + 4 + 4 * 4
+        assert tier.nbytes == RollupTier.INITIAL_BUCKETS * bucket
+        timestamps = tier._buffer.column("timestamp")
+        for t in range(100):
+            tier.add(float(t), [float(t)])
+        assert tier.nbytes == 128 * bucket
+        assert timestamps[-1] == 98.0  # views follow the reallocation
+        for t in range(100, 2000):
+            tier.add(float(t), [float(t)])
+        assert tier.nbytes == 600 * bucket
+        assert [b.max["cpu"] for b in tier.buckets(1997.0)] == [1997.0, 1998.0, 1999.0]
+
+    def test_engine_picks_tier_by_range(self):
+        engine = MonitoringEngine(interval=1.0, systemd_manager=Mock(), history_length=60,
+                                  rollup_tiers=[(60.0, 3600.0), (900.0, 86400.0)])
+        for t in range(7200):
+            engine.record_metrics("sshd", Metrics(float(t), float(t % 60), 1024))
+        resolution, buckets = engine.get_rollup("sshd", 30, now=7199.0)
+        assert resolution == 1.0 and len(buckets) == 31
+        resolution, buckets = engine.get_rollup("sshd", 1800, now=7199.0)
+        assert resolution == 60.0 and len(buckets) == 31
+        assert buckets[0].min["cpu_usage"] == 0.0 and buckets[0].max["cpu_usage"] == 59.0
+        resolution, buckets = engine.get_rollup("sshd", 7200, now=7199.0)
+        assert resolution == 900.0 and len(buckets) == 8
+
+    def test_default_tiers(self):
+        engine = MonitoringEngine(interval=1.0, systemd_manager=Mock(), memory_events=False)
+        for t in range(900):
+            engine.record_metrics("sshd", Metrics(float(t), 1.0, 1024))
+        # Beyond the 5 min raw history, the 1 s tier covers 10 min
+        resolution, buckets = engine.get_rollup("sshd", 540, now=899.0)
+        assert resolution == 1.0 and len(buckets) == 541
+        assert sum(tier.nbytes for tier in engine.rollups["sshd"]) < 100 * 1024
+        engine.close()
+
+
+class TestMetricsStore:
+    """Tests for memory-mapped metric files."""
+
+    FIELDS = [("cpu", "f"), ("mem", "q")]
+
+    def test_reopen_keeps_history(self, tmp_path):
+        ring = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        for t in range(6):
+            ring.append(float(t), t * 0.5, t * 1024)
+        ring.close()
+        ring = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        assert list(ring.rows()) == [(float(t), t * 0.5, t * 1024) for t in range(2, 6)]
+        assert isinstance(ring.segments("mem")[0].obj, mmap.mmap)  # no copy of the file
+        ring.close()
+
+    def test_torn_append_is_dropped(self, tmp_path):
+        ring = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        for t in range(5):
+            ring.append(float(t), 1.0, 1)
+        # Crash after the values and the header count, before the sequence number
+        ring._seq[ring._head] = 0
+        ring._count_view[0] = 6
+        ring._columns[0][ring._head] = 99.0
+        ring.close()
+        ring = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        # Slot of record 2 was overwritten by the torn record 6
+        assert [row[0] for row in ring.rows()] == [2.0, 3.0, 4.0]
+        ring.append(5.0, 1.0, 1)
+        assert [row[0] for row in ring.rows()] == [2.0, 3.0, 4.0, 5.0]
+        ring.close()
+
+    def test_layout_change_recreates_file(self, tmp_path):
+        RingFile(tmp_path / "a.ring", 4, self.FIELDS).close()
+        ring = RingFile(tmp_path / "a.ring", 8, self.FIELDS)
+        assert len(ring) == 0 and ring.capacity == 8
+        ring.close()
+
+    def test_second_writer_opens_read_only(self, tmp_path):
+        writer = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        reader = RingFile(tmp_path / "a.ring", 4, self.FIELDS)
+        assert writer.writable and not reader.writable
+        writer.append(1.0, 2.0, 3)
+        reader.reload()
+        assert list(reader.rows()) == [(1.0, 2.0, 3)]
+        with pytest.raises(ValueError):
+            reader.append(2.0, 2.0, 3)
+        reader.close()
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_engine_reloads_from_store(self, tmp_path):
+        import asyncio
+        loaders = []
+
+        async def run_blocking(func, *args, timeout=None):
+            loaders.append(func.__name__)
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+        def engine():
+            store = MetricsStore(MonitoringEngine.HISTORY_FIELDS, str(tmp_path), capacity=100)
+            return MonitoringEngine(interval=1.0, systemd_manager=Mock(run_blocking=run_blocking),
+                                    history_length=10, rollup_tiers=[(60.0, 3600.0)], store=store)
+
+        first = engine()
+        for t in range(50):
+            first.record_metrics("sshd", Metrics(float(t), 1.0, 2048))
+        first.close()
+        assert first.store.units() == ["sshd"]
+
+        second = engine()
+        second.update_services(["sshd"])
+        assert "sshd" not in second.metrics_history
+        # Replayed on the worker pool, installed on the loop thread
+        await second.load_history(["sshd"])
+        assert loaders == ["_read_stored"]
+        assert len(second.get_history("sshd", 5, now=49.0)) == 6
+        resolution, buckets = second.get_rollup("sshd", 100, now=49.0)
+        assert resolution == 60.0 and buckets[0].count == 50
+        second.close()
+
+    def test_store_from_config(self, tmp_path):
+        config = {"monitoring": {"history_store": str(tmp_path / "metrics")}}
+        engine = MonitoringEngine.from_config(config, systemd_manager=Mock())
+        engine.record_metrics("sshd", Metrics(1.0, 2.0, 4096))
+        engine.close()
+        assert MetricsStore(MonitoringEngine.HISTORY_FIELDS, str(tmp_path / "metrics")).units() == ["sshd"]
+        engine = MonitoringEngine.from_config({}, systemd_manager=Mock())
+        assert engine.store is None
+        engine.close()
+
+
+class TestMonitoringMetrics:
+    """Tests for MonitoringEngine metric sampling."""
+
+    @staticmethod
+    def _props(cpu_ns, invocation=b"\x01", memory=4096):
+        return {"CPUUsageNSec": cpu_ns, "MemoryCurrent": memory,
+                "IPIngressBytes": 2 ** 64 - 1, "IPEgressBytes": 2 ** 64 - 1,
+                "ControlGroup": "/system.slice/sshd.service", "InvocationID": list(invocation)}
+
+    @patch('core.monitor.time.monotonic')
+    def test_rates_from_one_getall(self, mock_monotonic):
+        systemd = Mock()
+        systemd.get_unit_properties.side_effect = [
+            self._props(1_000_000_000),
+            self._props(1_500_000_000),
+            self._props(100, invocation=b"\x02", memory=2 ** 64 - 1),
+        ]
+        mock_monotonic.side_effect = [10.0, 12.0, 14.0]
+        engine = MonitoringEngine(systemd_manager=systemd)
+
+        first = _read(engine)
+        assert first.cpu_usage == 0.0
+        second = _read(engine)
+        assert second.cpu_usage == pytest.approx(25.0)
+        assert second.io_read == 0.0  # I/O monitoring is off by default
+        assert second.memory_usage == 4096
+        assert second.ip_ingress == 0.0
+        # Restarted unit: new baseline instead of a negative rate
+        restarted = _read(engine)
+        assert restarted.cpu_usage == 0.0
+        assert restarted.memory_usage == 0
+        systemd.get_unit_properties.assert_called_with("sshd.service", MonitoringEngine.METRIC_PROPERTIES)
+        engine.close()
+
+    @patch('core.monitor.time.monotonic')
+    def test_pressure_in_history(self, mock_monotonic, tmp_path):
+        cgroup = "/system.slice/sshd.service"
+        systemd = Mock()
+        systemd.get_unit_properties.return_value = self._props(0)
+        mock_monotonic.side_effect = [10.0, 12.0]
+        engine = MonitoringEngine(systemd_manager=systemd, cgroup_root=str(tmp_path),
+                                  rollup_tiers=[(60.0, 3600.0)])
+
+        _write_pressure(tmp_path, cgroup, "io", 40.12, 7.5, 2_000_000)
+        engine.record_metrics("sshd", _read(engine))
+        _write_pressure(tmp_path, cgroup, "io", 40.12, 7.5, 3_000_000)
+        metrics = _read(engine)
+        assert metrics.io_pressure_stall == pytest.approx(50.0)
+        engine.record_metrics("sshd", metrics)
+
+        latest = engine.get_history("sshd", 60, now=metrics.timestamp)[-1]
+        assert (latest.io_pressure_avg10, latest.io_pressure_avg60) == (40.12, 7.5)
+        assert latest.io_pressure_stall == 50.0
+        assert latest.cpu_pressure_avg10 == 0.0
+        assert engine.get_summary("sshd", 60, now=metrics.timestamp)["io_pressure_stall"]["max"] == 50.0
+        bucket = engine.rollups["sshd"][0].buckets(0.0)[-1]
+        assert bucket.max["io_pressure_stall"] == pytest.approx(50.0)
+        assert "io_pressure_avg10" not in bucket.max
+        engine.close()
+
+    def test_io_from_cgroup_io_stat(self, tmp_path):
+        cgroup = "/system.slice/sshd.service"
+        systemd = Mock()
+        systemd.get_unit_properties.return_value = self._props(0)
+        clock = [10.0]
+        engine = MonitoringEngine(systemd_manager=systemd, cgroup_root=str(tmp_path),
+                                  io_monitoring=True)
+
+        with patch('core.monitor.time.monotonic', lambda: clock[0]):
+            _write_cgroup(tmp_path, cgroup, io="8:0 rbytes=1000 wbytes=0 rios=10 wios=0\n")
+            assert _read(engine).io_read == 0.0  # baseline
+            clock[0] = 12.0
+            # A second device appears: its first reading is only a baseline
+            _write_cgroup(tmp_path, cgroup, io="8:0 rbytes=5000 wbytes=2000 rios=30 wios=4\n"
+                                                "259:0 rbytes=900000 wbytes=0 rios=70 wios=0\n")
+            metrics = _read(engine)
+            assert (metrics.io_read, metrics.io_write) == (2000.0, 1000.0)
+            assert (metrics.io_read_ops, metrics.io_write_ops) == (10.0, 2.0)
+            clock[0] = 14.0
+            _write_cgroup(tmp_path, cgroup, io="8:0 rbytes=5000 wbytes=2000 rios=30 wios=4\n"
+                                                "259:0 rbytes=902000 wbytes=0 rios=80 wios=0\n")
+            metrics = _read(engine)
+            assert (metrics.io_read, metrics.io_read_ops) == (1000.0, 5.0)
+            engine.record_metrics("sshd", metrics)
+            assert engine.get_history("sshd", 60, now=metrics.timestamp)[-1].io_read_ops == 5.0
+
+            # Turned off at runtime: no io.stat reads, baselines dropped
+            engine.io_monitoring = False
+            assert _read(engine).io_read == 0.0
+            assert not any(len(key) == 4 for key in engine._rates._samples)
+            engine.io_monitoring = True
+            clock[0] = 16.0
+            assert _read(engine).io_read == 0.0  # new baseline
+
+            # A sample that timed out is never applied, so cleanup stays final
+            late = engine._read_sample("sshd")
+            engine.cleanup_stale_services([])
+            assert late.io_keys and "sshd" not in engine._io_keys
+            assert not any(len(key) == 4 for key in engine._rates._samples)
+        engine.close()
+
+    @pytest.mark.asyncio
+    async def test_memory_events_in_history(self, tmp_path):
+        import asyncio
+        cgroup = "/system.slice/sshd.service"
+        _write_memory_events(tmp_path, cgroup)
+        systemd = Mock()
+        systemd.get_unit_properties.return_value = self._props(0)
+        engine = MonitoringEngine(systemd_manager=systemd, cgroup_root=str(tmp_path))
+        seen = asyncio.Event()
+        engine.add_memory_event_callback(lambda event: seen.set())
+
+        engine.get_current_metrics = AsyncMock(return_value=None)
+        await engine.start_monitoring(["sshd"])
+        _read(engine)  # starts watching the unit's cgroup
+        # A read finishing after the unit was dropped does not watch it again
+        engine._apply_sample("other", engine._read_sample("other"))
+        assert engine._memory_watcher.units() == ["sshd"]
+        _write_memory_events(tmp_path, cgroup, oom_kill=1)
+        await asyncio.wait_for(seen.wait(), 1)
+        await engine.stop_monitoring()
+
+        events = engine.get_memory_events("sshd")
+        assert [(e.counter, e.increase, e.count) for e in events] == [("oom_kill", 1, 1)]
+        engine.cleanup_stale_services([])
+        assert engine.get_memory_events("sshd") == []
+        assert engine._memory_watcher.units() == []
+
+        # close() gives the inotify instance back
+        fd = engine._memory_watcher.fileno()
+        engine.close()
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+    def test_from_config(self, tmp_path):
+        config = tmp_path / "config.yaml"
+        config.write_text("monitoring:\n  enable_io_monitoring: true\n  update_interval: 5\n"
+                          "general:\n  theme: dark\n")
+        loaded = load_config(config)
+        assert loaded["general"]["theme"] == "dark"
+        assert loaded["monitoring"]["history_length"] == 300  # default
+        engine = MonitoringEngine.from_config(loaded, systemd_manager=Mock())
+        assert engine.io_monitoring is True
+        assert (engine.interval, engine.history_length) == (5.0, 300)
+        engine.close()
+        assert load_config(tmp_path / "missing.yaml")["monitoring"]["enable_io_monitoring"] is False
+
+    def test_config_search_path(self, tmp_path):
+        user, system = tmp_path / "user", tmp_path / "system"
+        system.mkdir()
+        (system / "config.yaml").write_text("monitoring:\n  update_interval: 7\n")
+        (system / "group_templates.json").write_text('{"templates": [{"name": "Packaged"}]}')
+        with patch('core.config.CONFIG_SEARCH_PATH', [user, system]):
+            assert load_config()["monitoring"]["update_interval"] == 7
+            groups = ServiceGroupManager(config_path=tmp_path / "groups.json")
+            assert groups._load_templates()[0]["name"] == "Packaged"
+        with patch('core.config.CONFIG_SEARCH_PATH', [user]):
+            assert load_config()["monitoring"]["update_interval"] == 1  # built-in default
+
+
+class TestMonitoringScheduler:
+    """Tests for the MonitoringEngine sampling scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_samples_services_concurrently(self):
+        import asyncio
+        engine = MonitoringEngine(interval=0.1, systemd_manager=_fake_systemd(0.05))
+        await engine.start_monitoring([f"unit{i}" for i in range(10)])
+        await asyncio.sleep(0.33)
+        await engine.stop_monitoring()
+        # Sequential sampling would need 0.5 s per tick
+        assert 3 <= engine.scheduler_stats.ticks <= 5
+        assert all(len(engine.metrics_history[f"unit{i}"]) >= 3 for i in range(10))
+        assert engine.scheduler_stats.skipped_ticks == 0
+        engine.close()
+
+    @pytest.mark.asyncio
+    async def test_overrun_skips_ticks(self):
+        import asyncio
+        engine = MonitoringEngine(interval=0.05, systemd_manager=_fake_systemd(0.12))
+        await engine.start_monitoring(["slow"])
+        await asyncio.sleep(0.4)
+        await engine.stop_monitoring()
+        stats = engine.scheduler_stats
+        assert stats.overruns >= 1
+        assert stats.skipped_ticks >= 1
+        assert stats.ticks + stats.skipped_ticks >= 6
+        engine.close()
+
+    @pytest.mark.asyncio
+    async def test_update_services_at_runtime(self):
+        import asyncio
+        engine = MonitoringEngine(interval=0.05, systemd_manager=_fake_systemd(0))
+        await engine.start_monitoring(["a"])
+        await asyncio.sleep(0.12)
+        await engine.start_monitoring(["b"])
+        await asyncio.sleep(0.12)
+        await engine.stop_monitoring()
+        assert "a" not in engine.metrics_history
+        assert len(engine.metrics_history["b"]) >= 1
+        engine.close()
+
+
 class TestResourceMonitor:
     """Tests for ResourceMonitor class."""
 
@@ -363,6 +1466,95 @@ class TestResourceMonitor:
         res = monitor.get_service_resources("test.service")
         assert res.cpu_percent == 0.0
 
+    @patch('subprocess.run')
+    def test_get_multiple_resources_from_cgroups(self, mock_run, tmp_path):
+        _write_cgroup(tmp_path, "/system.slice/a.service", memory=2 * 1024 * 1024, pids=40)
+        _write_cgroup(tmp_path, "/system.slice/b.service", memory=1024 * 1024, pids=2)
+        _write_pressure(tmp_path, "/system.slice/a.service", "cpu", avg10=3.5)
+        mock_run.return_value = Mock(returncode=0, stdout=(
+            "MainPID=10\nControlGroup=/system.slice/a.service\n\n"
+            "MainPID=20\nControlGroup=/system.slice/b.service\n"))
+        monitor = ResourceMonitor(cgroup_root=str(tmp_path))
+        resources = monitor.get_multiple_resources(["a.service", "b.service"])
+        assert resources["a.service"].process_count == 40
+        assert resources["a.service"].memory_mb == 2.0
+        assert resources["b.service"].process_count == 2
+        assert resources["a.service"].some_pressure("cpu").avg10 == 3.5
+        assert resources["b.service"].some_pressure("cpu") == Pressure()
+        assert mock_run.call_count == 1
+
+    @patch('time.sleep')
+    def test_pid_fallback_does_not_sleep(self, mock_sleep):
+        scanner = ProcScanner()
+        monitor = ResourceMonitor(cgroup_root="/nonexistent")
+
+        def sample():
+            unit = UnitProcesses("test.service")
+            unit.add(scanner._read_process(os.getpid(), f"/proc/{os.getpid()}"))
+            return monitor._resources_from_procs("test.service", unit)
+
+        sample()
+        sum(range(200000))
+        res = sample()
+        assert res.process_count >= 1
+        assert res.cpu_percent >= 0.0
+        mock_sleep.assert_not_called()
+
+    @patch('time.sleep')
+    def test_proc_fallback_does_not_sleep(self, mock_sleep, tmp_path):
+        _write_proc(tmp_path, 10, "/system.slice/a.service", utime=100, threads=3, rss_pages=256)
+        _write_proc(tmp_path, 11, "/system.slice/a.service/worker", utime=0, fds=4)
+        monitor = ResourceMonitor(cgroup_root=str(tmp_path / "nocgroup"), proc_root=str(tmp_path))
+        clock = [1.0]
+        with patch('core.resource_monitor.time.monotonic', side_effect=lambda: clock[0]):
+            monitor._sample_batch(["a"])
+            clock[0] = 3.0
+            _write_proc(tmp_path, 10, "/system.slice/a.service", utime=100 + os.sysconf('SC_CLK_TCK'),
+                        threads=3, rss_pages=256)
+            res = monitor._sample_batch(["a"])["a"]
+        assert res.process_count == 2
+        assert res.thread_count == 4
+        assert res.fd_count == 4
+        assert res.memory_mb == round(256 * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+        assert res.cpu_percent == 50.0
+        mock_sleep.assert_not_called()
+
+    @patch('subprocess.run')
+    def test_cached_sample_is_reused(self, mock_run, tmp_path):
+        _write_cgroup(tmp_path, "/system.slice/a.service", pids=4)
+        mock_run.return_value = Mock(returncode=0, stdout="MainPID=10\nControlGroup=/system.slice/a.service\n")
+        monitor = ResourceMonitor(cgroup_root=str(tmp_path), cache_ttl=60)
+        assert monitor.get_service_resources("a.service").process_count == 4
+        assert monitor.get_service_resources("a.service").process_count == 4
+        assert mock_run.call_count == 1
+        assert monitor.cache_stats['hits'] == 1
+
+    @patch('subprocess.run')
+    def test_stale_sample_refreshed_in_background(self, mock_run, tmp_path):
+        import time
+        _write_cgroup(tmp_path, "/system.slice/a.service", pids=4)
+        mock_run.return_value = Mock(returncode=0, stdout="MainPID=10\nControlGroup=/system.slice/a.service\n")
+        monitor = ResourceMonitor(cgroup_root=str(tmp_path), cache_ttl=0, refresh_interval=0.05)
+        try:
+            monitor.get_multiple_resources(["a.service"])
+            _write_cgroup(tmp_path, "/system.slice/a.service", pids=7)
+            # The stale value is served while the sampler refreshes it
+            assert monitor.get_multiple_resources(["a.service"])["a.service"].process_count == 4
+            deadline = time.monotonic() + 2
+            while monitor._cache.get_stale("a.service")[0].process_count != 7:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+
+    @patch('subprocess.run')
+    def test_cache_is_bounded(self, mock_run):
+        mock_run.return_value = Mock(returncode=0, stdout="MainPID=0\n")
+        monitor = ResourceMonitor(max_entries=2)
+        for name in ("a.service", "b.service", "c.service"):
+            monitor.get_service_resources(name)
+        assert len(monitor._cache) == 2
+
     def test_clear_cache(self):
         monitor = ResourceMonitor()
         monitor._cache["test.service"] = ServiceResources(cpu_percent=10.0)
@@ -1,11 +1,118 @@
 """Tests for systemd module."""
 
+import asyncio
+import sys
+import time
+from unittest.mock import MagicMock, Mock
+
 import pytest
 
+# Mock dbus for testing without a system bus
+sys.modules.setdefault('dbus', MagicMock())
+sys.modules.setdefault('dbus.mainloop', MagicMock())
+sys.modules.setdefault('dbus.mainloop.glib', MagicMock())
+sys.modules.setdefault('dbus.service', MagicMock())
+sys.modules.setdefault('dbus.exceptions', MagicMock())
+
+from core.systemd import SystemdManager, UnitProxyCache
+
+
+def _slow(delay, result=None):
+    """Build a fake blocking D-Bus method that sleeps for delay seconds."""
+    def method(*args, **kwargs):
+        time.sleep(delay)
+        return result
+    return method
+
 
 class TestSystemdManager:
     """Tests for SystemdManager class."""
-    
-    def test_placeholder(self):
-        """Placeholder test."""
-        assert True
\ No newline at end of file
+
+    @pytest.fixture
+    def manager(self):
+        mgr = SystemdManager(call_timeout=1.0, max_concurrent_calls=8)
+        mgr.manager_interface = Mock()
+        yield mgr
+        mgr.close()
+
+    @pytest.mark.asyncio
+    async def test_calls_do_not_block_event_loop(self, manager):
+        manager.manager_interface.StartUnit = _slow(0.2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        assert await manager.start_service("sshd") is True
+        task.cancel()
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self, manager):
+        manager.manager_interface.StartUnit = _slow(0.1)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(manager.start_service(f"unit{i}") for i in range(8)))
+        elapsed = time.perf_counter() - start
+        assert all(results)
+        assert elapsed < 0.5  # sequential calls would take 0.8 s
+
+    @pytest.mark.asyncio
+    async def test_call_timeout(self, manager):
+        manager._call_timeout = 0.05
+        manager.manager_interface.StopUnit = _slow(0.3)
+        assert await manager.stop_service("sshd") is False
+
+    @pytest.mark.asyncio
+    async def test_disable_passes_runtime_flag(self, manager):
+        assert await manager.disable_service("sshd") is True
+        manager.manager_interface.DisableUnitFiles.assert_called_once_with(
+            ["sshd.service"], False, timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_no_connection(self, manager):
+        manager.manager_interface = None
+        assert await manager.start_service("sshd") is False
+        assert await manager.list_services() == []
+
+
+class TestUnitProxyCache:
+    """Tests for the bounded unit proxy cache."""
+
+    def test_lru_eviction(self):
+        cache = UnitProxyCache(max_entries=2)
+        cache.put("a.service", "/a", "proxy-a")
+        cache.put("b.service", "/b", "proxy-b")
+        cache.get("a.service")  # a is now most recently used
+        cache.put("c.service", "/c", "proxy-c")
+        assert cache.get("b.service") is None
+        assert cache.get("a.service") == ("/a", "proxy-a")
+        assert len(cache) == 2
+
+    def test_unit_removed_invalidates(self):
+        cache = UnitProxyCache()
+        cache.put("a.service", "/a", "proxy-a")
+        cache.on_unit_removed("a.service", "/a")
+        assert cache.get("a.service") is None
+
+    def test_unit_new_with_changed_path_invalidates(self):
+        cache = UnitProxyCache()
+        cache.put("a.service", "/a", "proxy-a")
+        cache.on_unit_new("a.service", "/a")
+        assert cache.get("a.service") is not None
+        cache.on_unit_new("a.service", "/other")
+        assert cache.get("a.service") is None
+
+    def test_manager_resolves_unit_once(self):
+        mgr = SystemdManager()
+        mgr.manager_interface = Mock()
+        mgr.manager_interface.LoadUnit.return_value = "/org/freedesktop/systemd1/unit/a_2eservice"
+        first = mgr.get_unit_properties_proxy("a.service")
+        second = mgr.get_unit_properties_proxy("a.service")
+        assert first is second
+        assert mgr.manager_interface.LoadUnit.call_count == 1
+        assert mgr.get_unit_path("a.service") == "/org/freedesktop/systemd1/unit/a_2eservice"
+        mgr.close()